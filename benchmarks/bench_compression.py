@@ -0,0 +1,56 @@
+"""Benchmark compression of the Arrow IPC buffers shipped to the client.
+
+For each example parquet file and codec, reports the payload size, the time
+to encode the payload, and the time to insert it into DuckDB (decoding the
+compressed buffers). Inserts are timed with DuckDB in Python as a proxy for
+DuckDB-wasm (where compressed payloads are decompressed in JavaScript before
+they are inserted, so browser inserts will be somewhat slower).
+
+Run with `python benchmarks/bench_compression.py`.
+"""
+
+import time
+from pathlib import Path
+
+import duckdb
+import pyarrow as pa
+from inspect_viz import Data
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+REPEAT = 5
+
+
+def main() -> None:
+    connection = duckdb.connect()
+    print(f"{'file':<24} {'codec':<6} {'size':>10} {'encode':>9} {'insert':>9}")
+    for path in sorted(EXAMPLES.glob("*/*.parquet")):
+        for codec in ["none", "lz4", "zstd"]:
+            data = Data(path, compression=codec)  # type: ignore[arg-type]
+            encode = timed(data._encode)
+            payload = data._encode()
+            insert = timed(lambda p=payload: insert_payload(connection, p))
+            print(
+                f"{path.name:<24} {codec:<6} {payload.nbytes / 1024:>8.0f}KB "
+                f"{encode * 1000:>7.1f}ms {insert * 1000:>7.1f}ms"
+            )
+
+
+def insert_payload(connection: duckdb.DuckDBPyConnection, payload: memoryview) -> None:
+    table = pa.ipc.open_stream(payload).read_all()
+    connection.register("payload", table)
+    connection.execute("CREATE OR REPLACE TABLE data AS SELECT * FROM payload")
+    connection.unregister("payload")
+
+
+def timed(fn: object) -> float:
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()  # type: ignore[operator]
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Benchmark compact encoding of the columns shipped to the client.
+
+Compares the size and encoding time of payloads for an eval results frame
+(low cardinality strings, 64-bit ints, and floats) with no encoding, the
+"auto" encoding, and the "auto" encoding with floats downcast to float32.
+
+Run with `python benchmarks/bench_encoding.py`.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from inspect_viz import Data
+
+ROWS = 2_000_000
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "model": rng.choice([f"model-{i}" for i in range(12)], ROWS),
+            "task": rng.choice([f"task-{i}" for i in range(40)], ROWS),
+            "scorer": rng.choice(["match", "includes", "model_graded_qa"], ROWS),
+            "epoch": rng.integers(1, 5, ROWS),
+            "tokens": rng.integers(0, 30_000, ROWS),
+            "score": rng.random(ROWS),
+        }
+    )
+
+    for name, encoding in [
+        ("none", None),
+        ("auto", "auto"),
+        ("auto + float32", {**{c: "auto" for c in df.columns}, "score": "float32"}),
+    ]:
+        data = Data(df, encoding=encoding)  # type: ignore[arg-type]
+        start = time.perf_counter()
+        payload = data._encode()
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {payload.nbytes / 1e6:.1f}MB in {elapsed * 1000:.0f}ms")
+        if encoding is not None:
+            for column, encoded in data.encoding_report().items():
+                print(
+                    f"  {column}: {encoded.encoding} ({encoded.type}), "
+                    f"{encoded.bytes_saved / 1e6:.1f}MB saved"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Benchmark construction of marks and plots.
+
+Run with `python benchmarks/bench_marks.py`.
+"""
+
+import time
+
+import pandas as pd
+from inspect_viz import Data
+from inspect_viz.layout import hconcat
+from inspect_viz.mark import dot
+from inspect_viz.plot import plot
+
+MARKS = 10_000
+PANELS = 200
+
+
+def main() -> None:
+    data = Data(pd.DataFrame({"x": range(100), "y": range(100)}))
+
+    start = time.perf_counter()
+    marks = [dot(data, x="x", y="y") for _ in range(MARKS)]
+    elapsed = time.perf_counter() - start
+    report(f"construct {MARKS:,} marks", elapsed)
+
+    start = time.perf_counter()
+    plot(marks)
+    elapsed = time.perf_counter() - start
+    report(f"construct plot with {MARKS:,} marks", elapsed)
+
+    start = time.perf_counter()
+    hconcat(*[plot(dot(data, x="x", y="y")) for _ in range(PANELS)])
+    elapsed = time.perf_counter() - start
+    report(f"construct {PANELS} panel small multiples", elapsed)
+
+
+def report(name: str, elapsed: float) -> None:
+    print(f"{name}: {elapsed * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
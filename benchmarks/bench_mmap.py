@@ -0,0 +1,79 @@
+"""Benchmark loading and shipping an uncompressed Arrow IPC file.
+
+Compares reading the file with pandas and encoding it for the client (the
+previous path) with `Data`, which memory maps the file and ships it as is
+(shipping the columns a plot references, which for mapped files is all of
+them rather than a re-encoded subset).
+Each run is in a fresh process so that peak memory is measured in isolation.
+
+Run with `python benchmarks/bench_mmap.py`.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+
+ROWS = 20_000_000
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as dir:
+        path = os.path.join(dir, "data.arrow")
+        rng = np.random.default_rng(0)
+        table = pa.table({"id": np.arange(ROWS), "score": rng.random(ROWS)})
+        feather.write_feather(table, path, compression="uncompressed")
+        del table
+        print(f"file size: {os.path.getsize(path) / 1024 / 1024:.0f}MB")
+
+        for method in ["pandas", "mmap"]:
+            result = subprocess.run(
+                [sys.executable, __file__, method, path],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            print(f"{method}: {result.stdout.strip()}")
+
+
+def ship(method: str, path: str) -> None:
+    import pandas as pd
+    from inspect_viz import Data
+    from inspect_viz._core.data import encode_ipc_stream
+
+    start = time.perf_counter()
+    if method == "pandas":
+        table = pa.Table.from_pandas(pd.read_feather(path))
+        load = time.perf_counter() - start
+        payload = encode_ipc_stream(pa.RecordBatchReader.from_stream(table))
+    else:
+        data = Data(path, chunk_size=sys.maxsize)
+        load = time.perf_counter() - start
+        payload = data._encode(data._ship(["score"]))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"load {load * 1000:.1f}ms, load and encode {elapsed * 1000:.1f}ms "
+        f"({payload.nbytes / 1024 / 1024:.0f}MB), peak rss {peak_rss():.0f}MB"
+    )
+
+
+def peak_rss() -> float:
+    # (ru_maxrss includes the memory of the parent process at fork)
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        ship(sys.argv[1], sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,93 @@
+"""Benchmark shipping data to the client as parquet rather than Arrow IPC.
+
+For each example parquet file (read into a data frame, so that parquet
+payloads are encoded rather than forwarded as is) and a table of
+transcript-like text, reports the payload size, the time to encode the
+payload, and the time to insert it into DuckDB. Inserts are timed with
+DuckDB in Python as a proxy for DuckDB-wasm (where parquet payloads are
+registered as file buffers and read with `read_parquet()`).
+
+Run with `python benchmarks/bench_parquet.py`.
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from inspect_viz import Data
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+REPEAT = 5
+
+
+def main() -> None:
+    connection = duckdb.connect()
+    frames = {
+        path.name: pd.read_parquet(path)
+        for path in sorted(EXAMPLES.glob("*/*.parquet"))
+    }
+    frames["transcripts"] = transcripts()
+    print(f"{'data':<24} {'format':<8} {'size':>10} {'encode':>9} {'insert':>9}")
+    with tempfile.TemporaryDirectory() as dir:
+        for name, df in frames.items():
+            for format in ["arrow", "parquet"]:
+                data = Data(df, format=format)  # type: ignore[arg-type]
+                encode = timed(data._encode)
+                payload = data._encode()
+                insert = timed(
+                    lambda p=payload, f=format: insert_payload(connection, p, f, dir)
+                )
+                print(
+                    f"{name:<24} {format:<8} {payload.nbytes / 1024:>8.0f}KB "
+                    f"{encode * 1000:>7.1f}ms {insert * 1000:>7.1f}ms"
+                )
+
+
+def transcripts(rows: int = 20_000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    prompts = [
+        f"System prompt {i}: " + "You are a helpful assistant. " * 40 for i in range(10)
+    ]
+    return pd.DataFrame(
+        {
+            "model": rng.choice(
+                ["gpt-4o", "claude-3-7-sonnet", "gemini-2.0-flash"], rows
+            ),
+            "prompt": rng.choice(prompts, rows),
+            "score": rng.random(rows),
+        }
+    )
+
+
+def insert_payload(
+    connection: duckdb.DuckDBPyConnection, payload: memoryview, format: str, dir: str
+) -> None:
+    if format == "parquet":
+        path = Path(dir) / "payload.parquet"
+        path.write_bytes(payload)
+        connection.execute(
+            f"CREATE OR REPLACE TABLE data AS SELECT * FROM read_parquet('{path}')"
+        )
+    else:
+        table = pa.ipc.open_stream(payload).read_all()
+        connection.register("payload", table)
+        connection.execute("CREATE OR REPLACE TABLE data AS SELECT * FROM payload")
+        connection.unregister("payload")
+
+
+def timed(fn: object) -> float:
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()  # type: ignore[operator]
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    main()
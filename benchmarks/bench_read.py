@@ -0,0 +1,76 @@
+"""Benchmark reading data files (pandas readers vs. arrow readers).
+
+Each read runs in a fresh process so that peak memory is measured in
+isolation. The pandas path includes the conversion to arrow that is required
+to ship the data to the client.
+
+Run with `python benchmarks/bench_read.py`.
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROWS = 5_000_000
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as dir:
+        paths = write_files(dir)
+        for path in paths:
+            for reader in ["pandas", "arrow"]:
+                result = subprocess.run(
+                    [sys.executable, __file__, reader, path],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                print(f"{os.path.basename(path)} ({reader}): {result.stdout.strip()}")
+
+
+def write_files(dir: str) -> list[str]:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "id": np.arange(ROWS),
+            "score": rng.random(ROWS),
+            "model": rng.choice(["a", "b", "c", "d"], ROWS),
+        }
+    )
+    paths = [os.path.join(dir, f"data.{ext}") for ext in ["csv", "parquet", "feather"]]
+    df.to_csv(paths[0], index=False)
+    df.to_parquet(paths[1])
+    df.to_feather(paths[2])
+    return paths
+
+
+def read(reader: str, path: str) -> None:
+    import pyarrow as pa
+    from inspect_viz._core.data import _read_df_from_file
+
+    start = time.perf_counter()
+    if reader == "pandas":
+        ext = os.path.splitext(path)[1]
+        read_pandas = dict(
+            csv=pd.read_csv, parquet=pd.read_parquet, feather=pd.read_feather
+        )[ext[1:]]
+        pa.Table.from_pandas(read_pandas(path))
+    else:
+        _read_df_from_file(path)
+    elapsed = time.perf_counter() - start
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed * 1000:.1f}ms, peak rss {rss:.0f}MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        read(sys.argv[1], sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,46 @@
+"""Benchmark spec construction for wide tables.
+
+Run with `python benchmarks/bench_wide.py`.
+"""
+
+import time
+
+import pandas as pd
+from inspect_viz import Data
+from inspect_viz.input import select, slider
+from inspect_viz.layout import vconcat
+from inspect_viz.mark import dot
+from inspect_viz.plot import plot
+
+COLUMNS = 5_000
+PLOTS = 500
+
+
+def main() -> None:
+    data = Data(pd.DataFrame({f"col_{i}": range(10) for i in range(COLUMNS)}))
+    columns = [f"col_{i}" for i in range(COLUMNS - 1, COLUMNS - PLOTS - 1, -1)]
+
+    start = time.perf_counter()
+    plots = [
+        plot(dot(data, x=column, y=columns[0], fill=column, stroke=column))
+        for column in columns
+    ]
+    report(f"construct {PLOTS} plots of a {COLUMNS:,} column table", start)
+
+    start = time.perf_counter()
+    inputs = [slider(data, column=column) for column in columns]
+    inputs += [select(data, column=column) for column in columns]
+    report(f"construct {len(inputs)} inputs of a {COLUMNS:,} column table", start)
+
+    start = time.perf_counter()
+    component = vconcat(*plots, *inputs)
+    component.widget._repr_mimebundle_()
+    report("display dashboard", start)
+
+
+def report(name: str, start: float) -> None:
+    print(f"{name}: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+declare module 'https://cdn.jsdelivr.net/npm/fzstd@0.1.1/+esm' {
+    export function decompress(data: Uint8Array, out?: Uint8Array): Uint8Array;
+}
+
+declare module 'https://cdn.jsdelivr.net/npm/lz4js@0.2.0/+esm' {
+    const lz4: { decompress(data: Uint8Array, maxSize?: number): Uint8Array };
+    export default lz4;
+}
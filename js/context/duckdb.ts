@@ -54,3 +54,24 @@ export async function waitForTable(
         await new Promise(r => setTimeout(r, interval));
     }
 }
+
+export async function columnCount(conn: AsyncDuckDBConnection, table: string) {
+    const res = await conn.query(
+        `SELECT count(*) AS n
+           FROM information_schema.columns
+         WHERE table_schema = 'main'
+           AND table_name   = '${table}'`
+    );
+    return Number(res.getChild('n')?.get(0) ?? 0);
+}
+
+export async function columnNames(conn: AsyncDuckDBConnection, table: string) {
+    const res = await conn.query(
+        `SELECT column_name AS name
+           FROM information_schema.columns
+         WHERE table_schema = 'main'
+           AND table_name   = '${table}'
+         ORDER BY ordinal_position`
+    );
+    return res.getChild('name')?.toArray().map(String) ?? [];
+}
@@ -1,57 +1,293 @@
+import type { AnyModel } from '@anywidget/types';
+
 import { AsyncDuckDBConnection } from 'https://cdn.jsdelivr.net/npm/@duckdb/duckdb-wasm@1.29.0/+esm';
 
-import { wasmConnector } from 'https://cdn.jsdelivr.net/npm/@uwdata/mosaic-core@0.16.2/+esm';
+import {
+    socketConnector,
+    wasmConnector,
+} from 'https://cdn.jsdelivr.net/npm/@uwdata/mosaic-core@0.16.2/+esm';
 
 import { InstantiateContext } from 'https://cdn.jsdelivr.net/npm/@uwdata/mosaic-spec@0.16.2/+esm';
 
 import { CUSTOM_INPUTS } from '../inputs';
-import { initDuckdb, waitForTable } from './duckdb';
+import { columnCount, columnNames, initDuckdb, waitForTable } from './duckdb';
+import { KernelConnector } from './kernel';
+import { decompressIPC } from './ipc';
 import { initializeErrorHandling } from '../util/errors.js';
 
+// loads the remaining chunks of a table shipped in chunks
+interface ChunksLoader {
+    remaining: number;
+    load: (onChunk: () => void) => Promise<void>;
+}
+
+// an insert into a table (chunks are inserted into the target, which is
+// combined with the table when the insert is finished)
+interface TableInsert {
+    target: string;
+    finish: () => Promise<void>;
+}
+
+// backend used to execute data queries ('browser' uses duckdb-wasm, 'kernel'
+// sends queries to duckdb in the python kernel, and 'server' sends queries
+// to a python query server over a websocket)
+type DataBackend = 'browser' | 'kernel' | 'server';
+
 class VizContext extends InstantiateContext {
     private readonly tables_ = new Set<string>();
+    private readonly loading_ = new Map<string, Promise<void>>();
+    private readonly versions_ = new Map<string, number>();
+    private files_ = 0;
+    private readonly kernel_?: KernelConnector;
 
     constructor(
-        private readonly conn_: AsyncDuckDBConnection,
-        plotDefaults: any[]
+        private readonly conn_: AsyncDuckDBConnection | undefined,
+        plotDefaults: any[],
+        private readonly serverUrl_?: string
     ) {
         super({
             plotDefaults,
         });
         this.api = { ...this.api, ...CUSTOM_INPUTS };
-        this.coordinator.databaseConnector(wasmConnector({ connection: this.conn_ }));
+        if (this.conn_) {
+            this.coordinator.databaseConnector(wasmConnector({ connection: this.conn_ }));
+        } else if (this.serverUrl_) {
+            this.coordinator.databaseConnector(socketConnector({ uri: this.serverUrl_ }));
+        } else {
+            this.kernel_ = new KernelConnector();
+            this.coordinator.databaseConnector(this.kernel_);
+        }
     }
 
-    async insertTable(table: string, data: Uint8Array) {
-        // insert table into database
-        await this.conn_?.insertArrowFromIPCStream(data, {
-            name: table,
-            create: true,
-        });
+    get backend(): DataBackend {
+        return this.conn_ ? 'browser' : this.serverUrl_ ? 'server' : 'kernel';
+    }
+
+    // set the widget model used to send queries to the kernel
+    setKernelModel(model: AnyModel<any>) {
+        this.kernel_?.setModel(model);
+    }
+
+    private get conn(): AsyncDuckDBConnection {
+        if (!this.conn_) {
+            throw new Error(
+                `Tables cannot be inserted when using the ${this.backend} data backend.`
+            );
+        }
+        return this.conn_;
+    }
+
+    // insert a table into the database (returns false if the table already
+    // had the version and columns provided, in which case the data is not
+    // inserted)
+    async insertTable(table: string, data: Uint8Array, version = 0): Promise<boolean> {
+        const unlock = await this.lockTable(table);
+        try {
+            const insert = await this.beginInsert(table, data, version);
+            await insert?.finish();
+            return insert !== undefined;
+        } finally {
+            unlock();
+        }
+    }
+
+    // insert a table shipped in chunks. the first chunk is inserted right away
+    // (so visualizations can render with it) and the returned loader appends
+    // the remaining chunks as they arrive. components waiting for the table
+    // wait until all of its chunks have been inserted.
+    async insertTableChunks(
+        table: string,
+        first: Uint8Array,
+        remaining: number,
+        chunks: () => AsyncIterable<Uint8Array>,
+        version = 0
+    ): Promise<ChunksLoader> {
+        const unlock = await this.lockTable(table);
+        let insert: TableInsert | undefined;
+        try {
+            insert = await this.beginInsert(table, first, version);
+        } catch (err) {
+            unlock();
+            throw err;
+        }
+        return {
+            remaining: insert ? remaining : 0,
+            load: async (onChunk: () => void) => {
+                try {
+                    if (insert) {
+                        for await (const chunk of chunks()) {
+                            await this.insertData(insert.target, chunk, false);
+                            onChunk();
+                        }
+                        await insert.finish();
+                    }
+                } finally {
+                    unlock();
+                }
+            },
+        };
+    }
+
+    // inserts into a table are made one at a time (so that columns added to a
+    // table are joined with all of its rows). returns a function that unlocks
+    // the table once the insert is complete.
+    private async lockTable(table: string): Promise<() => void> {
+        while (this.loading_.has(table)) {
+            await this.loading_.get(table);
+        }
+        let loaded!: () => void;
+        this.loading_.set(table, new Promise<void>(resolve => (loaded = resolve)));
+        return () => {
+            this.loading_.delete(table);
+            loaded();
+        };
+    }
+
+    // insert the first payload for a table. new tables are inserted in place.
+    // tables are re-shipped when their data changes (a new version) and with
+    // only the additional columns when components reference columns that were
+    // pruned from earlier payloads. these are staged and then swapped in (for
+    // a new version) or joined with the table (for additional columns) once
+    // all of their chunks are inserted. returns undefined if the payload is
+    // for an earlier version or has no additional columns.
+    private async beginInsert(
+        table: string,
+        data: Uint8Array,
+        version: number
+    ): Promise<TableInsert | undefined> {
+        // insert new tables into the database
+        if ((await columnCount(this.conn, table)) === 0) {
+            await this.insertData(table, data, true);
+            this.tables_.add(table);
+            this.versions_.set(table, version);
+            return { target: table, finish: async () => {} };
+        }
+
+        // ignore payloads for earlier versions
+        const current = this.versions_.get(table) ?? 0;
+        if (version < current) {
+            return undefined;
+        }
+
+        // stage the payload and swap it in for new versions
+        const staging = `${table}_staging`;
+        await this.insertData(staging, data, true);
+        if (version > current) {
+            return {
+                target: staging,
+                finish: async () => {
+                    await this.conn.query(`DROP TABLE "${table}"`);
+                    await this.conn.query(`ALTER TABLE "${staging}" RENAME TO "${table}"`);
+                    this.versions_.set(table, version);
+                },
+            };
+        }
+
+        // otherwise join additional columns with the table
+        const existing = new Set(await columnNames(this.conn, table));
+        const added = (await columnNames(this.conn, staging)).filter(c => !existing.has(c));
+        if (added.length === 0) {
+            await this.conn.query(`DROP TABLE "${staging}"`);
+            return undefined;
+        }
+        return {
+            target: staging,
+            finish: async () => {
+                const joined = `${table}_joined`;
+                const columns = added.map(quoteIdentifier).join(', ');
+                await this.conn.query(
+                    `CREATE TABLE "${joined}" AS SELECT * FROM "${table}" ` +
+                        `POSITIONAL JOIN (SELECT ${columns} FROM "${staging}")`
+                );
+                await this.conn.query(`DROP TABLE "${staging}"`);
+                await this.conn.query(`DROP TABLE "${table}"`);
+                await this.conn.query(`ALTER TABLE "${joined}" RENAME TO "${table}"`);
+            },
+        };
+    }
 
-        // add to list of tables
-        this.tables_.add(table);
+    // create a view over tables in the database (views are bound to their
+    // tables by name so they see tables swapped in by later inserts)
+    async createView(view: string, sql: string) {
+        await this.conn.query(`CREATE OR REPLACE VIEW "${view}" AS ${sql}`);
+        this.tables_.add(view);
     }
 
-    async waitForTable(table: string) {
+    // insert data shipped as an arrow ipc stream or a parquet file into a table
+    private async insertData(table: string, data: Uint8Array, create: boolean) {
+        if (isParquet(data)) {
+            // parquet files are registered with duckdb and read into the table
+            const file = `${table}_${++this.files_}.parquet`;
+            await this.conn.bindings.registerFileBuffer(file, data);
+            try {
+                const read = `SELECT * FROM read_parquet('${file}')`;
+                await this.conn.query(
+                    create
+                        ? `CREATE TABLE "${table}" AS ${read}`
+                        : `INSERT INTO "${table}" ${read}`
+                );
+            } finally {
+                await this.conn.bindings.dropFile(file);
+            }
+        } else {
+            // streams with compressed buffers are decompressed for insert
+            await this.conn.insertArrowFromIPCStream(await decompressIPC(data), {
+                name: table,
+                create,
+            });
+        }
+    }
+
+    async waitForTable(table: string, version = 0) {
+        // tables are queried in place by the kernel and server backends
+        if (!this.conn_) {
+            return;
+        }
         await waitForTable(this.conn_, table);
+
+        // wait for the version of the table (inserted by another component)
+        while ((this.versions_.get(table) ?? 0) < version) {
+            await new Promise(r => setTimeout(r, 250));
+        }
+        await this.loading_.get(table);
     }
 }
 
+function quoteIdentifier(name: string): string {
+    return `"${name.replace(/"/g, '""')}"`;
+}
+
+// parquet files start with the magic number 'PAR1' (arrow ipc streams start
+// with a continuation marker or the length of their schema message)
+function isParquet(data: Uint8Array): boolean {
+    return data[0] === 0x50 && data[1] === 0x41 && data[2] === 0x52 && data[3] === 0x31;
+}
+
 // get the global context instance, ensuring we get the same
 // instance eval across different js bundles loaded into the page
 const VIZ_CONTEXT_KEY = Symbol.for('@@inspect-viz-context');
-async function vizContext(plotDefaults: any[]): Promise<VizContext> {
+async function vizContext(
+    plotDefaults: any[],
+    backend: DataBackend = 'browser',
+    serverUrl?: string
+): Promise<VizContext> {
     const globalScope: any = typeof window !== 'undefined' ? window : globalThis;
     if (!globalScope[VIZ_CONTEXT_KEY]) {
         globalScope[VIZ_CONTEXT_KEY] = (async () => {
             initializeErrorHandling();
-            const duckdb = await initDuckdb();
-            const conn = await duckdb.connect();
-            return new VizContext(conn, plotDefaults);
+            if (backend === 'kernel') {
+                return new VizContext(undefined, plotDefaults);
+            } else if (backend === 'server') {
+                return new VizContext(undefined, plotDefaults, serverUrl);
+            } else {
+                const duckdb = await initDuckdb();
+                const conn = await duckdb.connect();
+                return new VizContext(conn, plotDefaults);
+            }
         })();
     }
     return globalScope[VIZ_CONTEXT_KEY] as Promise<VizContext>;
 }
 
 export { VizContext, vizContext };
+export type { ChunksLoader, DataBackend };
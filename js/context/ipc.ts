@@ -0,0 +1,243 @@
+// arrow ipc streams with compressed record batch buffers are decompressed before
+// they are inserted (the arrow reader within duckdb-wasm is built without the
+// lz4 and zstd codecs). buffers are decompressed into a new body for each
+// record batch and the batch metadata is patched in place to describe it.
+
+type Codec = (data: Uint8Array, size: number) => Uint8Array;
+
+// decompress the record batches of an arrow ipc stream (streams without
+// compressed record batches are returned as is)
+export async function decompressIPC(data: Uint8Array): Promise<Uint8Array> {
+    const messages = readMessages(data);
+    if (!messages.some(message => message.codec !== undefined)) {
+        return data;
+    }
+
+    const parts: Uint8Array[] = [];
+    for (const message of messages) {
+        if (message.codec === undefined) {
+            parts.push(data.subarray(message.start, message.end));
+        } else {
+            const codec = await loadCodec(message.codec);
+            parts.push(...decompressMessage(message, codec));
+        }
+    }
+    parts.push(new Uint8Array([0xff, 0xff, 0xff, 0xff, 0, 0, 0, 0]));
+    return concat(parts);
+}
+
+interface Message {
+    start: number;
+    end: number;
+    metadata: Uint8Array;
+    body: Uint8Array;
+    codec?: number;
+}
+
+function readMessages(data: Uint8Array): Message[] {
+    const view = new DataView(data.buffer, data.byteOffset, data.byteLength);
+    const messages: Message[] = [];
+    let pos = 0;
+    while (pos + 4 <= data.byteLength) {
+        // messages are prefixed with a continuation marker (except in legacy
+        // streams) and the length of their metadata (0 at the end of stream)
+        let prefix = 4;
+        let metadataLength = view.getInt32(pos, true);
+        if (metadataLength === -1) {
+            prefix = 8;
+            metadataLength = view.getInt32(pos + 4, true);
+        }
+        if (metadataLength === 0) {
+            break;
+        }
+        const metadataStart = pos + prefix;
+        const metadata = data.subarray(metadataStart, metadataStart + metadataLength);
+        const message = new FlatTable(metadata, rootPosition(metadata));
+        const bodyLength = message.int64(MESSAGE_BODY_LENGTH) ?? 0;
+        const bodyStart = metadataStart + metadataLength;
+        const compression = recordBatch(message)?.table(RECORD_BATCH_COMPRESSION);
+        messages.push({
+            start: pos,
+            end: bodyStart + bodyLength,
+            metadata,
+            body: data.subarray(bodyStart, bodyStart + bodyLength),
+            codec: compression
+                ? (compression.int8(BODY_COMPRESSION_CODEC) ?? LZ4_FRAME)
+                : undefined,
+        });
+        pos = bodyStart + bodyLength;
+    }
+    return messages;
+}
+
+function decompressMessage(message: Message, codec: Codec): Uint8Array[] {
+    // copy the metadata (which we patch to describe the decompressed body)
+    const metadata = message.metadata.slice();
+    const root = new FlatTable(metadata, rootPosition(metadata));
+    const batch = recordBatch(root)!;
+    const compression = batch.table(RECORD_BATCH_COMPRESSION)!;
+    if (
+        [root, compression, root.table(MESSAGE_HEADER)!].some(
+            table => table.pos !== batch.pos && table.vtable === batch.vtable
+        )
+    ) {
+        throw new Error('Compressed record batch metadata cannot be patched.');
+    }
+
+    // decompress buffers (each is prefixed with its uncompressed length, which
+    // is -1 for buffers that were left uncompressed)
+    const body = message.body;
+    const bodyView = new DataView(body.buffer, body.byteOffset, body.byteLength);
+    const buffers: Uint8Array[] = [];
+    let offset = 0;
+    batch.structs(RECORD_BATCH_BUFFERS, 16, pos => {
+        const start = Number(batch.view.getBigInt64(pos, true));
+        const length = Number(batch.view.getBigInt64(pos + 8, true));
+        let buffer = new Uint8Array(0);
+        if (length > 0) {
+            const size = Number(bodyView.getBigInt64(start, true));
+            const compressed = body.subarray(start + 8, start + length);
+            buffer = size === -1 ? compressed : codec(compressed, size);
+        }
+        batch.view.setBigInt64(pos, BigInt(offset), true);
+        batch.view.setBigInt64(pos + 8, BigInt(buffer.byteLength), true);
+        buffers.push(buffer, new Uint8Array(padding(buffer.byteLength)));
+        offset += buffer.byteLength + padding(buffer.byteLength);
+    });
+    root.setInt64(MESSAGE_BODY_LENGTH, offset);
+    batch.remove(RECORD_BATCH_COMPRESSION);
+
+    const prefix = new DataView(new ArrayBuffer(8));
+    prefix.setInt32(0, -1, true);
+    prefix.setInt32(4, metadata.byteLength, true);
+    return [new Uint8Array(prefix.buffer), metadata, ...buffers];
+}
+
+// record batch of a record batch or dictionary batch message
+function recordBatch(message: FlatTable): FlatTable | undefined {
+    const headerType = message.uint8(MESSAGE_HEADER_TYPE);
+    const header = message.table(MESSAGE_HEADER);
+    if (headerType === HEADER_RECORD_BATCH) {
+        return header;
+    } else if (headerType === HEADER_DICTIONARY_BATCH) {
+        return header?.table(DICTIONARY_BATCH_DATA);
+    }
+    return undefined;
+}
+
+async function loadCodec(codec: number): Promise<Codec> {
+    if (codec === ZSTD) {
+        const { decompress } = await import('https://cdn.jsdelivr.net/npm/fzstd@0.1.1/+esm');
+        return (data, size) => decompress(data, new Uint8Array(size));
+    } else if (codec === LZ4_FRAME) {
+        const lz4 = (await import('https://cdn.jsdelivr.net/npm/lz4js@0.2.0/+esm')).default;
+        return (data, size) => lz4.decompress(data, size);
+    } else {
+        throw new Error(`Unsupported arrow compression codec (${codec}).`);
+    }
+}
+
+// minimal access to the flatbuffer tables of arrow message metadata
+class FlatTable {
+    readonly view: DataView;
+
+    constructor(
+        private readonly bytes: Uint8Array,
+        readonly pos: number
+    ) {
+        this.view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    }
+
+    get vtable(): number {
+        return this.pos - this.view.getInt32(this.pos, true);
+    }
+
+    table(field: number): FlatTable | undefined {
+        const pos = this.field(field);
+        return pos === undefined
+            ? undefined
+            : new FlatTable(this.bytes, pos + this.view.getUint32(pos, true));
+    }
+
+    structs(field: number, size: number, visit: (pos: number) => void) {
+        const pos = this.field(field);
+        if (pos !== undefined) {
+            const vector = pos + this.view.getUint32(pos, true);
+            const length = this.view.getUint32(vector, true);
+            for (let i = 0; i < length; i++) {
+                visit(vector + 4 + i * size);
+            }
+        }
+    }
+
+    uint8(field: number): number | undefined {
+        const pos = this.field(field);
+        return pos === undefined ? undefined : this.view.getUint8(pos);
+    }
+
+    int8(field: number): number | undefined {
+        const pos = this.field(field);
+        return pos === undefined ? undefined : this.view.getInt8(pos);
+    }
+
+    int64(field: number): number | undefined {
+        const pos = this.field(field);
+        return pos === undefined ? undefined : Number(this.view.getBigInt64(pos, true));
+    }
+
+    setInt64(field: number, value: number) {
+        const pos = this.field(field);
+        if (pos === undefined) {
+            throw new Error(`Field ${field} is not present in the metadata.`);
+        }
+        this.view.setBigInt64(pos, BigInt(value), true);
+    }
+
+    // remove a field (by clearing its slot in the table's vtable)
+    remove(field: number) {
+        if (this.field(field) !== undefined) {
+            this.view.setUint16(this.vtable + 4 + field * 2, 0, true);
+        }
+    }
+
+    private field(field: number): number | undefined {
+        const vtable = this.vtable;
+        const slot = 4 + field * 2;
+        if (slot >= this.view.getUint16(vtable, true)) {
+            return undefined;
+        }
+        const offset = this.view.getUint16(vtable + slot, true);
+        return offset === 0 ? undefined : this.pos + offset;
+    }
+}
+
+function rootPosition(bytes: Uint8Array): number {
+    return new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength).getUint32(0, true);
+}
+
+function padding(length: number): number {
+    return (8 - (length % 8)) % 8;
+}
+
+function concat(parts: Uint8Array[]): Uint8Array {
+    const result = new Uint8Array(parts.reduce((length, part) => length + part.byteLength, 0));
+    let offset = 0;
+    for (const part of parts) {
+        result.set(part, offset);
+        offset += part.byteLength;
+    }
+    return result;
+}
+
+// field indexes and enum values from the arrow flatbuffer schema (Message.fbs)
+const MESSAGE_HEADER_TYPE = 1;
+const MESSAGE_HEADER = 2;
+const MESSAGE_BODY_LENGTH = 3;
+const HEADER_DICTIONARY_BATCH = 2;
+const HEADER_RECORD_BATCH = 3;
+const DICTIONARY_BATCH_DATA = 1;
+const RECORD_BATCH_BUFFERS = 2;
+const RECORD_BATCH_COMPRESSION = 3;
+const BODY_COMPRESSION_CODEC = 0;
+const LZ4_FRAME = 0;
+const ZSTD = 1;
@@ -0,0 +1,102 @@
+import type { AnyModel } from '@anywidget/types';
+
+import { decodeIPC } from 'https://cdn.jsdelivr.net/npm/@uwdata/mosaic-core@0.16.2/+esm';
+
+interface QueryRequest {
+    type?: 'exec' | 'arrow' | 'json';
+    sql: string;
+}
+
+interface QueryResult {
+    type: 'query_result';
+    id: string;
+    error?: string;
+}
+
+interface PendingQuery {
+    model: AnyModel<any>;
+    resolve: (data?: Uint8Array) => void;
+    reject: (error: Error) => void;
+}
+
+// connector that executes queries against a duckdb database in the kernel
+// (queries and their arrow ipc results are sent over the widget comm)
+class KernelConnector {
+    private model_?: AnyModel<any>;
+    private readonly models_ = new Set<AnyModel<any>>();
+    private readonly pending_ = new Map<string, PendingQuery>();
+    private nextId_ = 0;
+
+    // send queries via the most recently rendered widget
+    setModel(model: AnyModel<any>) {
+        if (!this.models_.has(model)) {
+            model.on('msg:custom', (msg: QueryResult, buffers: (ArrayBuffer | DataView)[]) =>
+                this.onMessage(msg, buffers)
+            );
+            model.on('destroy', () => this.onDestroy(model));
+            this.models_.add(model);
+        }
+        this.model_ = model;
+    }
+
+    async query({ type = 'arrow', sql }: QueryRequest) {
+        const model = this.model_;
+        if (!model) {
+            throw new Error('No widget available for sending queries to the kernel.');
+        }
+
+        // send query and wait for result
+        const id = String(this.nextId_++);
+        const result = new Promise<Uint8Array | undefined>((resolve, reject) => {
+            this.pending_.set(id, { model, resolve, reject });
+        });
+        model.send({ type: 'query', id, sql, queryType: type });
+        const data = await result;
+
+        // decode result
+        if (type === 'exec' || !data) {
+            return undefined;
+        }
+        const table = decodeIPC(data);
+        return type === 'arrow' ? table : table.toArray();
+    }
+
+    // switch to another live widget when a widget is closed (queries sent via
+    // the closed widget will never have results so they are rejected)
+    private onDestroy(model: AnyModel<any>) {
+        this.models_.delete(model);
+        if (this.model_ === model) {
+            this.model_ = [...this.models_].pop();
+        }
+        for (const [id, pending] of this.pending_) {
+            if (pending.model === model) {
+                this.pending_.delete(id);
+                pending.reject(new Error('The widget used to send the query was closed.'));
+            }
+        }
+    }
+
+    private onMessage(msg: QueryResult, buffers: (ArrayBuffer | DataView)[]) {
+        if (msg?.type !== 'query_result') {
+            return;
+        }
+        const pending = this.pending_.get(msg.id);
+        if (pending) {
+            this.pending_.delete(msg.id);
+            if (msg.error) {
+                pending.reject(new Error(msg.error));
+            } else {
+                const buffer = buffers?.[0];
+                pending.resolve(
+                    buffer === undefined
+                        ? undefined
+                        : ArrayBuffer.isView(buffer)
+                          ? new Uint8Array(buffer.buffer, buffer.byteOffset, buffer.byteLength)
+                          : new Uint8Array(buffer)
+                );
+            }
+        }
+    }
+}
+
+export { KernelConnector };
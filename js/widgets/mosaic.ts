@@ -1,4 +1,4 @@
-import type { RenderProps } from '@anywidget/types';
+import type { AnyModel, RenderProps } from '@anywidget/types';
 
 import {
     Spec,
@@ -10,12 +10,24 @@ import {
 
 import { throttle } from 'https://cdn.jsdelivr.net/npm/@uwdata/mosaic-core@0.16.2/+esm';
 
-import { VizContext, vizContext } from '../context';
+import { ChunksLoader, DataBackend, VizContext, vizContext } from '../context';
 import { CUSTOM_INPUTS } from '../inputs';
 
+// tables too large for a single message are shipped with their first chunk
+// and the number of remaining chunks (which are requested once rendered)
+interface TableChunks {
+    data: DataView;
+    chunks: number;
+}
+
 interface MosaicProps {
-    tables: Record<string, string>;
+    tables: Record<string, DataView | TableChunks>;
+    table_versions: Record<string, number>;
+    table_chunks: Record<string, string[]>;
+    views: Record<string, string>;
     spec: string;
+    backend: DataBackend;
+    backend_url: string | null;
 }
 
 async function render({ model, el }: RenderProps<MosaicProps>) {
@@ -24,12 +36,23 @@ async function render({ model, el }: RenderProps<MosaicProps>) {
     const plotDefaultsSpec = { plotDefaults: spec.plotDefaults, vspace: 0 } as Spec;
     const plotDefaultsAst = parseSpec(plotDefaultsSpec);
 
-    // initialize context
-    const ctx = await vizContext(plotDefaultsAst.plotDefaults);
+    // initialize context (queries for the kernel backend are sent via this widget)
+    const ctx = await vizContext(
+        plotDefaultsAst.plotDefaults,
+        model.get('backend'),
+        model.get('backend_url') ?? undefined
+    );
+    ctx.setKernelModel(model);
 
     // insert/wait for tables to be ready
-    const tables: Record<string, string> = model.get('tables') || {};
-    await syncTables(ctx, tables);
+    const tables = model.get('tables') || {};
+    const versions = model.get('table_versions') || {};
+    const loaders = await syncTables(ctx, model, tables, versions);
+
+    // create views over tables (views of views follow the views they reference)
+    for (const [view, sql] of Object.entries(model.get('views') || {})) {
+        await ctx.createView(view, sql);
+    }
 
     // render mosaic spec
     const renderOptions = renderSetup(el);
@@ -49,6 +72,13 @@ async function render({ model, el }: RenderProps<MosaicProps>) {
     };
     await renderSpec();
 
+    // load remaining table chunks then re-render with all of the data
+    if (loaders.length > 0) {
+        await loadChunks(loaders, el);
+        ctx.coordinator.clear({ clients: false });
+        await renderSpec();
+    }
+
     // if we are doing auto-fill then re-render when size changes
     if (renderOptions.autoFill) {
         // re-render on container size changed
@@ -62,23 +92,119 @@ async function render({ model, el }: RenderProps<MosaicProps>) {
     }
 }
 
-// insert/wait for tables to be ready
-async function syncTables(ctx: VizContext, tables: Record<string, string>) {
-    for (const [tableName, base64Data] of Object.entries(tables)) {
-        if (base64Data) {
-            // decode base64 to bytes
-            const binaryString = atob(base64Data);
-            const bytes = new Uint8Array(binaryString.length);
-            for (let i = 0; i < binaryString.length; i++) {
-                bytes[i] = binaryString.charCodeAt(i);
-            }
-
-            // insert table into context
-            await ctx.insertTable(tableName, bytes);
+// insert/wait for tables to be ready. tables shipped in chunks are ready once
+// their first chunk is inserted (returns loaders for the remaining chunks)
+async function syncTables(
+    ctx: VizContext,
+    model: AnyModel<MosaicProps>,
+    tables: Record<string, DataView | TableChunks>,
+    versions: Record<string, number>
+): Promise<ChunksLoader[]> {
+    const loaders: ChunksLoader[] = [];
+    for (const [tableName, data] of Object.entries(tables)) {
+        const version = versions[tableName] ?? 0;
+        if (data && 'chunks' in data) {
+            // insert the first chunk (remaining chunks are loaded after render)
+            loaders.push(
+                await ctx.insertTableChunks(
+                    tableName,
+                    viewBytes(data.data),
+                    data.chunks,
+                    () => tableChunks(model, tableName),
+                    version
+                )
+            );
+        } else if (data && data.byteLength > 0) {
+            // insert binary buffer into context
+            await ctx.insertTable(tableName, viewBytes(data), version);
         } else {
             // wait for table if no data provided
-            await ctx.waitForTable(tableName);
+            await ctx.waitForTable(tableName, version);
+        }
+    }
+    return loaders;
+}
+
+// chunks of a table after the first (yielded as their data arrives). chunk
+// models are requested from the kernel unless their ids are already known
+// (e.g. from saved widget state).
+async function* tableChunks(
+    model: AnyModel<MosaicProps>,
+    table: string
+): AsyncGenerator<Uint8Array> {
+    const ids = await chunkModelIds(model, table);
+    for (const id of ids) {
+        const chunk = await model.widget_manager.get_model<ChunkProps>(id);
+        yield viewBytes(await chunkData(chunk));
+    }
+}
+
+interface ChunkProps {
+    data: DataView | null;
+}
+
+function chunkModelIds(model: AnyModel<MosaicProps>, table: string): Promise<string[]> {
+    return new Promise(resolve => {
+        const ids = model.get('table_chunks')?.[table];
+        if (ids) {
+            resolve(ids);
+            return;
+        }
+        const onChange = () => {
+            const ids = model.get('table_chunks')?.[table];
+            if (ids) {
+                model.off('change:table_chunks', onChange);
+                resolve(ids);
+            }
+        };
+        model.on('change:table_chunks', onChange);
+        model.send({ type: 'table_chunks', table });
+    });
+}
+
+function chunkData(chunk: AnyModel<ChunkProps>): Promise<DataView> {
+    return new Promise(resolve => {
+        const data = chunk.get('data');
+        if (data) {
+            resolve(data);
+            return;
+        }
+        const onChange = () => {
+            const data = chunk.get('data');
+            if (data) {
+                chunk.off('change:data', onChange);
+                resolve(data);
+            }
+        };
+        chunk.on('change:data', onChange);
+    });
+}
+
+// view a binary buffer as bytes (no copy)
+function viewBytes(data: DataView): Uint8Array {
+    return new Uint8Array(data.buffer, data.byteOffset, data.byteLength);
+}
+
+// load remaining table chunks (showing a progress indicator)
+async function loadChunks(loaders: ChunksLoader[], el: HTMLElement) {
+    const progressEl = document.createElement('div');
+    progressEl.className = 'inspect-viz-progress';
+    const barEl = document.createElement('div');
+    barEl.className = 'inspect-viz-progress-bar';
+    progressEl.appendChild(barEl);
+    el.appendChild(progressEl);
+
+    const total = loaders.reduce((total, loader) => total + loader.remaining, 0);
+    let loaded = 0;
+    try {
+        for (const loader of loaders) {
+            await loader.load(() => {
+                loaded++;
+                barEl.style.width = `${Math.round((loaded / total) * 100)}%`;
+            });
         }
+    } finally {
+        progressEl.remove();
     }
 }
 
@@ -1,8 +1,23 @@
-from ._core import Component, Data, Param, Selection
+from ._core import (
+    Component,
+    Data,
+    EncodedColumn,
+    Param,
+    RegistryStats,
+    Selection,
+    Session,
+    cache_clear,
+    registry_stats,
+)
 
 __all__ = [
     "Data",
+    "EncodedColumn",
     "Param",
     "Selection",
     "Component",
+    "Session",
+    "RegistryStats",
+    "registry_stats",
+    "cache_clear",
 ]
@@ -2,7 +2,21 @@
 
 from .component import Component
 from .data import Data
+from .encoding import EncodedColumn
+from .file_cache import cache_clear
 from .param import Param
 from .selection import Selection
+from .session import Session
+from .stats import RegistryStats, registry_stats
 
-__all__ = ["Data", "Param", "Selection", "Component"]
+__all__ = [
+    "Data",
+    "EncodedColumn",
+    "Param",
+    "Selection",
+    "Component",
+    "Session",
+    "RegistryStats",
+    "registry_stats",
+    "cache_clear",
+]
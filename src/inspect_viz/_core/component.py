@@ -1,81 +1,245 @@
-import base64
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Any, cast
+from typing import Any, NamedTuple, cast
 
 import traitlets
 from anywidget import AnyWidget
+from ipywidgets import Widget  # type: ignore[import-untyped]
 from pydantic import JsonValue
 from pydantic_core import to_json, to_jsonable_python
 
 from .._util.constants import WIDGETS_DIR
 from .._util.marshall import dict_remove_none
 from .data import Data
+from .kernel import handle_query_msg, kernel_database
 from .param import Param as VizParam
+from .references import (
+    column_references,
+    param_references,
+    selection_upstream,
+    view_references,
+)
 from .selection import Selection as VizSelection
+from .session import current_session
 
 
-class TablesData(traitlets.TraitType[dict[str, str], dict[str, str | bytes]]):
+class TableData(NamedTuple):
+    """Data (and the columns/rows of it) to ship with a component."""
+
+    data: Data
+    columns: list[str]
+    rows: tuple[int, int] | None = None
+
+    def encode(self) -> memoryview:
+        return self.data._encode(self.columns, self.rows)
+
+
+class TableChunk(Widget):  # type: ignore[misc]
+    """Chunk of table data shipped to the frontend.
+
+    Tables too large for a single message are shipped as a sequence of chunks
+    (each synced to the frontend in its own message). Data is encoded only when
+    the chunk is synced, so encoded buffers are not retained by the widget.
+    """
+
+    data = traitlets.Instance(TableData, allow_none=True).tag(
+        sync=True,
+        to_json=lambda value, widget: value.encode() if value is not None else None,
+    )
+
+
+class TablesData(
+    traitlets.TraitType[
+        dict[str, TableData | list[TableData] | None],
+        dict[str, TableData | list[TableData] | None],
+    ]
+):
     """Custom traitlet for handling multiple table/data pairs.
 
-    Accepts a dict of {table_name: bytes_data} and serializes it as JSON
-    with base64-encoded data values for transmission to the frontend.
+    Accepts a dict of {table_name: table_data} where table_data is the `Data`
+    (and columns) to ship with the component, a list of `TableData` for data
+    shipped in chunks, or `None` if the table was shipped by another component.
+    Data is encoded only when the trait is synced to the frontend (see
+    `tables_to_json()`), so encoded buffers are not retained by the widget.
     """
 
-    info_text = "a dict of table names to data bytes"
+    info_text = "a dict of table names to table data"
 
-    def validate(self, obj: Any, value: Any) -> dict[str, str]:
+    def validate(
+        self, obj: Any, value: Any
+    ) -> dict[str, TableData | list[TableData] | None]:
         if not isinstance(value, dict):
             self.error(obj, value)
 
-        # Convert bytes values to base64 strings for JSON serialization
-        serialized = {}
-        for key, data in value.items():
-            if isinstance(data, bytes):
-                serialized[key] = base64.b64encode(data).decode("utf-8")
-            elif isinstance(data, str):
-                # Already base64 encoded
-                serialized[key] = data
-            else:
+        for data in value.values():
+            if isinstance(data, list):
+                if not all(isinstance(chunk, TableData) for chunk in data):
+                    self.error(obj, value)
+            elif data is not None and not isinstance(data, TableData):
                 self.error(obj, value)
 
-        return serialized
+        return value
 
 
-class Component(AnyWidget):
-    """Viz component (input, plot, table, etc.)."""
+def tables_to_json(
+    value: dict[str, TableData | list[TableData] | None], widget: Any
+) -> dict[str, memoryview | dict[str, memoryview | int]]:
+    """Encode tables for the frontend.
 
-    _css_initialized = False
+    Binary values are extracted from the state by ipywidgets and transmitted as
+    message buffers (arriving as a `DataView`) rather than being encoded into the
+    JSON state. Empty buffers indicate tables the frontend should wait for.
+    Chunked tables are encoded as their first chunk and the number of remaining
+    chunks (which the frontend requests once it has rendered).
+    """
+    tables: dict[str, memoryview | dict[str, memoryview | int]] = {}
+    for table, data in value.items():
+        if isinstance(data, list):
+            tables[table] = {"data": data[0].encode(), "chunks": len(data) - 1}
+        elif data is not None:
+            tables[table] = data.encode()
+        else:
+            tables[table] = memoryview(bytes())
+    return tables
+
+
+class Component:
+    """Viz component (input, plot, table, etc.)."""
 
     def __init__(self, config: dict[str, JsonValue]) -> None:
         """Create a visualization component.
 
+        Components are lightweight specs (marks, legends, etc. are combined
+        into plots and layouts). A widget is created only when a component
+        is displayed.
+
         Args:
             config: Component configuration.
 
         Returns:
             Visualization component.
         """
-        if not Component._css_initialized:
-            Component._css_initialized = True
-        else:
-            self._css = ""
-
-        super().__init__()
         self._config = config
+        self._widget: ComponentWidget | None = None
+
+        # hold the params and selections the config references (configs can
+        # reference them by id alone, e.g. within SQL expressions, and they
+        # are otherwise only weakly referenced by the session)
+        self._params = referenced_params(config)
 
     @property
     def config(self) -> dict[str, JsonValue]:
         """Component config."""
         return self._config
 
+    @property
+    def widget(self) -> "ComponentWidget":
+        """Widget for displaying the component (created on first use)."""
+        if self._widget is None:
+            self._widget = ComponentWidget(self._config, self._params)
+        return self._widget
+
+    def close(self) -> None:
+        """Close the widget for the component (if it has been displayed).
+
+        Widgets are retained (along with the data they display) until they
+        are closed. Close components that are no longer needed to release
+        their data in long-running sessions.
+        """
+        if self._widget is not None:
+            self._widget.close()
+            self._widget = None
+
     def _repr_mimebundle_(
         self, **kwargs: Any
     ) -> tuple[dict[str, Any], dict[str, Any]] | None:
+        return self.widget._repr_mimebundle_(**kwargs)
+
+
+class ComponentWidget(AnyWidget):
+    """Widget that displays a component."""
+
+    _css_initialized = False
+
+    def __init__(
+        self,
+        config: dict[str, JsonValue],
+        params: list[VizParam | VizSelection] | None = None,
+    ) -> None:
+        if not ComponentWidget._css_initialized:
+            ComponentWidget._css_initialized = True
+        else:
+            self._css = ""
+
+        super().__init__()
+        self._config = config
+        self._params = params or referenced_params(config)
+        self._handles_queries = False
+        self._chunks: list[TableChunk] = []
+
+        # ship the remaining chunks of chunked tables when requested
+        self.on_msg(self._handle_chunks_msg)
+
+    def close(self) -> None:
+        # close chunk widgets along with this widget
+        self._close_chunks()
+        super().close()
+
+    def _handle_chunks_msg(
+        self, widget: Any, content: Any, buffers: list[bytes]
+    ) -> None:
+        # the frontend requests the chunks after the first once it has
+        # rendered. chunk widgets are created empty (so their ids reach the
+        # frontend first) and then each is synced with its data, so chunks
+        # are inserted as they arrive.
+        if not isinstance(content, dict) or content.get("type") != "table_chunks":
+            return
+        table = str(content.get("table"))
+        data = self.tables.get(table)
+        if not isinstance(data, list) or table in self.table_chunks:
+            return
+        chunks = [TableChunk() for _ in data[1:]]
+        self._chunks.extend(chunks)
+        self.table_chunks = self.table_chunks | {
+            table: [chunk.model_id for chunk in chunks]
+        }
+        for chunk, chunk_data in zip(chunks, data[1:], strict=True):
+            chunk.data = chunk_data
+
+    def _close_chunks(self) -> None:
+        for chunk in self._chunks:
+            chunk.close()
+        self._chunks = []
+        self.table_chunks = {}
+
+    def _repr_mimebundle_(
+        self, **kwargs: Any
+    ) -> tuple[dict[str, Any], dict[str, Any]] | None:
+        from ..options._backend import current_data_backend
         from ..options._defaults import plot_defaults_as_camel
 
-        # set current tables
-        self.tables = all_tables()
+        # set current tables (encoded when synced to the frontend). tables
+        # aren't shipped for the kernel or server backends (they are queried
+        # in place).
+        self.backend, self.backend_url = current_data_backend()
+        if self.backend == "browser":
+            self._close_chunks()
+            self.tables = all_tables(self._config)
+            self.table_versions = {
+                data.table: data._state.version
+                for data in Data.get_all()
+                if data.table in self.tables
+            }
+            self.views = all_views(self._config)
+
+        # handle queries only for the kernel data backend (so clients can't
+        # query the kernel unless it is the backend). queries are executed by
+        # the database of the current session (messages from the client are
+        # handled outside of it).
+        if self.backend == "kernel" and not self._handles_queries:
+            self.on_msg(partial(handle_query_msg, database=kernel_database()))
+            self._handles_queries = True
 
         # ensure spec
         if not self.spec:
@@ -85,8 +249,8 @@ class Component(AnyWidget):
             # add plot defaults
             spec["plotDefaults"] = plot_defaults_as_camel()
 
-            # add current params
-            spec["params"] = all_params()
+            # add params referenced by the component
+            spec["params"] = all_params(self._config)
 
             # to json
             self.spec = to_json(spec, exclude_none=True).decode()
@@ -95,27 +259,122 @@ class Component(AnyWidget):
 
     _esm = WIDGETS_DIR / "mosaic.js"
     _css: Path | str = WIDGETS_DIR / "mosaic.css"
-    tables = TablesData({}).tag(sync=True)
+    tables = TablesData({}).tag(sync=True, to_json=tables_to_json)
+    table_versions = traitlets.Dict(
+        key_trait=traitlets.Unicode(), value_trait=traitlets.Int()
+    ).tag(sync=True)
+    views = traitlets.Dict(
+        key_trait=traitlets.Unicode(), value_trait=traitlets.Unicode()
+    ).tag(sync=True)
+    table_chunks = traitlets.Dict(
+        key_trait=traitlets.Unicode(), value_trait=traitlets.List(traitlets.Unicode())
+    ).tag(sync=True)
     spec = traitlets.CUnicode("").tag(sync=True)
+    backend = traitlets.CUnicode("browser").tag(sync=True)
+    backend_url = traitlets.CUnicode(None, allow_none=True).tag(sync=True)
+
+
+def all_tables(
+    config: dict[str, JsonValue],
+) -> dict[str, TableData | list[TableData] | None]:
+    all_data = {data.table: data for data in Data.get_all()}
+    selections = {selection.id: selection for selection in VizSelection.get_all()}
+
+    # determine the columns referenced by the component (including those
+    # referenced by the views it uses)
+    references = column_references(config, all_data)
+    view_references(references, all_data)
+
+    # record the selections that filter data and the fields targeted by
+    # selections (predicates on these fields will be applied to the data,
+    # including by subsequently displayed components)
+    for table, filter_by in references.filter_by.items():
+        all_data[table]._state.filter_by.update(filter_by)
+    component_columns: set[str] = set()
+    for table, columns in references.columns.items():
+        component_columns.update(
+            all_data[table].columns if columns is None else columns
+        )
+    for id, fields in references.selection_fields.items():
+        if id in selections:
+            selections[id]._fields.update(
+                fields if fields is not None else component_columns
+            )
+
+    # tables are shipped by the first component that references them (and
+    # additional columns are shipped by components that require them). other
+    # components that reference them wait for them to be available.
+    tables: dict[str, TableData | list[TableData] | None] = {}
+    for table, data in all_data.items():
+        # skip views (which are created by the client) and tables that
+        # aren't referenced and haven't been shipped
+        if data._view is not None:
+            continue
+        if table not in references.columns and data._state.shipped is None:
+            continue
+
+        # columns referenced by the component and fields for predicates
+        # from selections that filter the data
+        columns = references.columns.get(table, set())
+        if columns is not None:
+            for selection in data._state.filter_by:
+                for id in selection_upstream(selection, selections):
+                    if id in selections:
+                        columns = columns | selections[id]._fields
+
+        # ship (in chunks if required) or wait as required
+        ship_columns = data._ship(columns)
+        if ship_columns is not None:
+            chunks = data._chunks(ship_columns)
+            if chunks is not None:
+                tables[table] = [TableData(data, ship_columns, rows) for rows in chunks]
+            else:
+                tables[table] = TableData(data, ship_columns)
+        elif table in references.columns:
+            tables[table] = None
 
+    return tables
 
-def all_tables() -> dict[str, str | bytes]:
-    all_data: dict[str, str | bytes] = {}
-    for data in Data.get_all():
-        all_data[data.table] = data.collect_data()
-    return all_data
 
+def all_views(config: dict[str, JsonValue]) -> dict[str, str]:
+    all_data = {data.table: data for data in Data.get_all()}
+    references = column_references(config, all_data)
+    return {
+        view.table: view._view.sql
+        for view in view_references(references, all_data)
+        if view._view is not None
+    }
+
+
+def referenced_params(config: dict[str, JsonValue]) -> list[VizParam | VizSelection]:
+    selections = {selection.id: selection for selection in VizSelection.get_all()}
+    references = _param_references(config, selections)
+    params: list[VizParam | VizSelection] = [
+        param for param in VizParam.get_all() if param.id in references
+    ]
+    params.extend(
+        selection for selection in selections.values() if selection.id in references
+    )
+    return params
+
+
+def all_params(config: dict[str, JsonValue]) -> dict[str, JsonValue]:
+    selections = {selection.id: selection for selection in VizSelection.get_all()}
+    references = _param_references(config, selections)
 
-def all_params() -> dict[str, JsonValue]:
     all_params: dict[str, Any] = {}
 
     for param in VizParam.get_all():
+        if param.id not in references:
+            continue
         if isinstance(param.default, datetime):
             all_params[param.id] = dict(select="value", date=param.default.isoformat())
         else:
             all_params[param.id] = dict(select="value", value=param.default)
 
-    for selection in VizSelection.get_all():
+    for selection in selections.values():
+        if selection.id not in references:
+            continue
         all_params[selection.id] = dict_remove_none(
             dict(
                 select=selection.select,
@@ -126,3 +385,11 @@ def all_params() -> dict[str, JsonValue]:
         )
 
     return cast(dict[str, JsonValue], to_jsonable_python(all_params, exclude_none=True))
+
+
+def _param_references(
+    config: dict[str, JsonValue], selections: dict[str, VizSelection]
+) -> set[str]:
+    # params and selections referenced by the config or by plot defaults
+    # (which are included in the spec)
+    return param_references([config, current_session().plot_defaults], selections)
@@ -1,48 +1,440 @@
+import glob
+import hashlib
 import os
 from os import PathLike
-from typing import ClassVar
+from types import MappingProxyType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterable,
+    Literal,
+    Mapping,
+    NamedTuple,
+    Sequence,
+    TypeAlias,
+    TypedDict,
+    Union,
+)
 
 import narwhals as nw
 import pandas as pd
 import pyarrow as pa
 from narwhals import Boolean, String
+from narwhals.dtypes import DType
 from narwhals.typing import IntoDataFrame
 from pydantic import JsonValue
 from shortuuid import uuid
 
+from .encoding import (
+    DataEncoding,
+    EncodedColumn,
+    check_encoding,
+    encode_batch,
+    encode_column,
+    encoded_schema,
+)
+from .file_cache import file_cache, payload_cache
 from .param import Param
+from .query_cache import query_cache
 from .selection import Selection
+from .session import current_session
+
+if TYPE_CHECKING:
+    from duckdb import DuckDBPyConnection, DuckDBPyRelation
+    from pyarrow.compute import Expression
+
+DEFAULT_CHUNK_SIZE = 32 * 1024 * 1024
+
+DataFilter: TypeAlias = Union[
+    "Expression", list[tuple[str, str, Any]], list[list[tuple[str, str, Any]]]
+]
+"""Row filter (`pyarrow.compute` expression or disjunctive normal form filters)."""
+
+DataCompression: TypeAlias = Literal["lz4", "zstd"]
+"""Compression of the Arrow IPC buffers shipped to the client."""
+
+DataFormat: TypeAlias = Literal["arrow", "parquet"]
+"""Format of the data shipped to the client."""
+
+DEFAULT_ROW_GROUP_SIZE = 122_880
+
+
+class DataShipping(TypedDict, total=False):
+    """Format and compression of data shipped to the client (for a session)."""
+
+    format: DataFormat
+    row_group_size: int
+    compression: DataCompression
 
 
 class Data:
-    def __init__(self, data: IntoDataFrame | str | PathLike[str]) -> None:
-        # assign a unique table name
-        self._table = uuid()
+    def __init__(
+        self,
+        data: IntoDataFrame | str | PathLike[str],
+        columns: Sequence[str] | None = None,
+        content_hash: bool = False,
+        chunk_size: int | None = None,
+        filter: DataFilter | None = None,
+        encoding: DataEncoding | None = None,
+        compression: DataCompression | Literal["none"] | None = None,
+        format: DataFormat | None = None,
+    ) -> None:
+        """Data source for visualizations.
 
-        # create a default selection
-        self._selection = Selection(select="intersect", unique=self._table)
+        Only the columns referenced by plots, inputs, and interactors are shipped
+        to the client (pass `columns` to explicitly specify the columns to ship).
+        Uncompressed Arrow IPC (feather) files that fit within `chunk_size` are
+        the exception: as they are already in the format shipped to the client,
+        all of their columns are shipped straight from a memory map of the file.
+        Larger files are pruned and shipped in re-encoded chunks.
+
+        Datasets (a directory of parquet files or a glob of data files) are
+        read with `pyarrow.dataset`. Hive partition keys in their paths (e.g.
+        `model=gpt-4o/task=mmlu/part-0.parquet`) become dictionary encoded
+        columns. Only the `columns` and the rows that match the `filter` are
+        read from datasets (and from parquet files).
 
-        # convert to pandas if its a path
+        Args:
+           data: Data frame, path to a data file, or path to a dataset
+              (directory or glob).
+           columns: Columns to include (defaults to all columns, with only
+              those referenced by visualizations shipped to the client).
+           content_hash: Name the table using a hash of its content rather than
+              a unique id. Data with identical content (e.g. the same file
+              loaded in two cells or when a cell is re-executed) then shares a
+              single table, which is shipped to the client only once. The hash
+              is computed from the path, modification time, and size for files,
+              and from the Arrow IPC encoding of the data for data frames.
+           chunk_size: Maximum size (in bytes) of the messages used to ship the
+              data to the client (defaults to 32MB). Larger data is shipped in
+              chunks of rows, which are inserted into the client database as
+              they arrive (so visualizations can render before all of the data
+              is available).
+           filter: Filter for rows read from datasets and files with arrow
+              readers (parquet, arrow/feather, csv, and json lines). Either a
+              `pyarrow.compute` expression (e.g. `pc.field("model") == "gpt-4o"`)
+              or filters in the disjunctive normal form used by
+              `pyarrow.parquet.read_table()` (e.g. `[("model", "=", "gpt-4o")]`).
+           encoding: Compact encoding of columns shipped to the client. Pass
+              `"auto"` to dictionary encode strings with few distinct values
+              and downcast integers to the smallest width that holds their
+              values, or a dict of encodings for columns (`"auto"`,
+              `"dictionary"`, `"downcast"`, `"float32"`, or `"none"`). Floats
+              are only downcast to `"float32"` when requested (as it is
+              lossy). Use `encoding_report()` to see the bytes saved.
+           compression: Compression of the buffers shipped to the client
+              (`"lz4"`, `"zstd"`, or `"none"`). Defaults to the compression
+              set with the `data_compression()` option for the session the
+              data is created in (which is `"none"` unless set). Compressed
+              data is smaller to ship and to save in notebooks but takes
+              longer to encode and insert.
+           format: Format of the data shipped to the client (`"arrow"` or
+              `"parquet"`). Defaults to the format set with the
+              `data_format()` option for the session the data is created in
+              (which is `"arrow"` unless set). Parquet is often much smaller
+              for data with repetitive values (e.g. text) but takes longer
+              to encode and insert. Parquet files are shipped as is when
+              all of their columns are shipped (unless an `encoding` is
+              given or the `compression` differs from the file's
+              compression).
+        """
+        # read the file if its a path
+        path: str | PathLike[str] | None = None
         if isinstance(data, (str, PathLike)):
-            data = _read_df_from_file(data)
+            path = data
+            data = _read_df_from_file(path, columns, filter)
+        elif filter is not None:
+            raise ValueError("Filters are only supported for data read from files.")
 
         # convert to narwhals
         self._ndf = nw.from_native(data)
+        self._schema_index: SchemaIndex | None = None
 
-        # create buffer
-        reader = pa.ipc.RecordBatchStreamReader.from_stream(self._ndf)
-        table = reader.read_all()
-        buffer = pa.BufferOutputStream()
-        with pa.RecordBatchStreamWriter(buffer, table.schema) as writer:
-            writer.write_table(table)
-        self._data: bytes | None = buffer.getvalue().to_pybytes()
+        # select columns if specified (otherwise prune unreferenced columns)
+        if columns is not None:
+            self._ndf = _select_columns(self._ndf, columns)
+        self._columns = columns
+        self._prune = columns is None
+        self._chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+
+        # check compression (resolved when shipping)
+        if compression not in [None, "none", *_COMPRESSION]:
+            raise ValueError(
+                f"Invalid compression '{compression}' (expected 'lz4', 'zstd', or 'none')."
+            )
+        self._compression = compression
+
+        # check format (parquet files can be shipped as is if they don't change)
+        if format not in [None, *_FORMATS]:
+            raise ValueError(
+                f"Invalid format '{format}' (expected 'arrow' or 'parquet')."
+            )
+        self._format = format
+        self._parquet_file = (
+            (path, _file_stat(path))
+            if path is not None
+            and os.path.splitext(path)[1].lower() == ".parquet"
+            and os.path.isfile(path)
+            and columns is None
+            and filter is None
+            and encoding is None
+            else None
+        )
+
+        # check column encodings (which are determined when shipping)
+        self._encoding = encoding
+        self._encoded_columns: dict[str, EncodedColumn] = {}
+        if encoding is not None:
+            check_encoding(self._ndf.head(0).to_arrow().schema, encoding)
+
+        # uncompressed arrow ipc files can be shipped without re-encoding
+        self._ipc_stream = (
+            _mapped_ipc_stream(path, self._ndf)
+            if path is not None
+            and columns is None
+            and filter is None
+            and encoding is None
+            else None
+        )
+
+        # assign a table name (unique or based on content)
+        self._content_hash = content_hash
+        if content_hash:
+            table = (
+                _file_content_hash(path, columns, filter)
+                if path is not None
+                else _frame_content_hash(self._ndf)
+            )
+        else:
+            table = uuid()
+        self._table = table
+
+        # create a default selection
+        self._selection = Selection(
+            select="intersect", unique=None if content_hash else self._table
+        )
+
+        # client state is shared by data with the same table (in a session)
+        self._session = current_session()
+        self._state = self._session.table_state(table)
 
         # track instances
-        Data._instances.append(self)
+        self._closed = False
+        self._query: str | None = None
+        self._view: DataView | None = None
+        self._session.data.add(self)
+
+    @classmethod
+    def from_sql(
+        cls,
+        query: str,
+        connection: "DuckDBPyConnection | None" = None,
+        *,
+        columns: Sequence[str] | None = None,
+        content_hash: bool = False,
+        chunk_size: int | None = None,
+        encoding: DataEncoding | None = None,
+        compression: DataCompression | Literal["none"] | None = None,
+        format: DataFormat | None = None,
+    ) -> "Data":
+        """Data from the results of a SQL query.
+
+        The query is executed with DuckDB (which must be installed) within
+        Python, so queries over large data (e.g. aggregates of a directory of
+        parquet files) scan the data using all cores and only the results
+        are held (and shipped to the client). For example:
+
+        ```python
+        Data.from_sql(
+            "SELECT model, task, avg(score) AS score "
+            "FROM read_parquet('results/**/*.parquet', hive_partitioning = true) "
+            "GROUP BY model, task"
+        )
+        ```
+
+        Args:
+           query: SQL query.
+           connection: DuckDB connection to execute the query with (defaults
+              to the default DuckDB connection).
+           columns: Columns to include (defaults to all columns).
+           content_hash: Name the table using a hash of the query results
+              (see `Data()` for details).
+           chunk_size: Maximum size (in bytes) of the messages used to ship
+              the data to the client (see `Data()` for details).
+           encoding: Compact encoding of columns shipped to the client (see
+              `Data()` for details).
+           compression: Compression of the buffers shipped to the client (see
+              `Data()` for details).
+           format: Format of the data shipped to the client (see `Data()`
+              for details).
+        """
+        if connection is None:
+            try:
+                import duckdb
+            except ImportError:
+                raise ModuleNotFoundError(
+                    "Querying data with SQL requires the duckdb package (pip install duckdb)."
+                ) from None
+            connection = duckdb.default_connection()
+
+        # read the results as record batches (so duckdb doesn't materialize
+        # an intermediate copy of them)
+        reader = result_reader(connection.execute(query))
+        table = pa.Table.from_batches(reader, schema=reader.schema)
+
+        data = cls(
+            table,
+            columns=columns,
+            content_hash=content_hash,
+            chunk_size=chunk_size,
+            encoding=encoding,
+            compression=compression,
+            format=format,
+        )
+        data._query = query
+        return data
+
+    def view(
+        self,
+        sql: str | None = None,
+        *,
+        columns: Sequence[str] | Mapping[str, str] | None = None,
+        where: str | None = None,
+    ) -> "Data":
+        """Derived data defined by a SQL view of this data.
+
+        Views are created in the database that executes queries (so their
+        rows are not shipped to the client or held in Python). For example:
+
+        ```python
+        gpt = results.view(where="model = 'gpt-4o'")
+        pct = results.view(columns={"model": "model", "pct": "score * 100"})
+        ```
+
+        Args:
+           sql: SQL query that defines the view (reference this data in the
+              query using its `table`). Can't be combined with `columns` or
+              `where`.
+           columns: Columns to include (defaults to all columns). Pass a
+              dict to include computed columns (column names mapped to SQL
+              expressions).
+           where: SQL predicate for rows to include.
+
+        Returns:
+           Data for the view.
+        """
+        computed = sql is not None or isinstance(columns, Mapping)
+        if sql is not None:
+            if columns is not None or where is not None:
+                raise ValueError(
+                    "Views defined with sql cannot also specify columns or where."
+                )
+            if self.table not in sql:
+                raise ValueError(
+                    f"The sql for a view must reference the data's table ('{self.table}')."
+                )
+        else:
+            if columns is None:
+                select = "*"
+            elif isinstance(columns, Mapping):
+                select = ", ".join(
+                    f"{expr} AS {quote_identifier(name)}"
+                    for name, expr in columns.items()
+                )
+            else:
+                _check_columns(self.columns, columns)
+                select = ", ".join(quote_identifier(column) for column in columns)
+            sql = f"SELECT {select} FROM {quote_identifier(self.table)}"
+            if where is not None:
+                sql = f"{sql} WHERE {where}"
+
+        # determine the schema of the view (no query is required for views
+        # that select existing columns)
+        if computed:
+            schema = _view_schema([self], sql)
+        else:
+            schema = self._ndf.head(0)
+            if columns is not None:
+                schema = schema.select(list(columns))
+
+        return Data._from_view(DataView(parents=(self,), sql=sql), schema)
+
+    def join(
+        self,
+        other: "Data",
+        on: str | Sequence[str],
+        how: Literal["inner", "left", "right", "outer"] = "inner",
+    ) -> "Data":
+        """Derived data defined by a SQL join of this data with other data.
+
+        Joins are views created in the database that executes queries (so
+        each side of the join is shipped to the client once rather than
+        denormalized into a single table). For example:
+
+        ```python
+        scores = samples.join(models, on="model", how="left")
+        ```
+
+        Args:
+           other: Data to join with.
+           on: Column(s) to join on (which must be in both this data and
+              `other`).
+           how: Join type.
+
+        Returns:
+           Data for the join (the columns of this data followed by the
+           columns of `other` that aren't joined on).
+        """
+        keys = [on] if isinstance(on, str) else list(on)
+        _check_columns(self.columns, keys)
+        _check_columns(other.columns, keys)
+        if how not in _JOIN_TYPES:
+            raise ValueError(
+                f"Invalid join type '{how}' (expected one of {', '.join(_JOIN_TYPES)})."
+            )
+        overlap = [
+            column
+            for column in other.columns
+            if column in self._schema.names and column not in keys
+        ]
+        if overlap:
+            raise ValueError(
+                f"Column(s) {', '.join(overlap)} are in both sides of the join "
+                "(use view() to rename or exclude them)."
+            )
+
+        sql = (
+            f"SELECT * FROM {quote_identifier(self.table)} "
+            f"{_JOIN_TYPES[how]} JOIN {quote_identifier(other.table)} "
+            f"USING ({', '.join(quote_identifier(key) for key in keys)})"
+        )
+
+        # the join has the columns of this data followed by the columns of
+        # other that aren't keys (as joined by duckdb with USING)
+        schema = self._ndf.head(0).to_arrow()
+        right = other._ndf.head(0).to_arrow()
+        for field in right.schema:
+            if field.name not in keys:
+                schema = schema.append_column(field, right.column(field.name))
+
+        return Data._from_view(DataView(parents=(self, other), sql=sql), schema)
+
+    @classmethod
+    def _from_view(cls, view: "DataView", schema: IntoDataFrame) -> "Data":
+        data = cls(schema)
+        data._view = view
+        return data
 
     @property
     def table(self) -> str:
-        return self._table
+        # (table names reference the data, so they are created on demand
+        # rather than held by it)
+        return TableName(self._table, self)
+
+    @property
+    def query(self) -> str | None:
+        """SQL query for data created with `from_sql()`."""
+        return self._query
 
     @property
     def selection(self) -> Selection:
@@ -53,15 +445,281 @@ class Data:
 
     @property
     def columns(self) -> list[str]:
-        return self._ndf.columns
+        return list(self._schema.columns)
+
+    def append(self, data: IntoDataFrame) -> None:
+        """Append rows to the data.
+
+        Visualizations displayed after the data changes include the new rows
+        (as do visualizations already displayed with the 'kernel' or 'server'
+        data backends, which query the data in place).
+
+        Args:
+           data: Data frame with (at least) the columns of this data.
+        """
+        self._check_mutable()
+        ndf = _select_columns(nw.from_native(data), self.columns)
+        # rows from another kind of frame are converted (via arrow). arrow
+        # tables only concatenate with identical schemas so we cast to ours.
+        native = self._ndf.to_native()
+        if isinstance(native, pa.Table):
+            ndf = nw.from_native(ndf.to_arrow().cast(native.schema))
+        elif ndf.implementation != self._ndf.implementation:
+            ndf = nw.from_arrow(ndf.to_arrow(), backend=self._ndf.implementation)
+        self._update(nw.concat([self._ndf, ndf]))
+
+    def replace(self, data: IntoDataFrame) -> None:
+        """Replace the data.
+
+        Visualizations displayed after the data changes use the new data (as
+        do visualizations already displayed with the 'kernel' or 'server' data
+        backends, which query the data in place).
+
+        Args:
+           data: Data frame to replace the data with.
+        """
+        self._check_mutable()
+        ndf = nw.from_native(data)
+        if self._columns is not None:
+            ndf = _select_columns(ndf, self._columns)
+        if self._encoding is not None:
+            check_encoding(ndf.head(0).to_arrow().schema, self._encoding)
+        self._update(ndf)
+
+    def close(self) -> None:
+        """Release the data.
+
+        Data is released automatically once it is no longer referenced (by
+        your code or by the visualizations that use it). Use `close()` to
+        release data explicitly (for example, data still referenced from a
+        notebook variable). Visualizations displayed after the data is closed
+        will not include it.
+        """
+        if not self._closed:
+            self._closed = True
+            self._session.data.remove(self)
+            query_cache().invalidate(self.table)
+            self._ndf = self._ndf.head(0).clone()
+            self._ipc_stream = None
+
+    def __enter__(self) -> "Data":
+        return self
+
+    def __exit__(self, *excinfo: Any) -> None:
+        self.close()
+
+    def _check_mutable(self) -> None:
+        if self._closed:
+            raise ValueError("Data cannot be modified after it is closed.")
+        if self._view is not None:
+            raise ValueError("Views cannot be modified (modify the data they view).")
+        if self._content_hash:
+            raise ValueError(
+                "Data named using a hash of its content cannot be modified."
+            )
+
+    def _update(self, ndf: nw.DataFrame[Any]) -> None:
+        # update the data and its version (the client and query results for
+        # the previous version are now stale)
+        self._ndf = ndf
+        self._schema_index = None
+        self._encoded_columns = {}
+        self._ipc_stream = None
+        self._parquet_file = None
+        self._state.version += 1
+        self._state.shipped = None
+        query_cache().invalidate(self.table)
+
+    def collect_data(self, columns: Iterable[str] | None = None) -> memoryview:
+        """Collect data for shipping to the client.
+
+        Data is encoded on the first call (subsequent calls return an empty
+        buffer unless they require columns that have not yet been shipped, in
+        which case only those columns are encoded).
+
+        Args:
+           columns: Columns required by the client (defaults to all columns).
+        """
+        ship_columns = self._ship(columns)
+        if ship_columns is not None:
+            return self._encode(ship_columns)
+        else:
+            return memoryview(bytes())
+
+    def _ship(self, columns: Iterable[str] | None = None) -> list[str] | None:
+        # determine required columns (all columns if we aren't pruning or
+        # are shipping the file the data was read from as is)
+        schema = self._schema
+        if (
+            columns is None
+            or not self._prune
+            or (self._ships_file() and self._chunks(None) is None)
+        ):
+            required = set(schema.names)
+        else:
+            required = set(schema.names.intersection(columns))
+            # tables must have at least one column
+            if not required and schema.columns and self._state.shipped is None:
+                required = {schema.columns[0]}
+
+        # return None if they've already been shipped
+        shipped = self._state.shipped
+        if shipped is not None and required <= shipped:
+            return None
+
+        # otherwise ship only the columns that haven't been shipped (the client
+        # joins them with the columns it already has)
+        added = required.difference(shipped or [])
+        self._state.shipped = frozenset(added.union(shipped or []))
+        return [column for column in schema.columns if column in added]
+
+    def _chunks(self, columns: list[str] | None = None) -> list[tuple[int, int]] | None:
+        # estimate the size of the columns we are shipping (no chunks if they fit
+        # within a single message)
+        ndf = self._select(columns)
+        size = ndf.estimated_size("b")
+        if size <= self._chunk_size:
+            return None
+
+        # divide rows into chunks that fit within a message
+        rows = len(ndf)
+        chunk_rows = max(1, (rows * self._chunk_size) // int(size))
+        return [
+            (start, min(start + chunk_rows, rows))
+            for start in range(0, rows, chunk_rows)
+        ]
+
+    def _encode(
+        self, columns: list[str] | None = None, rows: tuple[int, int] | None = None
+    ) -> memoryview:
+        format, compression, row_group_size = self._shipping()
+        all_columns = columns is None or len(columns) == len(self._schema.columns)
+
+        # ship parquet files as is if we are shipping all of them
+        if format == "parquet" and rows is None and all_columns:
+            payload = self._parquet_payload(compression)
+            if payload is not None:
+                return payload
+
+        # ship the mapped file as is if we are shipping all of it
+        if (
+            self._ipc_stream is not None
+            and self._ships_file()
+            and rows is None
+            and all_columns
+        ):
+            return self._ipc_stream
 
-    def collect_data(self) -> bytes:
-        if self._data:
-            buffer = self._data
-            self._data = None
-            return buffer
+        # use the stored payload for data named by its content if we have one
+        cache = payload_cache() if self._content_hash else None
+        options: dict[str, Any] = dict(
+            columns=columns or list(self._schema.columns),
+            rows=rows,
+            encoding=_encoding_key(self._encoding),
+            compression=compression,
+            format=format,
+            row_group_size=row_group_size if format == "parquet" else None,
+        )
+        if cache is not None:
+            payload = cache.get(self.table, options)
+            if payload is not None:
+                return payload
+
+        # select columns if we are shipping a subset (and rows if this is a chunk)
+        ndf = self._select(columns)
+        if rows is not None:
+            ndf = ndf[rows[0] : rows[1]]
+
+        reader = pa.RecordBatchReader.from_stream(ndf)
+        if self._encoding is not None:
+            encoded = self._encode_columns(reader.schema.names)
+            reader = pa.RecordBatchReader.from_batches(
+                encoded_schema(reader.schema, encoded),
+                (encode_batch(batch, encoded) for batch in reader),
+            )
+
+        if format == "parquet":
+            payload = encode_parquet(reader, compression, row_group_size)
+        else:
+            payload = encode_ipc_stream(reader, compression)
+        if cache is not None:
+            cache.put(self.table, options, payload)
+        return payload
+
+    def _ships_file(self) -> bool:
+        # files already in the format shipped to the client are shipped as
+        # is (with all of their columns) rather than re-encoded
+        format, compression, _ = self._shipping()
+        return (
+            self._ipc_stream is not None and format == "arrow" and compression is None
+        )
+
+    def _shipping(self) -> tuple[DataFormat, DataCompression | None, int]:
+        # format, compression, and row group size of shipped data (data uses
+        # the options of the session it was created in unless it specifies
+        # its own format and compression)
+        options = self._session.data_shipping
+        compression = (
+            options.get("compression")
+            if self._compression is None
+            else _resolve_compression(self._compression)
+        )
+        return (
+            self._format or options.get("format", "arrow"),
+            compression,
+            options.get("row_group_size", DEFAULT_ROW_GROUP_SIZE),
+        )
+
+    def _parquet_payload(
+        self, compression: DataCompression | None
+    ) -> memoryview | None:
+        # the parquet file the data was read from (if it hasn't changed and
+        # its columns have the requested compression)
+        if self._parquet_file is None:
+            return None
+        path, stat = self._parquet_file
+        try:
+            if _file_stat(path) != stat:
+                return None
+            with pa.memory_map(str(path)) as source:
+                buffer = source.read_buffer()
+        except OSError:
+            return None
+        if compression is not None and not (
+            _parquet_codecs(buffer) <= _PARQUET_CODECS[compression]
+        ):
+            return None
+        return memoryview(buffer)
+
+    def encoding_report(self) -> dict[str, EncodedColumn]:
+        """Encoding of the columns shipped to the client.
+
+        Returns:
+           Encoding of each column (including its size and the bytes saved
+           by the encoding).
+        """
+        return self._encode_columns(self.columns)
+
+    def _encode_columns(self, columns: list[str]) -> dict[str, EncodedColumn]:
+        # encodings are determined from all of the rows in a column (so that
+        # all chunks have the same schema) and retained until the data changes
+        for column in columns:
+            if column not in self._encoded_columns:
+                values = self._ndf.get_column(column).to_arrow()
+                self._encoded_columns[column] = encode_column(
+                    column,
+                    pa.chunked_array([values])
+                    if isinstance(values, pa.Array)
+                    else values,
+                    self._encoding or {},
+                )
+        return {column: self._encoded_columns[column] for column in columns}
+
+    def _select(self, columns: list[str] | None) -> nw.DataFrame[Any]:
+        if columns is not None and len(columns) < len(self._schema.columns):
+            return self._ndf.select(columns)
         else:
-            return bytes()
+            return self._ndf
 
     def __str__(self) -> str:
         return self._replace_caption(self._ndf.__str__())
@@ -75,29 +733,333 @@ class Data:
     def _replace_caption(self, text: str) -> str:
         return text.replace("Narwhals DataFrame", "     Viz Data     ")
 
-    # Class-level dictionary to store all instances
-    _instances: ClassVar[list["Data"]] = []
+    @property
+    def _version(self) -> int:
+        # views change when the data they view changes
+        if self._view is not None:
+            return sum(parent._version for parent in self._view.parents)
+        else:
+            return self._state.version
+
+    @property
+    def _schema(self) -> "SchemaIndex":
+        # computed on first use (and again after the data is replaced)
+        if self._schema_index is None:
+            self._schema_index = schema_index(self._ndf.schema)
+        return self._schema_index
 
     @classmethod
     def get_all(cls) -> list["Data"]:
-        """Get all data."""
-        return cls._instances.copy()
+        """Get all data (in the current session)."""
+        return current_session().data.get_all()
+
+
+class SchemaIndex(NamedTuple):
+    """Index of the columns of `Data` (for validating column references)."""
+
+    columns: tuple[str, ...]
+    """Column names (in order)."""
+
+    names: frozenset[str]
+    """Column names (for membership tests)."""
+
+    dtypes: Mapping[str, DType]
+    """Column types by name."""
+
+    lower_names: Mapping[str, str]
+    """Column names by lower case name (for matching SQL identifiers)."""
+
 
+def schema_index(schema: Mapping[str, DType]) -> SchemaIndex:
+    """Create an index for a data frame schema.
 
-def _read_df_from_file(path: str | PathLike[str]) -> pd.DataFrame:
+    Args:
+       schema: Column types by name.
+
+    Returns:
+       Schema index.
+    """
+    return SchemaIndex(
+        columns=tuple(schema),
+        names=frozenset(schema),
+        dtypes=MappingProxyType(dict(schema)),
+        lower_names=MappingProxyType({column.lower(): column for column in schema}),
+    )
+
+
+class DataView(NamedTuple):
+    """SQL view of data."""
+
+    parents: tuple[Data, ...]
+    """Data referenced by the view."""
+
+    sql: str
+    """SQL query that defines the view."""
+
+
+def _view_schema(parents: Sequence[Data], sql: str) -> pa.Table:
+    # determine the schema of a view by querying it over empty tables
+    try:
+        import duckdb
+    except ImportError:
+        raise ModuleNotFoundError(
+            "Views with computed columns require the duckdb package (pip install duckdb)."
+        ) from None
+    connection = duckdb.connect()
+    for parent in parents:
+        connection.register(parent.table, parent._ndf.head(0).to_arrow())
+    reader = result_reader(connection.execute(f"SELECT * FROM ({sql}) LIMIT 0"))
+    return reader.read_all()
+
+
+_JOIN_TYPES = dict(inner="INNER", left="LEFT", right="RIGHT", outer="FULL OUTER")
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class TableName(str):
+    """Table name for `Data`.
+
+    Component configs refer to data by table name. Table names reference their
+    `Data` so that data used by a component stays alive with the component.
+    """
+
+    _data: Data
+
+    def __new__(cls, name: str, data: Data) -> "TableName":
+        instance = super().__new__(cls, name)
+        instance._data = data
+        return instance
+
+
+class TableState:
+    """Client state for a table (shared by `Data` with the same table)."""
+
+    def __init__(self) -> None:
+        self.shipped: frozenset[str] | None = None
+        """Columns shipped to the client (`None` if not yet shipped)."""
+
+        self.filter_by: set[str] = set()
+        """Selections that filter the table (determined at display time)."""
+
+        self.version = 0
+        """Version of the table content (incremented when the data changes)."""
+
+
+def _encoding_key(encoding: DataEncoding | None) -> Any:
+    if encoding is None or isinstance(encoding, str):
+        return encoding
+    else:
+        return sorted(encoding.items())
+
+
+def _select_columns(
+    ndf: nw.DataFrame[Any], columns: Sequence[str]
+) -> nw.DataFrame[Any]:
+    _check_columns(ndf.columns, columns)
+    return ndf.select(list(columns))
+
+
+def _check_columns(available: Sequence[str], columns: Sequence[str]) -> None:
+    names = set(available)
+    missing = [column for column in columns if column not in names]
+    if missing:
+        raise ValueError(
+            f"Column(s) {', '.join(missing)} not found in the data (expected one of {', '.join(available)})."
+        )
+
+
+def _file_content_hash(
+    path: str | PathLike[str],
+    columns: Sequence[str] | None,
+    filter: DataFilter | None = None,
+) -> str:
+    if _is_dataset(path):
+        # datasets change when any of their files change
+        files = [(file, *_file_stat(file)) for file in _dataset_files(path)]
+        key: list[Any] = [os.path.abspath(path), files, columns, str(filter)]
+    else:
+        key = [os.path.abspath(path), *_file_stat(path), columns]
+        if filter is not None:
+            key.append(str(filter))
+    return hashlib.blake2b(repr(key).encode(), digest_size=11).hexdigest()
+
+
+def _file_stat(path: str | PathLike[str]) -> tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _frame_content_hash(ndf: nw.DataFrame[IntoDataFrame]) -> str:
+    # hash the ipc encoding of each batch (this normalizes slices/offsets)
+    # rather than retaining an encoding of the whole table
+    hash = hashlib.blake2b(digest_size=11)
+    reader = pa.RecordBatchReader.from_stream(ndf)
+    hash.update(reader.schema.serialize())
+    for batch in reader:
+        hash.update(batch.serialize())
+    return hash.hexdigest()
+
+
+def encode_ipc_stream(
+    reader: pa.RecordBatchReader, compression: DataCompression | None = None
+) -> memoryview:
+    """Encode record batches as an Arrow IPC stream.
+
+    Record batches are streamed one at a time into a single growing buffer
+    (rather than reading an intermediate table) and a view of that buffer
+    (rather than a copy) is returned.
+
+    Args:
+       reader: Reader for record batches.
+       compression: Compression of record batch buffers.
+
+    Returns:
+       Arrow IPC stream.
+    """
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_stream(sink, reader.schema, options=options) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+    return memoryview(sink.getvalue())
+
+
+def encode_parquet(
+    reader: pa.RecordBatchReader,
+    compression: DataCompression | None = None,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> memoryview:
+    """Encode record batches as a parquet file.
+
+    Record batches are written as they are read (buffering at most a row
+    group of them).
+
+    Args:
+       reader: Reader for record batches.
+       compression: Compression of column chunks (defaults to snappy).
+       row_group_size: Maximum number of rows in a row group.
+
+    Returns:
+       Parquet file.
+    """
+    from pyarrow import parquet
+
+    sink = pa.BufferOutputStream()
+    with parquet.ParquetWriter(
+        sink, reader.schema, compression=compression or "snappy"
+    ) as writer:
+        pending: list[pa.RecordBatch] = []
+        pending_rows = 0
+        for batch in reader:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows >= row_group_size:
+                table = pa.Table.from_batches(pending, schema=reader.schema)
+                writer.write_table(table, row_group_size=row_group_size)
+                pending, pending_rows = [], 0
+        if pending:
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            writer.write_table(table, row_group_size=row_group_size)
+    return memoryview(sink.getvalue())
+
+
+def _parquet_codecs(buffer: pa.Buffer) -> set[str]:
+    from pyarrow import parquet
+
+    metadata = parquet.ParquetFile(buffer).metadata
+    return {
+        metadata.row_group(row_group).column(column).compression
+        for row_group in range(metadata.num_row_groups)
+        for column in range(metadata.num_columns)
+    }
+
+
+def _resolve_compression(
+    compression: DataCompression | Literal["none"],
+) -> DataCompression | None:
+    return None if compression == "none" else compression
+
+
+def result_reader(
+    result: "DuckDBPyConnection | DuckDBPyRelation",
+) -> pa.RecordBatchReader:
+    """Reader for the record batches of DuckDB query results.
+
+    Args:
+       result: Connection with executed query (or relation).
+
+    Returns:
+       Record batch reader.
+    """
+    # to_arrow_reader() supersedes fetch_record_batch() in newer versions of duckdb
+    if hasattr(result, "to_arrow_reader"):
+        return result.to_arrow_reader()
+    else:
+        return result.fetch_record_batch()
+
+
+def _read_df_from_file(
+    path: str | PathLike[str],
+    columns: Sequence[str] | None = None,
+    filter: DataFilter | None = None,
+) -> pa.Table | pd.DataFrame:
     _, ext = os.path.splitext(path)
     ext = ext.lower()
 
+    # datasets (and files with filters) are scanned with pyarrow.dataset
+    if _is_dataset(path) or filter is not None:
+        return _read_dataset(path, ext, columns, filter)
+
+    # arrow files and parquet files are read directly (with only the requested
+    # columns where possible)
+    if ext == ".parquet":
+        from pyarrow import parquet
+
+        return parquet.read_table(
+            path, columns=_available_columns(parquet.read_schema(path), columns)
+        )
+    elif ext == ".arrow" or ext == ".feather":
+        from pyarrow import feather
+
+        try:
+            with pa.memory_map(str(path)) as source:
+                schema = pa.ipc.open_file(source).schema
+            read_columns = _available_columns(schema, columns)
+        except pa.ArrowInvalid:
+            # feather v1 files are not arrow ipc files
+            read_columns = None
+        return feather.read_table(path, columns=read_columns, memory_map=True)
+
+    # other formats are parsed (using converted files if the file cache is
+    # enabled)
+    cache = file_cache()
+    if cache is not None:
+        return cache.read(path, lambda: _parse_file(path, ext), dict(format=ext))
+    else:
+        return _parse_file(path, ext)
+
+
+def _parse_file(path: str | PathLike[str], ext: str) -> pa.Table | pd.DataFrame:
+    # formats with arrow readers are read directly into arrow tables (with
+    # multithreaded parsing)
     if ext == ".csv":
-        return pd.read_csv(path)
+        from pyarrow import csv
+
+        return csv.read_csv(path)
+    elif ext == ".jsonl" or ext == ".ndjson":
+        from pyarrow import json
+
+        return json.read_json(path)
+
+    # other formats are read with pandas
     elif ext == ".xlsx" or ext == ".xls":
         return pd.read_excel(path)
     elif ext == ".json":
         return pd.read_json(path)
-    elif ext == ".parquet":
-        return pd.read_parquet(path)
-    elif ext == ".feather":
-        return pd.read_feather(path)
     elif ext == ".sas7bdat":
         return pd.read_sas(path)
     elif ext == ".dta":
@@ -111,6 +1073,140 @@ def _read_df_from_file(path: str | PathLike[str]) -> pd.DataFrame:
         raise ValueError(f"Unsupported file extension: {ext}")
 
 
+def _read_dataset(
+    path: str | PathLike[str],
+    ext: str,
+    columns: Sequence[str] | None,
+    filter: DataFilter | None,
+) -> pa.Table:
+    from pyarrow import dataset, parquet
+
+    # resolve format (directories are parquet datasets)
+    format = "parquet" if os.path.isdir(path) else _DATASET_FORMATS.get(ext)
+    if format is None:
+        raise ValueError(
+            f"Datasets and filters are not supported for files with extension: {ext}"
+        )
+
+    # partition keys are read from hive style paths (as dictionary columns)
+    partitioning = dataset.HivePartitioning.discover(infer_dictionary=True)
+    if os.path.isdir(path) or not _is_dataset(path):
+        source = dataset.dataset(path, format=format, partitioning=partitioning)
+    else:
+        files = _dataset_files(path)
+        if not files:
+            raise FileNotFoundError(f"No files match '{path}'.")
+        source = dataset.dataset(
+            files,
+            format=format,
+            partitioning=partitioning,
+            partition_base_dir=_glob_base_dir(path),
+        )
+
+    # scan only the requested columns and rows
+    if columns is not None:
+        _check_columns(source.schema.names, columns)
+    if isinstance(filter, list):
+        filter = parquet.filters_to_expression(filter)
+    table = source.to_table(
+        columns=list(columns) if columns is not None else None, filter=filter
+    )
+
+    # fragments have their own partition key dictionaries (unify them so that
+    # the client doesn't need to handle dictionary replacement)
+    return table.unify_dictionaries()
+
+
+def _is_dataset(path: str | PathLike[str]) -> bool:
+    return os.path.isdir(path) or glob.has_magic(str(path))
+
+
+def _dataset_files(path: str | PathLike[str]) -> list[str]:
+    if os.path.isdir(path):
+        files = glob.glob(os.path.join(path, "**", "*"), recursive=True)
+    else:
+        files = glob.glob(str(path), recursive=True)
+    return sorted(file for file in files if os.path.isfile(file))
+
+
+def _glob_base_dir(pattern: str | PathLike[str]) -> str:
+    # directory that precedes the first wildcard (hive keys are read from the
+    # directories beneath it)
+    parts = []
+    for part in os.path.normpath(pattern).split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or "."
+
+
+_DATASET_FORMATS = {
+    ".parquet": "parquet",
+    ".arrow": "ipc",
+    ".feather": "ipc",
+    ".csv": "csv",
+    ".jsonl": "json",
+    ".ndjson": "json",
+}
+
+
+def _mapped_ipc_stream(
+    path: str | PathLike[str], ndf: nw.DataFrame[Any]
+) -> memoryview | None:
+    # arrow ipc files hold an ipc stream (between a leading magic number and a
+    # trailing footer) so uncompressed files can be shipped directly from a
+    # memory map (compressed files are decompressed and re-encoded as the
+    # client can't read compressed buffers)
+    if os.path.splitext(path)[1].lower() not in [".arrow", ".feather"]:
+        return None
+    if not os.path.isfile(path):
+        return None
+    native = ndf.to_native()
+    try:
+        with pa.memory_map(str(path)) as source:
+            buffer = source.read_buffer()
+        reader = pa.ipc.open_file(buffer)
+    except (pa.ArrowInvalid, OSError):
+        return None
+
+    # validate the schema (it should be the schema of the table we read)
+    if not isinstance(native, pa.Table) or not reader.schema.equals(native.schema):
+        return None
+
+    # batches read from uncompressed files reference the mapped buffer
+    if reader.num_record_batches > 0:
+        start, end = buffer.address, buffer.address + buffer.size
+        batch = reader.get_batch(0)
+        for column in batch.columns:
+            for column_buffer in column.buffers():
+                if column_buffer is not None and column_buffer.size > 0:
+                    if not start <= column_buffer.address < end:
+                        return None
+
+    # slice the stream (which ends with an end-of-stream marker) from between
+    # the magic number and the footer
+    view = memoryview(buffer)
+    footer_size = int.from_bytes(view[-10:-6], "little")
+    stream_end = len(view) - 10 - footer_size
+    if bytes(view[stream_end - 8 : stream_end]) != _IPC_END_OF_STREAM:
+        return None
+    return view[8:stream_end]
+
+
+_IPC_END_OF_STREAM = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+def _available_columns(
+    schema: pa.Schema, columns: Sequence[str] | None
+) -> list[str] | None:
+    # read only the requested columns if they are all available (otherwise
+    # read all columns so that the missing columns are reported)
+    if columns is not None and set(columns) <= set(schema.names):
+        return list(columns)
+    else:
+        return None
+
+
 def validate_data(data: Data) -> None:
     # valdate type for people not using type-checkers
     if not isinstance(data, Data):
@@ -129,7 +1225,7 @@ def validate_bindings(data: Data, column: str, param: Param | None = None) -> No
     validate_data(data)
 
     # validate that the column in in the data frame
-    dtype = data._ndf.schema.get(column, None)
+    dtype = data._schema.dtypes.get(column, None)
     if dtype is None:
         raise ValueError(
             f"Column '{column}' does not exist in the data (expected one of {', '.join(data.columns)})."
@@ -145,3 +1241,10 @@ def validate_bindings(data: Data, column: str, param: Param | None = None) -> No
             raise_type_error("boolean")
         elif isinstance(dtype, String) and not param.is_string():
             raise_type_error("string")
+
+
+_COMPRESSION = ["lz4", "zstd"]
+
+_FORMATS = ["arrow", "parquet"]
+
+_PARQUET_CODECS = {"lz4": {"LZ4", "LZ4_RAW"}, "zstd": {"ZSTD"}}
@@ -0,0 +1,241 @@
+from logging import getLogger
+from typing import Literal, Mapping, NamedTuple, TypeAlias
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = getLogger(__name__)
+
+ColumnEncoding: TypeAlias = Literal["auto", "dictionary", "downcast", "float32", "none"]
+"""Encoding for a column shipped to the client.
+
+- `"auto"`: Dictionary encode strings (when that is smaller) and downcast
+   integers (floats are not downcast as that loses precision).
+- `"dictionary"`: Dictionary encode strings.
+- `"downcast"`: Downcast integers to the smallest width that holds their values.
+- `"float32"`: Downcast floats to 32-bit (lossy, so only done when requested).
+- `"none"`: Ship the column as is.
+"""
+
+DataEncoding: TypeAlias = Literal["auto"] | Mapping[str, ColumnEncoding]
+"""Encoding for columns shipped to the client (`"auto"` or an encoding per column)."""
+
+
+class EncodedColumn(NamedTuple):
+    """Encoding of a column shipped to the client."""
+
+    encoding: Literal["dictionary", "downcast", "float32", "none"]
+    """Encoding applied to the column."""
+
+    type: pa.DataType
+    """Arrow type of the column as shipped."""
+
+    bytes: int
+    """Size (in bytes) of the column."""
+
+    encoded_bytes: int
+    """Size (in bytes) of the column as shipped."""
+
+    dictionary: pa.Array | None = None
+    """Distinct values (for dictionary encoded columns)."""
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes saved by the encoding."""
+        return self.bytes - self.encoded_bytes
+
+
+def check_encoding(schema: pa.Schema, encoding: DataEncoding) -> None:
+    """Check that column encodings are valid for their columns.
+
+    Args:
+       schema: Schema of the data.
+       encoding: Encoding for columns.
+
+    Raises:
+       ValueError: If encodings are unknown or don't apply to their columns.
+    """
+    if encoding == "auto":
+        return
+    if isinstance(encoding, str):
+        raise ValueError(
+            f"Invalid encoding '{encoding}' (expected 'auto' or a dict of column encodings)."
+        )
+    for column, column_encoding in encoding.items():
+        if column not in schema.names:
+            raise ValueError(f"Column '{column}' in encoding not found in the data.")
+        type = schema.field(column).type
+        if column_encoding == "dictionary":
+            valid = _is_string(type)
+        elif column_encoding == "downcast":
+            valid = pa.types.is_integer(type)
+        elif column_encoding == "float32":
+            valid = pa.types.is_floating(type)
+        elif column_encoding in ["auto", "none"]:
+            valid = True
+        else:
+            raise ValueError(
+                f"Invalid encoding '{column_encoding}' for column '{column}' "
+                "(expected one of auto, dictionary, downcast, float32, or none)."
+            )
+        if not valid:
+            raise ValueError(
+                f"Encoding '{column_encoding}' can't be applied to column '{column}' ({type})."
+            )
+
+
+def encode_column(
+    column: str, values: pa.ChunkedArray, encoding: DataEncoding
+) -> EncodedColumn:
+    """Determine the encoding of a column.
+
+    Encodings are determined from all of the values in the column (so that
+    every batch or chunk of rows shipped has the same schema).
+
+    Args:
+       column: Column name.
+       values: Column values.
+       encoding: Encoding for columns.
+
+    Returns:
+       Encoding of the column.
+    """
+    column_encoding = (
+        encoding if isinstance(encoding, str) else encoding.get(column, "none")
+    )
+    type = values.type
+    none = EncodedColumn("none", type, values.nbytes, values.nbytes)
+
+    # dictionary encode strings (automatically only if that is smaller)
+    if _is_string(type) and column_encoding in ["auto", "dictionary"]:
+        dictionary = pc.unique(values).drop_null()
+        if _is_string_view(type):
+            # dictionaries of string views aren't supported by all readers
+            dictionary = dictionary.cast(pa.string())
+        index_type = _int_type(0, len(dictionary))
+        if index_type is None:
+            return none
+        encoded_bytes = dictionary.nbytes + _encoded_nbytes(values, index_type)
+        if column_encoding == "dictionary" or encoded_bytes < values.nbytes:
+            return EncodedColumn(
+                "dictionary",
+                pa.dictionary(index_type, dictionary.type),
+                values.nbytes,
+                encoded_bytes,
+                dictionary,
+            )
+
+    # downcast integers to the smallest width that holds their values
+    elif pa.types.is_integer(type) and column_encoding in ["auto", "downcast"]:
+        min_max = pc.min_max(values)
+        min, max = min_max["min"].as_py(), min_max["max"].as_py()
+        int_type = _int_type(min or 0, max or 0)
+        if int_type is not None and int_type.bit_width < type.bit_width:
+            return EncodedColumn(
+                "downcast",
+                int_type,
+                values.nbytes,
+                _encoded_nbytes(values, int_type),
+            )
+
+    # downcast floats to 32-bit (only when requested as it is lossy)
+    elif pa.types.is_floating(type) and column_encoding == "float32":
+        if type.bit_width <= 32:
+            return none
+        max = pc.max(pc.abs(pc.if_else(pc.is_finite(values), values, 0))).as_py()
+        if max is not None and max > _FLOAT32_MAX:
+            logger.warning(
+                f"Column '{column}' has values outside the range of float32 "
+                "(it will not be downcast)."
+            )
+            return none
+        return EncodedColumn(
+            "float32",
+            pa.float32(),
+            values.nbytes,
+            _encoded_nbytes(values, pa.float32()),
+        )
+
+    return none
+
+
+def encode_batch(
+    batch: pa.RecordBatch, columns: Mapping[str, EncodedColumn]
+) -> pa.RecordBatch:
+    """Encode the columns of a record batch.
+
+    Args:
+       batch: Record batch.
+       columns: Encodings of columns (other columns are shipped as is).
+
+    Returns:
+       Encoded record batch.
+    """
+    arrays: list[pa.Array] = []
+    for name, array in zip(batch.schema.names, batch.columns, strict=True):
+        encoded = columns.get(name)
+        if encoded is None or encoded.encoding == "none":
+            arrays.append(array)
+        elif encoded.dictionary is not None:
+            # dictionary arrays in every batch share the column's dictionary
+            # (so it is written to the stream once)
+            if array.type != encoded.dictionary.type:
+                array = array.cast(encoded.dictionary.type)
+            indices = pc.index_in(array, value_set=encoded.dictionary)
+            arrays.append(
+                pa.DictionaryArray.from_arrays(
+                    indices.cast(encoded.type.index_type), encoded.dictionary
+                )
+            )
+        else:
+            arrays.append(array.cast(encoded.type, safe=encoded.encoding != "float32"))
+    return pa.record_batch(arrays, names=batch.schema.names)
+
+
+def encoded_schema(
+    schema: pa.Schema, columns: Mapping[str, EncodedColumn]
+) -> pa.Schema:
+    """Schema of encoded record batches."""
+    return pa.schema(
+        [
+            field.with_type(columns[field.name].type)
+            if field.name in columns
+            else field
+            for field in schema
+        ],
+        metadata=schema.metadata,
+    )
+
+
+def _is_string(type: pa.DataType) -> bool:
+    return (
+        pa.types.is_string(type)
+        or pa.types.is_large_string(type)
+        or _is_string_view(type)
+    )
+
+
+def _is_string_view(type: pa.DataType) -> bool:
+    # string views were added in pyarrow 16
+    is_string_view = getattr(pa.types, "is_string_view", None)
+    return is_string_view is not None and bool(is_string_view(type))
+
+
+def _int_type(min: int, max: int) -> pa.DataType | None:
+    for int_type in _INT_TYPES:
+        bound = 2 ** (int_type.bit_width - 1)
+        if -bound <= min and max < bound:
+            return int_type
+    return None
+
+
+def _encoded_nbytes(values: pa.ChunkedArray, type: pa.DataType) -> int:
+    # values plus validity bitmap
+    validity = (len(values) + 7) // 8 if values.null_count > 0 else 0
+    return len(values) * (int(type.bit_width) // 8) + validity
+
+
+_INT_TYPES = [pa.int8(), pa.int16(), pa.int32(), pa.int64()]
+
+_FLOAT32_MAX = float(np.finfo(np.float32).max)
@@ -0,0 +1,275 @@
+import hashlib
+import os
+from logging import getLogger
+from os import PathLike
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+import pyarrow as pa
+from shortuuid import uuid
+
+logger = getLogger(__name__)
+
+DEFAULT_FILE_CACHE_SIZE = 2 * 1024 * 1024 * 1024
+
+DEFAULT_PAYLOAD_CACHE_SIZE = 2 * 1024 * 1024 * 1024
+
+
+class FileCache:
+    """On-disk cache of data files converted to Arrow.
+
+    Files in formats that are slow to read (e.g. Excel, SAS, and Stata files)
+    are converted to Arrow IPC files in the cache directory. Converted files
+    are keyed by the absolute path, modification time, and size of the source
+    file along with the options used to read it (so they are not used once
+    the source file changes). Converted files are removed (least recently
+    used first) to keep the cache within its maximum size.
+    """
+
+    def __init__(
+        self, dir: str | PathLike[str], max_size: int = DEFAULT_FILE_CACHE_SIZE
+    ) -> None:
+        self._dir = Path(dir)
+        self._max_size = max_size
+
+    @property
+    def dir(self) -> Path:
+        """Cache directory."""
+        return self._dir
+
+    def read(
+        self,
+        path: str | PathLike[str],
+        reader: Callable[[], pa.Table | pd.DataFrame],
+        options: dict[str, Any],
+    ) -> pa.Table | pd.DataFrame:
+        """Read a file (using its converted file if it is cached).
+
+        Args:
+           path: Path to source file.
+           reader: Function that reads the source file.
+           options: Options used to read the source file.
+
+        Returns:
+           Arrow table (or data frame if it could not be converted to Arrow).
+        """
+        cache_file = self._dir / f"{_cache_key(path, options)}.arrow"
+
+        # read the converted file if we have it (marking it as recently used)
+        if cache_file.exists():
+            try:
+                os.utime(cache_file)
+                with pa.memory_map(str(cache_file)) as source:
+                    return pa.ipc.open_file(source).read_all()
+            except (pa.ArrowInvalid, OSError):
+                # remove unreadable files (e.g. truncated by a full disk)
+                cache_file.unlink(missing_ok=True)
+
+        # read and convert the source file (data frames that can't be
+        # converted to arrow are returned as is and not cached)
+        data = reader()
+        if isinstance(data, pd.DataFrame):
+            try:
+                data = pa.Table.from_pandas(data, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                return data
+
+        # write the converted file
+        if data.nbytes <= self._max_size:
+
+            def write(file: Path) -> None:
+                with pa.ipc.new_file(str(file), data.schema) as writer:
+                    writer.write_table(data)
+
+            if _write_file(cache_file, write):
+                _remove_least_recently_used(self._files(), self._max_size)
+
+        return data
+
+    def clear(self) -> None:
+        """Remove all converted files."""
+        for file in self._files():
+            file.unlink(missing_ok=True)
+
+    def _files(self) -> list[Path]:
+        return list(self._dir.glob("*.arrow"))
+
+
+class PayloadCache:
+    """On-disk cache of encoded table payloads.
+
+    Payloads (the Arrow IPC streams shipped to the client) are stored for
+    data named using a hash of its content, keyed by the content hash and
+    the options used to encode the payload (e.g. the columns shipped). Data
+    that is unchanged (e.g. across kernel restarts or renders) then uses the
+    stored payload rather than encoding it again. Payloads are removed (least
+    recently used first) to keep the cache within its maximum size.
+    """
+
+    def __init__(
+        self, dir: str | PathLike[str], max_size: int = DEFAULT_PAYLOAD_CACHE_SIZE
+    ) -> None:
+        self._dir = Path(dir)
+        self._max_size = max_size
+
+    @property
+    def dir(self) -> Path:
+        """Cache directory."""
+        return self._dir
+
+    def get(self, content_hash: str, options: dict[str, Any]) -> memoryview | None:
+        """Get a stored payload.
+
+        Args:
+           content_hash: Content hash of the data.
+           options: Options used to encode the payload.
+
+        Returns:
+           Payload (memory mapped) or `None` if there is no stored payload.
+        """
+        file = self._payload_file(content_hash, options)
+        try:
+            os.utime(file)
+            with pa.memory_map(str(file)) as source:
+                payload = memoryview(source.read_buffer())
+        except FileNotFoundError:
+            return None
+        logger.debug(f"Payload cache hit for {content_hash} ({file.name})")
+        return payload
+
+    def put(
+        self, content_hash: str, options: dict[str, Any], payload: memoryview
+    ) -> None:
+        """Store a payload.
+
+        Args:
+           content_hash: Content hash of the data.
+           options: Options used to encode the payload.
+           payload: Payload.
+        """
+        if payload.nbytes > self._max_size:
+            return
+
+        def write(file: Path) -> None:
+            with open(file, "wb") as f:
+                f.write(payload)
+
+        if _write_file(self._payload_file(content_hash, options), write):
+            _remove_least_recently_used(self._files(), self._max_size)
+
+    def invalidate(self, content_hash: str) -> None:
+        """Remove the payloads for data.
+
+        Args:
+           content_hash: Content hash of the data.
+        """
+        for file in self._dir.glob(f"{content_hash}/*.arrows"):
+            file.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Remove all payloads."""
+        for file in self._files():
+            file.unlink(missing_ok=True)
+
+    def _payload_file(self, content_hash: str, options: dict[str, Any]) -> Path:
+        key = [sorted(options.items()), pa.__version__]
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return self._dir / content_hash / f"{name}.arrows"
+
+    def _files(self) -> list[Path]:
+        return list(self._dir.glob("*/*.arrows"))
+
+
+def file_cache() -> FileCache | None:
+    """File cache (`None` unless enabled with the `file_cache()` option)."""
+    return _file_cache
+
+
+def set_file_cache(cache: FileCache | None) -> None:
+    global _file_cache
+    _file_cache = cache
+
+
+def payload_cache() -> PayloadCache | None:
+    """Payload cache (`None` unless enabled with the `payload_cache()` option)."""
+    return _payload_cache
+
+
+def set_payload_cache(cache: PayloadCache | None) -> None:
+    global _payload_cache
+    _payload_cache = cache
+
+
+def default_cache_dir(name: str) -> Path:
+    """Default directory for an on-disk cache."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "inspect_viz" / name
+
+
+def cache_clear(content_hash: str | None = None) -> None:
+    """Remove files from the on-disk caches.
+
+    Clears the file cache and payload cache enabled with the `file_cache()`
+    and `payload_cache()` options (or their default directories if they are
+    not enabled).
+
+    Args:
+       content_hash: Remove only the payloads for data with this content hash
+          (the `table` of data created with `content_hash=True`).
+    """
+    payloads = _payload_cache or PayloadCache(default_cache_dir("payloads"))
+    if content_hash is not None:
+        payloads.invalidate(content_hash)
+    else:
+        payloads.clear()
+        (_file_cache or FileCache(default_cache_dir("files"))).clear()
+
+
+def _cache_key(path: str | PathLike[str], options: dict[str, Any]) -> str:
+    stat = os.stat(path)
+    key = [
+        os.path.abspath(path),
+        stat.st_mtime_ns,
+        stat.st_size,
+        sorted(options.items()),
+        pa.__version__,
+        pd.__version__,
+    ]
+    return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+
+def _write_file(file: Path, write: Callable[[Path], None]) -> bool:
+    # write via a temp file so that concurrent readers never see partially
+    # written files (failures to write are ignored as this is only a cache)
+    file.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = file.with_name(f"{file.name}.{uuid()}.tmp")
+    try:
+        write(temp_file)
+        os.replace(temp_file, file)
+        return True
+    except OSError:
+        temp_file.unlink(missing_ok=True)
+        return False
+
+
+def _remove_least_recently_used(files: list[Path], max_size: int) -> None:
+    # remove least recently used files until the files are within max_size
+    stats: list[tuple[float, int, Path]] = []
+    for file in files:
+        try:
+            stat = file.stat()
+        except FileNotFoundError:
+            continue
+        stats.append((stat.st_mtime, stat.st_size, file))
+    size = sum(stat[1] for stat in stats)
+    for _, file_size, file in sorted(stats, key=lambda stat: stat[0]):
+        if size <= max_size:
+            break
+        file.unlink(missing_ok=True)
+        size -= file_size
+
+
+_file_cache: FileCache | None = None
+
+_payload_cache: PayloadCache | None = None
@@ -0,0 +1,240 @@
+import itertools
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any, Literal
+
+import narwhals as nw
+from narwhals.dependencies import (
+    is_pandas_dataframe,
+    is_polars_dataframe,
+    is_pyarrow_table,
+)
+
+from .data import Data, encode_ipc_stream, quote_identifier, result_reader
+from .query_cache import QueryScope, query_cache, referenced_tables
+from .session import Session, current_session
+
+if TYPE_CHECKING:
+    from duckdb import DuckDBPyConnection
+
+QueryType = Literal["arrow", "json", "exec"]
+
+
+class KernelDatabase:
+    """DuckDB database that executes client queries within the kernel.
+
+    Data is registered with the database (rather than copied into it) so
+    queries run directly against the data frames held by `Data`. Only the
+    data of the session the database was created in is registered (so
+    clients can't query the data of other sessions). Query results are
+    returned to the client as Arrow IPC streams. Databases created without
+    a connection have external access disabled (so the queries clients
+    send can't read or write files).
+    """
+
+    def __init__(
+        self,
+        conn: "DuckDBPyConnection | None" = None,
+        session: Session | None = None,
+    ) -> None:
+        if conn is None:
+            try:
+                import duckdb
+            except ImportError:
+                raise ModuleNotFoundError(
+                    "Querying data within Python requires the duckdb package (pip install duckdb)."
+                ) from None
+            # clients can send any SQL so the database has no access to
+            # the file system (data is registered with it rather than read)
+            conn = duckdb.connect(config={"enable_external_access": False})
+
+        # sessions may hold their database (so it doesn't hold them)
+        self._session = weakref.ref(session or current_session())
+        self._conn = conn
+        self._state = _DatabaseState()
+        self._registered: dict[str, int] = {}
+        self._views: set[str] = set()
+
+    def cursor(self) -> "KernelDatabase":
+        """Create a database with its own connection to this database.
+
+        Tables created by queries are shared with this database (queries on
+        separate connections may be executed concurrently).
+        """
+        database = KernelDatabase(self._conn.cursor(), self._session())
+        database._state = self._state
+        return database
+
+    def query(self, sql: str, type: QueryType = "arrow") -> memoryview | None:
+        """Execute a query.
+
+        Args:
+           sql: SQL query.
+           type: Query type ('exec' queries have no result).
+
+        Returns:
+           Arrow IPC stream with query results (`None` for 'exec' queries).
+        """
+        tables = self._register_tables()
+        if type == "exec":
+            # exec queries can change any table (so results cached before
+            # them are not used after them)
+            try:
+                self._conn.execute(sql)
+            finally:
+                self._state.next_generation()
+            return None
+
+        # only cache results for queries that reference data (the results
+        # of other queries, e.g. of tables created by exec queries or of
+        # non-deterministic functions, can change without data changing)
+        versions = {table: tables[table] for table in referenced_tables(sql, tables)}
+        if not versions:
+            return encode_ipc_stream(result_reader(self._conn.execute(sql)))
+
+        # use cached results if the tables the query references are unchanged
+        cache = query_cache()
+        scope = self._state.scope()
+        cached = cache.get(sql, versions, scope)
+        if cached is not None:
+            return cached
+
+        # stream results as record batches
+        encoded = encode_ipc_stream(result_reader(self._conn.execute(sql)))
+        cache.put(sql, versions, encoded, scope)
+        return encoded
+
+    def query_rows(self, sql: str) -> list[dict[str, Any]]:
+        """Execute a query and return its results as rows.
+
+        Args:
+           sql: SQL query.
+
+        Returns:
+           Query results (a dict of column values for each row).
+        """
+        self._register_tables()
+        result = self._conn.execute(sql)
+        columns = [column[0] for column in result.description or []]
+        return [dict(zip(columns, row, strict=True)) for row in result.fetchall()]
+
+    def _register_tables(self) -> dict[str, int]:
+        # register data (re-registering data that has changed since it was
+        # registered) and return the versions of registered tables. table
+        # names are registered as plain strings (table names for data keep
+        # the data alive).
+        session = self._session()
+        live: dict[str, Data] = {
+            str(data.table): data
+            for data in (session.data.get_all() if session is not None else [])
+        }
+
+        # register frames and then create views (views of views are created
+        # in order as views are always created after the data they view).
+        # views are temporary as registered frames are per connection.
+        for data in sorted(live.values(), key=lambda data: data._view is not None):
+            table, version = str(data.table), data._version
+            if self._registered.get(table) != version:
+                if data._view is not None:
+                    self._conn.execute(
+                        f"CREATE OR REPLACE TEMP VIEW {quote_identifier(table)} AS {data._view.sql}"
+                    )
+                    self._views.add(table)
+                else:
+                    self._conn.register(table, _registrable_frame(data._ndf))
+                self._registered[table] = version
+
+        # unregister data that has been released
+        for table in [table for table in self._registered if table not in live]:
+            if table in self._views:
+                self._conn.execute(f"DROP VIEW IF EXISTS {quote_identifier(table)}")
+                self._views.remove(table)
+            else:
+                self._conn.unregister(table)
+            del self._registered[table]
+
+        return self._registered
+
+
+class _DatabaseState:
+    # state shared by the connections to a database (its id and the
+    # generation of its tables, which exec queries advance)
+    def __init__(self) -> None:
+        self._id = next(_database_ids)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def scope(self) -> QueryScope:
+        with self._lock:
+            return self._id, self._generation
+
+    def next_generation(self) -> None:
+        with self._lock:
+            self._generation += 1
+
+
+def kernel_database(session: Session | None = None) -> KernelDatabase:
+    """Database for the 'kernel' data backend of a session (created on first use).
+
+    Args:
+       session: Session (defaults to the current session).
+    """
+    session = session or current_session()
+    with session._lock:
+        if session._kernel_database is None:
+            session._kernel_database = KernelDatabase(session=session)
+        return session._kernel_database
+
+
+def handle_query_msg(
+    widget: Any,
+    content: Any,
+    buffers: list[bytes],
+    database: KernelDatabase | None = None,
+) -> None:
+    """Handle query messages sent to a widget by its client.
+
+    Replies with a 'query_result' message that has the query results
+    as its buffer (or an 'error' if the query failed).
+
+    Args:
+       widget: Widget the message was sent to.
+       content: Message content.
+       buffers: Message buffers.
+       database: Database that executes queries (defaults to the database
+          of the current session).
+    """
+    if not isinstance(content, dict) or content.get("type") != "query":
+        return
+
+    id = content.get("id")
+    try:
+        result = (database or kernel_database()).query(
+            content["sql"], content.get("queryType", "arrow")
+        )
+    except Exception as ex:
+        # report errors to the client (which surfaces them with the query)
+        widget.send(dict(type="query_result", id=id, error=str(ex)))
+        return
+
+    widget.send(
+        dict(type="query_result", id=id),
+        buffers=[result] if result is not None else None,
+    )
+
+
+def _registrable_frame(ndf: nw.DataFrame[Any]) -> Any:
+    # duckdb scans pandas, polars, and pyarrow frames in place (other
+    # frames are converted to arrow)
+    native = ndf.to_native()
+    if (
+        is_pandas_dataframe(native)
+        or is_polars_dataframe(native)
+        or is_pyarrow_table(native)
+    ):
+        return native
+    else:
+        return ndf.to_arrow()
+
+
+_database_ids = itertools.count(1)
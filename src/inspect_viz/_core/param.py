@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import ClassVar, Sequence, TypeAlias
+from typing import Sequence, TypeAlias
 
 from shortuuid import uuid
 
+from .session import current_session
+
 PARAM_PREFIX = "param_"
 
 ParamValue: TypeAlias = (
@@ -28,7 +30,7 @@ class Param(str):
         instance._default = default
 
         # track and return instance
-        Param._instances.append(instance)
+        current_session().params.add(instance)
         return instance
 
     @property
@@ -60,10 +62,7 @@ class Param(str):
     def __repr__(self) -> str:
         return f"Param(default={self.default})"
 
-    # Class-level dictionary to store all instances
-    _instances: ClassVar[list["Param"]] = []
-
     @classmethod
     def get_all(cls) -> list["Param"]:
-        """Get all parameters."""
-        return cls._instances.copy()
+        """Get all parameters (in the current session)."""
+        return current_session().params.get_all()
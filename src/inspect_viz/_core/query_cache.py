@@ -0,0 +1,186 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, TypeAlias
+
+DEFAULT_QUERY_CACHE_SIZE = 256 * 1024 * 1024
+
+QueryScope: TypeAlias = tuple[int, int]
+"""Database that executes queries (its id and the generation of its tables)."""
+
+
+class QueryCacheStats(NamedTuple):
+    """Query cache statistics."""
+
+    hits: int
+    """Queries with results served from the cache."""
+
+    misses: int
+    """Queries with results not in the cache."""
+
+    evictions: int
+    """Results evicted to stay within the cache size."""
+
+    invalidations: int
+    """Results removed because a table they depend on changed."""
+
+    entries: int
+    """Results currently in the cache."""
+
+    size: int
+    """Size (in bytes) of results currently in the cache."""
+
+
+class QueryCache:
+    """Cache of query results (Arrow IPC) with least-recently-used eviction.
+
+    Results are keyed by the database that executed the query, normalized
+    SQL, and the versions of the tables the query references. Results for a
+    table are removed when the table changes (see `invalidate()`). The cache
+    is safe to use from multiple threads.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_QUERY_CACHE_SIZE) -> None:
+        self._max_size = max_size
+        self._entries: OrderedDict[_CacheKey, memoryview] = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(
+        self, sql: str, tables: dict[str, int], scope: QueryScope = (0, 0)
+    ) -> memoryview | None:
+        """Get cached results for a query.
+
+        Args:
+           sql: SQL query.
+           tables: Versions of the tables referenced by the query.
+           scope: Database that executes the query.
+
+        Returns:
+           Cached results (or `None` if the results are not cached).
+        """
+        key = _cache_key(sql, tables, scope)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+            return result
+
+    def put(
+        self,
+        sql: str,
+        tables: dict[str, int],
+        result: memoryview,
+        scope: QueryScope = (0, 0),
+    ) -> None:
+        """Cache results for a query.
+
+        Results larger than the cache are not cached.
+
+        Args:
+           sql: SQL query.
+           tables: Versions of the tables referenced by the query.
+           result: Query results.
+           scope: Database that executed the query.
+        """
+        if result.nbytes > self._max_size:
+            return
+        key = _cache_key(sql, tables, scope)
+        with self._lock:
+            existing = self._entries.pop(key, None)
+            if existing is not None:
+                self._size -= existing.nbytes
+            self._entries[key] = result
+            self._size += result.nbytes
+            self._evict(self._max_size)
+
+    def invalidate(self, table: str) -> None:
+        """Remove results for queries that reference a table.
+
+        Args:
+           table: Table name.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if table in dict(key[2])]:
+                self._size -= self._entries.pop(key).nbytes
+                self._invalidations += 1
+
+    def resize(self, max_size: int) -> None:
+        """Change the maximum size of the cache.
+
+        Args:
+           max_size: Maximum size (in bytes) of cached results.
+        """
+        with self._lock:
+            self._max_size = max_size
+            self._evict(max_size)
+
+    def clear(self) -> None:
+        """Remove all results."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> QueryCacheStats:
+        """Cache statistics."""
+        with self._lock:
+            return QueryCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                invalidations=self._invalidations,
+                entries=len(self._entries),
+                size=self._size,
+            )
+
+    def _evict(self, max_size: int) -> None:
+        while self._size > max_size and self._entries:
+            _, result = self._entries.popitem(last=False)
+            self._size -= result.nbytes
+            self._evictions += 1
+
+
+def query_cache() -> QueryCache:
+    """Query cache shared by the kernel and server backends."""
+    return _query_cache
+
+
+def normalize_sql(sql: str) -> str:
+    """Normalize SQL for use as a cache key.
+
+    Collapses runs of whitespace outside of string literals and quoted
+    identifiers (so queries that differ only by formatting share results).
+
+    Args:
+       sql: SQL query.
+
+    Returns:
+       Normalized SQL.
+    """
+    return _SQL_TOKEN_PATTERN.sub(
+        lambda match: match.group(0) if match.group("quoted") else " ", sql
+    ).strip()
+
+
+def referenced_tables(sql: str, tables: Iterable[str]) -> list[str]:
+    """Tables referenced by a query (tables have unique generated names)."""
+    return [table for table in tables if table in sql]
+
+
+_CacheKey: TypeAlias = tuple[QueryScope, str, tuple[tuple[str, int], ...]]
+
+
+def _cache_key(sql: str, tables: dict[str, int], scope: QueryScope) -> _CacheKey:
+    return scope, normalize_sql(sql), tuple(sorted(tables.items()))
+
+
+_SQL_TOKEN_PATTERN = re.compile(r"""(?P<quoted>'(?:[^']|'')*'|"(?:[^"]|"")*")|\s+""")
+
+_query_cache = QueryCache()
@@ -0,0 +1,309 @@
+import re
+from typing import Any, Iterable, Mapping, Sequence
+
+import narwhals as nw
+
+from .data import Data, SchemaIndex, schema_index
+from .param import PARAM_PREFIX
+from .selection import SELECTION_PREFIX, Selection
+
+# keys that hold structural values (tables, selections, mark types) rather
+# than column references
+_STRUCTURAL_KEYS = ["from", "data", "mark", "input", "filterBy", "as", "select"]
+
+# keys that identify the fields used within selection clause predicates
+_FIELD_KEYS = ["xfield", "yfield", "column"]
+
+
+class ColumnReferences:
+    """Column references for the tables used within a component config."""
+
+    def __init__(self) -> None:
+        self.columns: dict[str, set[str] | None] = {}
+        """Columns referenced for each table (`None` indicates all columns)."""
+
+        self.filter_by: dict[str, set[str]] = {}
+        """Selections (ids) that filter each table."""
+
+        self.selection_fields: dict[str, set[str] | None] = {}
+        """Fields targeted by each selection (`None` indicates unknown fields)."""
+
+    def add_columns(self, table: str, columns: set[str] | None) -> None:
+        existing = self.columns.get(table, set())
+        if existing is None or columns is None:
+            self.columns[table] = None
+        else:
+            self.columns[table] = existing | columns
+
+    def add_filter_by(self, table: str, selection: Any) -> None:
+        if isinstance(selection, str) and selection.startswith("$"):
+            self.filter_by.setdefault(table, set()).add(selection[1:])
+
+    def add_selection_fields(self, selection: Any, fields: set[str] | None) -> None:
+        if isinstance(selection, str) and selection.startswith("$"):
+            id = selection[1:]
+            existing = self.selection_fields.get(id, set())
+            if existing is None or fields is None:
+                self.selection_fields[id] = None
+            else:
+                self.selection_fields[id] = existing | fields
+
+
+def column_references(config: Any, tables: Mapping[str, Data]) -> ColumnReferences:
+    """Determine the columns referenced by a component config.
+
+    Walks mark, input, and interactor configs to find the columns referenced
+    for each table (via `from`, channel fields, `column`/`field`, and SQL
+    expressions), the selections that filter each table, and the fields
+    targeted by selections (which are used in predicates applied to tables
+    filtered by those selections).
+
+    Args:
+       config: Component config.
+       tables: Tables available for reference (by table name).
+
+    Returns:
+       Column references.
+    """
+    references = ColumnReferences()
+    _walk_config(config, tables, references)
+    return references
+
+
+def _walk_config(
+    node: Any, tables: Mapping[str, Data], references: ColumnReferences
+) -> None:
+    if isinstance(node, dict):
+        # resolve table (marks have a data source, inputs have 'from')
+        table: str | None = None
+        filter_by: Any = None
+        if isinstance(node.get("data"), dict) and "mark" in node:
+            table = node["data"].get("from")
+            filter_by = node["data"].get("filterBy")
+        elif isinstance(node.get("from"), str):
+            table = node["from"]
+            filter_by = node.get("filterBy")
+
+        # collect column references for the table
+        if table is not None and table in tables:
+            schema = tables[table]._schema
+            if node.get("input") == "table" and "columns" not in node:
+                references.add_columns(table, None)
+            else:
+                references.add_columns(
+                    table,
+                    _values_columns(
+                        (v for k, v in node.items() if k not in _STRUCTURAL_KEYS),
+                        schema,
+                    ),
+                )
+            if filter_by is not None:
+                references.add_filter_by(table, filter_by)
+
+        # collect selection fields for inputs, interactors, and legends
+        if "as" in node:
+            if node.get("input") == "table":
+                fields = set(node.get("columns", []))
+            else:
+                # 'field' takes precedence over 'column' (which it defaults to)
+                keys = ["field"] if "field" in node else _FIELD_KEYS
+                fields = {
+                    node[key]
+                    for key in keys
+                    if isinstance(node.get(key), str) and not node[key].startswith("$")
+                }
+            references.add_selection_fields(node["as"], fields or None)
+
+        # recurse
+        for value in node.values():
+            _walk_config(value, tables, references)
+
+    elif isinstance(node, list):
+        for value in node:
+            _walk_config(value, tables, references)
+
+
+def _values_columns(values: Iterable[Any], schema: SchemaIndex) -> set[str] | None:
+    referenced: set[str] = set()
+    for value in values:
+        if isinstance(value, dict):
+            # column transforms can be bound to params (dynamic column names)
+            if isinstance(value.get("column"), str) and value["column"].startswith("$"):
+                return None
+            value_columns = _values_columns(value.values(), schema)
+        elif isinstance(value, list):
+            value_columns = _values_columns(value, schema)
+        elif isinstance(value, str):
+            value_columns = expression_columns(value, schema)
+        else:
+            continue
+        if value_columns is None:
+            return None
+        referenced |= value_columns
+    return referenced
+
+
+def expression_columns(
+    expr: str, columns: Sequence[str] | SchemaIndex
+) -> set[str] | None:
+    """Determine the columns referenced by a field name or SQL expression.
+
+    Args:
+       expr: Field name or SQL expression.
+       columns: Available columns (or an index of them).
+
+    Returns:
+       Columns referenced by the expression (`None` if the expression could
+       not be parsed, in which case all columns should be assumed).
+    """
+    schema = (
+        columns
+        if isinstance(columns, SchemaIndex)
+        else schema_index({column: nw.Unknown() for column in columns})
+    )
+
+    # exact column name (which may contain spaces or other punctuation)
+    if expr in schema.names:
+        return {expr}
+
+    # params are resolved to values (not columns)
+    if _PARAM_PATTERN.fullmatch(expr):
+        return set()
+
+    # match identifiers case-insensitively (as does duckdb)
+    identifiers = _expression_identifiers(expr)
+    if identifiers is None:
+        return None
+    return {
+        schema.lower_names[identifier]
+        for identifier in identifiers
+        if identifier in schema.lower_names
+    }
+
+
+def view_references(
+    references: ColumnReferences, tables: Mapping[str, Data]
+) -> list[Data]:
+    """Resolve the views referenced by a component config.
+
+    Adds the columns of the data that views reference to the column
+    references (the columns named in the SQL for the view along with the
+    columns referenced for the view that its parents pass through).
+
+    Args:
+       references: Column references for the component config.
+       tables: Tables available for reference (by table name).
+
+    Returns:
+       Views referenced (including views referenced by those views) in the
+       order they were created (which follows the data they reference).
+    """
+    # views are created after the data they reference so visit them in
+    # reverse order (resolving the columns referenced for a view before
+    # those of its parents)
+    views: list[Data] = []
+    for data in reversed(list(tables.values())):
+        if data._view is None or data.table not in references.columns:
+            continue
+        view_columns = references.columns[data.table]
+        selects_all = "*" in data._view.sql.replace("(*)", "")
+        for parent in data._view.parents:
+            columns = expression_columns(data._view.sql, parent._schema)
+            if columns is not None and selects_all:
+                if view_columns is None:
+                    columns = None
+                else:
+                    columns |= view_columns & parent._schema.names
+            references.add_columns(parent.table, columns)
+        views.append(data)
+    return list(reversed(views))
+
+
+def _expression_identifiers(expr: str) -> set[str] | None:
+    identifiers: set[str] = set()
+    pos = 0
+    while pos < len(expr):
+        match = _TOKEN_PATTERN.match(expr, pos)
+        if match is None:
+            return None
+        if match.group("quoted") is not None:
+            identifiers.add(match.group("quoted").replace('""', '"').lower())
+        elif match.group("identifier") is not None:
+            identifiers.add(match.group("identifier").lower())
+        pos = match.end()
+    return identifiers
+
+
+def param_references(config: Any, selections: Mapping[str, Selection]) -> set[str]:
+    """Determine the params and selections referenced by a component config.
+
+    Collects `$param_*` and `$selection_*` references (including those within
+    SQL expressions) along with the selections they include (transitively).
+
+    Args:
+       config: Component config.
+       selections: Selections available for reference (by id).
+
+    Returns:
+       Param and selection ids.
+    """
+    ids: set[str] = set()
+    _walk_params(config, ids)
+    for id in list(ids):
+        ids.update(selection_upstream(id, selections))
+    return ids
+
+
+def _walk_params(node: Any, ids: set[str]) -> None:
+    if isinstance(node, str):
+        ids.update(_PARAM_REFERENCE_PATTERN.findall(node))
+    elif isinstance(node, dict):
+        for value in node.values():
+            _walk_params(value, ids)
+    elif isinstance(node, list):
+        for value in node:
+            _walk_params(value, ids)
+
+
+def selection_upstream(selection: str, selections: Mapping[str, Selection]) -> set[str]:
+    """Selection ids for a selection and the selections it includes (transitively).
+
+    Args:
+       selection: Selection id.
+       selections: Selections available for reference (by id).
+
+    Returns:
+       Selection ids.
+    """
+    upstream: set[str] = set()
+    pending = [selection]
+    while pending:
+        id = pending.pop()
+        if id not in upstream:
+            upstream.add(id)
+            if id in selections:
+                include = selections[id].include
+                if include is not None:
+                    for included in include if isinstance(include, list) else [include]:
+                        pending.append(included.id)
+    return upstream
+
+
+_PARAM_PATTERN = re.compile(r"\$[A-Za-z0-9_]+")
+
+_PARAM_REFERENCE_PATTERN = re.compile(
+    rf"\$((?:{PARAM_PREFIX}|{SELECTION_PREFIX})[A-Za-z0-9_]+)"
+)
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    '(?:[^']|'')*'                          # string literal
+    |"(?P<quoted>(?:[^"]|"")*)"             # quoted identifier
+    |\$[A-Za-z0-9_]+                        # param reference
+    |(?P<identifier>[A-Za-z_][A-Za-z0-9_]*) # identifier
+    |[0-9]+(?:\.[0-9]*)?(?:[eE][+-]?[0-9]+)? # number
+    |\s+                                    # whitespace
+    |[^'"\s]                                # operators and punctuation
+    """,
+    re.VERBOSE,
+)
@@ -0,0 +1,48 @@
+import threading
+import weakref
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class Registry(Generic[T]):
+    """Registry of live objects.
+
+    Objects are held by weak reference (so registering an object does not keep
+    it alive). Objects are returned in the order they were registered.
+
+    Registries are safe to use from multiple threads. Writes are serialized
+    and replace the list of references rather than mutating it in place
+    (except for appends, which are atomic), so reads do not take a lock.
+    """
+
+    def __init__(self) -> None:
+        self._refs: list[weakref.ref[T]] = []
+        self._released = 0
+        self._lock = threading.Lock()
+
+    def add(self, obj: T) -> None:
+        """Register an object."""
+        with self._lock:
+            # prune references to released objects once they are the majority
+            if self._released > len(self._refs) // 2:
+                self._refs = [ref for ref in self._refs if ref() is not None]
+                self._released = 0
+            self._refs.append(weakref.ref(obj, self._on_release))
+
+    def remove(self, obj: T) -> None:
+        """Unregister an object."""
+        with self._lock:
+            self._refs = [ref for ref in self._refs if ref() is not obj]
+
+    def get_all(self) -> list[T]:
+        """Get all live objects."""
+        return [obj for ref in self._refs if (obj := ref()) is not None]
+
+    def __len__(self) -> int:
+        return len(self.get_all())
+
+    def _on_release(self, ref: "weakref.ref[T]") -> None:
+        # called by the garbage collector (possibly while the lock is held
+        # so we don't take it here)
+        self._released += 1
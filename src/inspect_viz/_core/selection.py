@@ -1,7 +1,9 @@
-from typing import ClassVar, Literal, Union
+from typing import Literal, Union
 
 from shortuuid import uuid
 
+from .session import current_session
+
 SELECTION_PREFIX = "selection_"
 
 
@@ -13,6 +15,7 @@ class Selection(str):
     _cross: bool | None
     _empty: bool | None
     _include: Union["Selection", list["Selection"] | None]
+    _fields: set[str]
 
     def __new__(
         cls,
@@ -36,8 +39,11 @@ class Selection(str):
         instance._empty = empty
         instance._include = include
 
+        # fields targeted by inputs/interactors (determined at display time)
+        instance._fields = set()
+
         # track and return instance
-        Selection._instances.append(instance)
+        current_session().selections.add(instance)
         return instance
 
     @property
@@ -102,10 +108,7 @@ class Selection(str):
         # close out and return
         return f"{repr})"
 
-    # Class-level dictionary to store all instances
-    _instances: ClassVar[list["Selection"]] = []
-
     @classmethod
     def get_all(cls) -> list["Selection"]:
-        """Get all selections."""
-        return cls._instances.copy()
+        """Get all selections (in the current session)."""
+        return current_session().selections.get_all()
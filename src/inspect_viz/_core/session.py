@@ -0,0 +1,92 @@
+import threading
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Iterator
+
+from .registry import Registry
+
+if TYPE_CHECKING:
+    from ..options._backend import DataBackend
+    from ..options._defaults import PlotDefaults
+    from .data import Data, DataShipping, TableState
+    from .kernel import KernelDatabase
+    from .param import Param
+    from .selection import Selection
+
+
+class Session:
+    """Data, params, selections, and options for a session.
+
+    By default all code shares a single session. Servers that display
+    visualizations for multiple users can give each user (or request) its
+    own session so that the objects created for one user are not included
+    in the visualizations displayed for another. For example:
+
+    ```python
+    with Session().activate():
+        penguins = Data("penguins.parquet")
+        ...
+    ```
+
+    The current session is tracked with a context variable, so it follows
+    code across threads started with a copy of the context (e.g. via
+    `asyncio.to_thread()`) and across the tasks of an event loop.
+    """
+
+    def __init__(self) -> None:
+        self.data: Registry["Data"] = Registry()
+        """Live `Data` created within the session."""
+
+        self.params: Registry["Param"] = Registry()
+        """Live `Param` created within the session."""
+
+        self.selections: Registry["Selection"] = Registry()
+        """Live `Selection` created within the session."""
+
+        self.plot_defaults: "PlotDefaults" = {}
+        """Plot defaults for the session (see `plot_defaults()`)."""
+
+        self.data_shipping: "DataShipping" = {}
+        """Format and compression of data shipped to the client (see
+        `data_format()` and `data_compression()`)."""
+
+        self.data_backend: "DataBackend" = "browser"
+        """Backend used to execute data queries (see `data_backend()`)."""
+
+        self.data_backend_url: str | None = None
+        """WebSocket URL for the 'server' data backend."""
+
+        self._kernel_database: "KernelDatabase | None" = None
+        self._table_states: weakref.WeakValueDictionary[str, "TableState"] = (
+            weakref.WeakValueDictionary()
+        )
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self) -> Iterator["Session"]:
+        """Make this the current session (within a `with` block)."""
+        token = _current_session.set(self)
+        try:
+            yield self
+        finally:
+            _current_session.reset(token)
+
+    def table_state(self, table: str) -> "TableState":
+        """Client state for a table (shared by data with the same table)."""
+        from .data import TableState
+
+        with self._lock:
+            return self._table_states.setdefault(table, TableState())
+
+
+def current_session() -> Session:
+    """Current session (the default session unless another is active)."""
+    return _current_session.get()
+
+
+_default_session = Session()
+
+_current_session: ContextVar[Session] = ContextVar(
+    "inspect_viz_session", default=_default_session
+)
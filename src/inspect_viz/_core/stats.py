@@ -0,0 +1,42 @@
+from typing import NamedTuple
+
+from .data import Data
+from .param import Param
+from .query_cache import query_cache
+from .selection import Selection
+
+
+class RegistryStats(NamedTuple):
+    """Live objects and retained memory."""
+
+    data: int
+    """Live `Data` instances."""
+
+    data_size: int
+    """Estimated size (in bytes) of the frames held by live `Data`."""
+
+    params: int
+    """Live `Param` instances."""
+
+    selections: int
+    """Live `Selection` instances."""
+
+    query_cache_size: int
+    """Size (in bytes) of cached query results."""
+
+
+def registry_stats() -> RegistryStats:
+    """Live data, params, and selections and the memory they retain.
+
+    Data, params, and selections are released once they are no longer
+    referenced (by your code or by visualizations that use them). Use
+    `registry_stats()` to check what is still alive in long-running sessions.
+    """
+    data = Data.get_all()
+    return RegistryStats(
+        data=len(data),
+        data_size=sum(int(d._ndf.estimated_size("b")) for d in data),
+        params=len(Param.get_all()),
+        selections=len(Selection.get_all()),
+        query_cache_size=query_cache().stats().size,
+    )
@@ -5,7 +5,10 @@ import {
 import { throttle } from "https://cdn.jsdelivr.net/npm/@uwdata/mosaic-core@0.16.2/+esm";
 
 // js/context/index.ts
-import { wasmConnector } from "https://cdn.jsdelivr.net/npm/@uwdata/mosaic-core@0.16.2/+esm";
+import {
+  socketConnector,
+  wasmConnector
+} from "https://cdn.jsdelivr.net/npm/@uwdata/mosaic-core@0.16.2/+esm";
 import { InstantiateContext } from "https://cdn.jsdelivr.net/npm/@uwdata/mosaic-spec@0.16.2/+esm";
 
 // js/inputs/input.ts
@@ -86,6 +89,281 @@ async function waitForTable(conn, table, { interval = 250 } = {}) {
     await new Promise((r) => setTimeout(r, interval));
   }
 }
+async function columnCount(conn, table) {
+  const res = await conn.query(
+    `SELECT count(*) AS n
+           FROM information_schema.columns
+         WHERE table_schema = 'main'
+           AND table_name   = '${table}'`
+  );
+  return Number(res.getChild("n")?.get(0) ?? 0);
+}
+async function columnNames(conn, table) {
+  const res = await conn.query(
+    `SELECT column_name AS name
+           FROM information_schema.columns
+         WHERE table_schema = 'main'
+           AND table_name   = '${table}'
+         ORDER BY ordinal_position`
+  );
+  return res.getChild("name")?.toArray().map(String) ?? [];
+}
+
+// js/context/kernel.ts
+import { decodeIPC } from "https://cdn.jsdelivr.net/npm/@uwdata/mosaic-core@0.16.2/+esm";
+var KernelConnector = class {
+  constructor() {
+    this.models_ = /* @__PURE__ */ new Set();
+    this.pending_ = /* @__PURE__ */ new Map();
+    this.nextId_ = 0;
+  }
+  setModel(model) {
+    if (!this.models_.has(model)) {
+      model.on(
+        "msg:custom",
+        (msg, buffers) => this.onMessage(msg, buffers)
+      );
+      model.on("destroy", () => this.onDestroy(model));
+      this.models_.add(model);
+    }
+    this.model_ = model;
+  }
+  async query({ type = "arrow", sql }) {
+    const model = this.model_;
+    if (!model) {
+      throw new Error("No widget available for sending queries to the kernel.");
+    }
+    const id = String(this.nextId_++);
+    const result = new Promise((resolve, reject) => {
+      this.pending_.set(id, { model, resolve, reject });
+    });
+    model.send({ type: "query", id, sql, queryType: type });
+    const data = await result;
+    if (type === "exec" || !data) {
+      return void 0;
+    }
+    const table = decodeIPC(data);
+    return type === "arrow" ? table : table.toArray();
+  }
+  onDestroy(model) {
+    this.models_.delete(model);
+    if (this.model_ === model) {
+      this.model_ = [...this.models_].pop();
+    }
+    for (const [id, pending] of this.pending_) {
+      if (pending.model === model) {
+        this.pending_.delete(id);
+        pending.reject(new Error("The widget used to send the query was closed."));
+      }
+    }
+  }
+  onMessage(msg, buffers) {
+    if (msg?.type !== "query_result") {
+      return;
+    }
+    const pending = this.pending_.get(msg.id);
+    if (pending) {
+      this.pending_.delete(msg.id);
+      if (msg.error) {
+        pending.reject(new Error(msg.error));
+      } else {
+        const buffer = buffers?.[0];
+        pending.resolve(
+          buffer === void 0 ? void 0 : ArrayBuffer.isView(buffer) ? new Uint8Array(buffer.buffer, buffer.byteOffset, buffer.byteLength) : new Uint8Array(buffer)
+        );
+      }
+    }
+  }
+};
+
+// js/context/ipc.ts
+async function decompressIPC(data) {
+  const messages = readMessages(data);
+  if (!messages.some((message) => message.codec !== void 0)) {
+    return data;
+  }
+  const parts = [];
+  for (const message of messages) {
+    if (message.codec === void 0) {
+      parts.push(data.subarray(message.start, message.end));
+    } else {
+      const codec = await loadCodec(message.codec);
+      parts.push(...decompressMessage(message, codec));
+    }
+  }
+  parts.push(new Uint8Array([255, 255, 255, 255, 0, 0, 0, 0]));
+  return concat(parts);
+}
+function readMessages(data) {
+  const view = new DataView(data.buffer, data.byteOffset, data.byteLength);
+  const messages = [];
+  let pos = 0;
+  while (pos + 4 <= data.byteLength) {
+    let prefix = 4;
+    let metadataLength = view.getInt32(pos, true);
+    if (metadataLength === -1) {
+      prefix = 8;
+      metadataLength = view.getInt32(pos + 4, true);
+    }
+    if (metadataLength === 0) {
+      break;
+    }
+    const metadataStart = pos + prefix;
+    const metadata = data.subarray(metadataStart, metadataStart + metadataLength);
+    const message = new FlatTable(metadata, rootPosition(metadata));
+    const bodyLength = message.int64(MESSAGE_BODY_LENGTH) ?? 0;
+    const bodyStart = metadataStart + metadataLength;
+    const compression = recordBatch(message)?.table(RECORD_BATCH_COMPRESSION);
+    messages.push({
+      start: pos,
+      end: bodyStart + bodyLength,
+      metadata,
+      body: data.subarray(bodyStart, bodyStart + bodyLength),
+      codec: compression ? compression.int8(BODY_COMPRESSION_CODEC) ?? LZ4_FRAME : void 0
+    });
+    pos = bodyStart + bodyLength;
+  }
+  return messages;
+}
+function decompressMessage(message, codec) {
+  const metadata = message.metadata.slice();
+  const root = new FlatTable(metadata, rootPosition(metadata));
+  const batch = recordBatch(root);
+  const compression = batch.table(RECORD_BATCH_COMPRESSION);
+  if ([root, compression, root.table(MESSAGE_HEADER)].some(
+    (table) => table.pos !== batch.pos && table.vtable === batch.vtable
+  )) {
+    throw new Error("Compressed record batch metadata cannot be patched.");
+  }
+  const body = message.body;
+  const bodyView = new DataView(body.buffer, body.byteOffset, body.byteLength);
+  const buffers = [];
+  let offset = 0;
+  batch.structs(RECORD_BATCH_BUFFERS, 16, (pos) => {
+    const start = Number(batch.view.getBigInt64(pos, true));
+    const length = Number(batch.view.getBigInt64(pos + 8, true));
+    let buffer = new Uint8Array(0);
+    if (length > 0) {
+      const size = Number(bodyView.getBigInt64(start, true));
+      const compressed = body.subarray(start + 8, start + length);
+      buffer = size === -1 ? compressed : codec(compressed, size);
+    }
+    batch.view.setBigInt64(pos, BigInt(offset), true);
+    batch.view.setBigInt64(pos + 8, BigInt(buffer.byteLength), true);
+    buffers.push(buffer, new Uint8Array(padding(buffer.byteLength)));
+    offset += buffer.byteLength + padding(buffer.byteLength);
+  });
+  root.setInt64(MESSAGE_BODY_LENGTH, offset);
+  batch.remove(RECORD_BATCH_COMPRESSION);
+  const prefix = new DataView(new ArrayBuffer(8));
+  prefix.setInt32(0, -1, true);
+  prefix.setInt32(4, metadata.byteLength, true);
+  return [new Uint8Array(prefix.buffer), metadata, ...buffers];
+}
+function recordBatch(message) {
+  const headerType = message.uint8(MESSAGE_HEADER_TYPE);
+  const header = message.table(MESSAGE_HEADER);
+  if (headerType === HEADER_RECORD_BATCH) {
+    return header;
+  } else if (headerType === HEADER_DICTIONARY_BATCH) {
+    return header?.table(DICTIONARY_BATCH_DATA);
+  }
+  return void 0;
+}
+async function loadCodec(codec) {
+  if (codec === ZSTD) {
+    const { decompress } = await import("https://cdn.jsdelivr.net/npm/fzstd@0.1.1/+esm");
+    return (data, size) => decompress(data, new Uint8Array(size));
+  } else if (codec === LZ4_FRAME) {
+    const lz4 = (await import("https://cdn.jsdelivr.net/npm/lz4js@0.2.0/+esm")).default;
+    return (data, size) => lz4.decompress(data, size);
+  } else {
+    throw new Error(`Unsupported arrow compression codec (${codec}).`);
+  }
+}
+var FlatTable = class {
+  constructor(bytes, pos) {
+    this.bytes = bytes;
+    this.pos = pos;
+    this.view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  }
+  get vtable() {
+    return this.pos - this.view.getInt32(this.pos, true);
+  }
+  table(field) {
+    const pos = this.field(field);
+    return pos === void 0 ? void 0 : new FlatTable(this.bytes, pos + this.view.getUint32(pos, true));
+  }
+  structs(field, size, visit) {
+    const pos = this.field(field);
+    if (pos !== void 0) {
+      const vector = pos + this.view.getUint32(pos, true);
+      const length = this.view.getUint32(vector, true);
+      for (let i = 0; i < length; i++) {
+        visit(vector + 4 + i * size);
+      }
+    }
+  }
+  uint8(field) {
+    const pos = this.field(field);
+    return pos === void 0 ? void 0 : this.view.getUint8(pos);
+  }
+  int8(field) {
+    const pos = this.field(field);
+    return pos === void 0 ? void 0 : this.view.getInt8(pos);
+  }
+  int64(field) {
+    const pos = this.field(field);
+    return pos === void 0 ? void 0 : Number(this.view.getBigInt64(pos, true));
+  }
+  setInt64(field, value) {
+    const pos = this.field(field);
+    if (pos === void 0) {
+      throw new Error(`Field ${field} is not present in the metadata.`);
+    }
+    this.view.setBigInt64(pos, BigInt(value), true);
+  }
+  remove(field) {
+    if (this.field(field) !== void 0) {
+      this.view.setUint16(this.vtable + 4 + field * 2, 0, true);
+    }
+  }
+  field(field) {
+    const vtable = this.vtable;
+    const slot = 4 + field * 2;
+    if (slot >= this.view.getUint16(vtable, true)) {
+      return void 0;
+    }
+    const offset = this.view.getUint16(vtable + slot, true);
+    return offset === 0 ? void 0 : this.pos + offset;
+  }
+};
+function rootPosition(bytes) {
+  return new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength).getUint32(0, true);
+}
+function padding(length) {
+  return (8 - length % 8) % 8;
+}
+function concat(parts) {
+  const result = new Uint8Array(parts.reduce((length, part) => length + part.byteLength, 0));
+  let offset = 0;
+  for (const part of parts) {
+    result.set(part, offset);
+    offset += part.byteLength;
+  }
+  return result;
+}
+var MESSAGE_HEADER_TYPE = 1;
+var MESSAGE_HEADER = 2;
+var MESSAGE_BODY_LENGTH = 3;
+var HEADER_DICTIONARY_BATCH = 2;
+var HEADER_RECORD_BATCH = 3;
+var DICTIONARY_BATCH_DATA = 1;
+var RECORD_BATCH_BUFFERS = 2;
+var RECORD_BATCH_COMPRESSION = 3;
+var BODY_COMPRESSION_CODEC = 0;
+var LZ4_FRAME = 0;
+var ZSTD = 1;
 
 // js/util/modal.ts
 var Modal = class _Modal {
@@ -263,35 +541,184 @@ var ErrorHandler = class {
 
 // js/context/index.ts
 var VizContext = class extends InstantiateContext {
-  constructor(conn_, plotDefaults) {
+  constructor(conn_, plotDefaults, serverUrl_) {
     super({
       plotDefaults
     });
     this.conn_ = conn_;
+    this.serverUrl_ = serverUrl_;
     this.tables_ = /* @__PURE__ */ new Set();
+    this.loading_ = /* @__PURE__ */ new Map();
+    this.versions_ = /* @__PURE__ */ new Map();
+    this.files_ = 0;
     this.api = { ...this.api, ...CUSTOM_INPUTS };
-    this.coordinator.databaseConnector(wasmConnector({ connection: this.conn_ }));
+    if (this.conn_) {
+      this.coordinator.databaseConnector(wasmConnector({ connection: this.conn_ }));
+    } else if (this.serverUrl_) {
+      this.coordinator.databaseConnector(socketConnector({ uri: this.serverUrl_ }));
+    } else {
+      this.kernel_ = new KernelConnector();
+      this.coordinator.databaseConnector(this.kernel_);
+    }
   }
-  async insertTable(table, data) {
-    await this.conn_?.insertArrowFromIPCStream(data, {
-      name: table,
-      create: true
-    });
-    this.tables_.add(table);
+  get backend() {
+    return this.conn_ ? "browser" : this.serverUrl_ ? "server" : "kernel";
+  }
+  setKernelModel(model) {
+    this.kernel_?.setModel(model);
+  }
+  get conn() {
+    if (!this.conn_) {
+      throw new Error(`Tables cannot be inserted when using the ${this.backend} data backend.`);
+    }
+    return this.conn_;
+  }
+  async insertTable(table, data, version = 0) {
+    const unlock = await this.lockTable(table);
+    try {
+      const insert = await this.beginInsert(table, data, version);
+      await insert?.finish();
+      return insert !== void 0;
+    } finally {
+      unlock();
+    }
+  }
+  async insertTableChunks(table, first, remaining, chunks, version = 0) {
+    const unlock = await this.lockTable(table);
+    let insert;
+    try {
+      insert = await this.beginInsert(table, first, version);
+    } catch (err) {
+      unlock();
+      throw err;
+    }
+    return {
+      remaining: insert ? remaining : 0,
+      load: async (onChunk) => {
+        try {
+          if (insert) {
+            for await (const chunk of chunks()) {
+              await this.insertData(insert.target, chunk, false);
+              onChunk();
+            }
+            await insert.finish();
+          }
+        } finally {
+          unlock();
+        }
+      }
+    };
+  }
+  async lockTable(table) {
+    while (this.loading_.has(table)) {
+      await this.loading_.get(table);
+    }
+    let loaded;
+    this.loading_.set(table, new Promise((resolve) => loaded = resolve));
+    return () => {
+      this.loading_.delete(table);
+      loaded();
+    };
+  }
+  async beginInsert(table, data, version) {
+    if (await columnCount(this.conn, table) === 0) {
+      await this.insertData(table, data, true);
+      this.tables_.add(table);
+      this.versions_.set(table, version);
+      return { target: table, finish: async () => {
+      } };
+    }
+    const current = this.versions_.get(table) ?? 0;
+    if (version < current) {
+      return void 0;
+    }
+    const staging = `${table}_staging`;
+    await this.insertData(staging, data, true);
+    if (version > current) {
+      return {
+        target: staging,
+        finish: async () => {
+          await this.conn.query(`DROP TABLE "${table}"`);
+          await this.conn.query(`ALTER TABLE "${staging}" RENAME TO "${table}"`);
+          this.versions_.set(table, version);
+        }
+      };
+    }
+    const existing = new Set(await columnNames(this.conn, table));
+    const added = (await columnNames(this.conn, staging)).filter((c) => !existing.has(c));
+    if (added.length === 0) {
+      await this.conn.query(`DROP TABLE "${staging}"`);
+      return void 0;
+    }
+    return {
+      target: staging,
+      finish: async () => {
+        const joined = `${table}_joined`;
+        const columns = added.map(quoteIdentifier).join(", ");
+        await this.conn.query(
+          `CREATE TABLE "${joined}" AS SELECT * FROM "${table}" POSITIONAL JOIN (SELECT ${columns} FROM "${staging}")`
+        );
+        await this.conn.query(`DROP TABLE "${staging}"`);
+        await this.conn.query(`DROP TABLE "${table}"`);
+        await this.conn.query(`ALTER TABLE "${joined}" RENAME TO "${table}"`);
+      }
+    };
+  }
+  async createView(view, sql) {
+    await this.conn.query(`CREATE OR REPLACE VIEW "${view}" AS ${sql}`);
+    this.tables_.add(view);
+  }
+  async insertData(table, data, create) {
+    if (isParquet(data)) {
+      const file = `${table}_${++this.files_}.parquet`;
+      await this.conn.bindings.registerFileBuffer(file, data);
+      try {
+        const read = `SELECT * FROM read_parquet('${file}')`;
+        await this.conn.query(
+          create ? `CREATE TABLE "${table}" AS ${read}` : `INSERT INTO "${table}" ${read}`
+        );
+      } finally {
+        await this.conn.bindings.dropFile(file);
+      }
+    } else {
+      await this.conn.insertArrowFromIPCStream(await decompressIPC(data), {
+        name: table,
+        create
+      });
+    }
   }
-  async waitForTable(table) {
+  async waitForTable(table, version = 0) {
+    if (!this.conn_) {
+      return;
+    }
     await waitForTable(this.conn_, table);
+    while ((this.versions_.get(table) ?? 0) < version) {
+      await new Promise((r) => setTimeout(r, 250));
+    }
+    await this.loading_.get(table);
   }
 };
+function quoteIdentifier(name) {
+  return `"${name.replace(/"/g, '""')}"`;
+}
+function isParquet(data) {
+  return data[0] === 80 && data[1] === 65 && data[2] === 82 && data[3] === 49;
+}
 var VIZ_CONTEXT_KEY = Symbol.for("@@inspect-viz-context");
-async function vizContext(plotDefaults) {
+async function vizContext(plotDefaults, backend = "browser", serverUrl) {
   const globalScope = typeof window !== "undefined" ? window : globalThis;
   if (!globalScope[VIZ_CONTEXT_KEY]) {
     globalScope[VIZ_CONTEXT_KEY] = (async () => {
       initializeErrorHandling();
-      const duckdb = await initDuckdb();
-      const conn = await duckdb.connect();
-      return new VizContext(conn, plotDefaults);
+      if (backend === "kernel") {
+        return new VizContext(void 0, plotDefaults);
+      } else if (backend === "server") {
+        return new VizContext(void 0, plotDefaults, serverUrl);
+      } else {
+        const duckdb = await initDuckdb();
+        const conn = await duckdb.connect();
+        return new VizContext(conn, plotDefaults);
+      }
     })();
   }
   return globalScope[VIZ_CONTEXT_KEY];
@@ -302,9 +729,18 @@ async function render({ model, el }) {
   const spec = JSON.parse(model.get("spec"));
   const plotDefaultsSpec = { plotDefaults: spec.plotDefaults, vspace: 0 };
   const plotDefaultsAst = parseSpec(plotDefaultsSpec);
-  const ctx = await vizContext(plotDefaultsAst.plotDefaults);
+  const ctx = await vizContext(
+    plotDefaultsAst.plotDefaults,
+    model.get("backend"),
+    model.get("backend_url") ?? void 0
+  );
+  ctx.setKernelModel(model);
   const tables = model.get("tables") || {};
-  await syncTables(ctx, tables);
+  const versions = model.get("table_versions") || {};
+  const loaders = await syncTables(ctx, model, tables, versions);
+  for (const [view, sql] of Object.entries(model.get("views") || {})) {
+    await ctx.createView(view, sql);
+  }
   const renderOptions = renderSetup(el);
   const inputs = new Set(
     ["menu", "search", "slider", "table"].concat(Object.keys(CUSTOM_INPUTS))
@@ -321,6 +757,11 @@ async function render({ model, el }) {
     el.appendChild(specEl);
   };
   await renderSpec();
+  if (loaders.length > 0) {
+    await loadChunks(loaders, el);
+    ctx.coordinator.clear({ clients: false });
+    await renderSpec();
+  }
   if (renderOptions.autoFill) {
     const resizeObserver = new ResizeObserver(throttle(renderSpec));
     resizeObserver.observe(el);
@@ -329,18 +770,91 @@ async function render({ model, el }) {
     };
   }
 }
-async function syncTables(ctx, tables) {
-  for (const [tableName, base64Data] of Object.entries(tables)) {
-    if (base64Data) {
-      const binaryString = atob(base64Data);
-      const bytes = new Uint8Array(binaryString.length);
-      for (let i = 0; i < binaryString.length; i++) {
-        bytes[i] = binaryString.charCodeAt(i);
-      }
-      await ctx.insertTable(tableName, bytes);
+async function syncTables(ctx, model, tables, versions) {
+  const loaders = [];
+  for (const [tableName, data] of Object.entries(tables)) {
+    const version = versions[tableName] ?? 0;
+    if (data && "chunks" in data) {
+      loaders.push(
+        await ctx.insertTableChunks(
+          tableName,
+          viewBytes(data.data),
+          data.chunks,
+          () => tableChunks(model, tableName),
+          version
+        )
+      );
+    } else if (data && data.byteLength > 0) {
+      await ctx.insertTable(tableName, viewBytes(data), version);
     } else {
-      await ctx.waitForTable(tableName);
+      await ctx.waitForTable(tableName, version);
+    }
+  }
+  return loaders;
+}
+async function* tableChunks(model, table) {
+  const ids = await chunkModelIds(model, table);
+  for (const id of ids) {
+    const chunk = await model.widget_manager.get_model(id);
+    yield viewBytes(await chunkData(chunk));
+  }
+}
+function chunkModelIds(model, table) {
+  return new Promise((resolve) => {
+    const ids = model.get("table_chunks")?.[table];
+    if (ids) {
+      resolve(ids);
+      return;
+    }
+    const onChange = () => {
+      const ids2 = model.get("table_chunks")?.[table];
+      if (ids2) {
+        model.off("change:table_chunks", onChange);
+        resolve(ids2);
+      }
+    };
+    model.on("change:table_chunks", onChange);
+    model.send({ type: "table_chunks", table });
+  });
+}
+function chunkData(chunk) {
+  return new Promise((resolve) => {
+    const data = chunk.get("data");
+    if (data) {
+      resolve(data);
+      return;
+    }
+    const onChange = () => {
+      const data2 = chunk.get("data");
+      if (data2) {
+        chunk.off("change:data", onChange);
+        resolve(data2);
+      }
+    };
+    chunk.on("change:data", onChange);
+  });
+}
+function viewBytes(data) {
+  return new Uint8Array(data.buffer, data.byteOffset, data.byteLength);
+}
+async function loadChunks(loaders, el) {
+  const progressEl = document.createElement("div");
+  progressEl.className = "inspect-viz-progress";
+  const barEl = document.createElement("div");
+  barEl.className = "inspect-viz-progress-bar";
+  progressEl.appendChild(barEl);
+  el.appendChild(progressEl);
+  const total = loaders.reduce((total2, loader) => total2 + loader.remaining, 0);
+  let loaded = 0;
+  try {
+    for (const loader of loaders) {
+      await loader.load(() => {
+        loaded++;
+        barEl.style.width = `${Math.round(loaded / total * 100)}%`;
+      });
     }
+  } finally {
+    progressEl.remove();
   }
 }
 function renderSetup(containerEl) {
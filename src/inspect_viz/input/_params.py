@@ -32,7 +32,7 @@ def options_params(
 
 def column_validated(data: Data | None, column: str) -> str:
     if data is not None:
-        if column not in data.columns:
+        if column not in data._schema.names:
             raise ValueError(f"Column '{column}' was not found in the data source.")
     return column
 
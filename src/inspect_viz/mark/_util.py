@@ -7,7 +7,7 @@ def column_param(
     data: Data | None, param: ChannelValueIntervalSpec | Param | None
 ) -> ChannelValueIntervalSpec | Param | None:
     if data is not None and isinstance(param, str):
-        if not isinstance(param, Param) and param not in data.columns:
+        if not isinstance(param, Param) and param not in data._schema.names:
             raise ValueError(f"Column '{param}' was not found in the data source.")
 
         return column(param)
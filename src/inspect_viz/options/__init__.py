@@ -1,3 +1,14 @@
+from .._core.query_cache import QueryCacheStats
+from ._backend import (
+    DataBackend,
+    data_backend,
+    data_compression,
+    data_format,
+    file_cache,
+    payload_cache,
+    query_cache_size,
+    query_cache_stats,
+)
 from ._defaults import PlotDefaults, plot_defaults
 from ._options import (
     ColorScale,
@@ -21,4 +32,13 @@ __all__ = [
     "ColorScheme",
     "Interpolate",
     "LabelArrow",
+    "DataBackend",
+    "data_backend",
+    "data_compression",
+    "data_format",
+    "QueryCacheStats",
+    "query_cache_size",
+    "query_cache_stats",
+    "file_cache",
+    "payload_cache",
 ]
@@ -0,0 +1,200 @@
+from os import PathLike
+from typing import Literal
+
+from .._core.data import (
+    DEFAULT_ROW_GROUP_SIZE,
+    DataCompression,
+    DataFormat,
+)
+from .._core.file_cache import (
+    DEFAULT_FILE_CACHE_SIZE,
+    DEFAULT_PAYLOAD_CACHE_SIZE,
+    FileCache,
+    PayloadCache,
+    default_cache_dir,
+    set_file_cache,
+    set_payload_cache,
+)
+from .._core.query_cache import QueryCacheStats, query_cache
+from .._core.session import current_session
+
+DataBackend = Literal["browser", "kernel", "server"]
+"""Backend used to execute data queries."""
+
+
+def data_backend(backend: DataBackend, url: str | None = None) -> None:
+    """Set the backend used to execute data queries.
+
+    The 'browser' backend (the default) ships data to the browser and queries
+    it with DuckDB-wasm. The 'kernel' backend keeps data in the Python kernel
+    and queries it with DuckDB (which must be installed), sending only query
+    results to the browser. Use the 'kernel' backend for data too large to
+    ship to the browser.
+
+    The 'server' backend sends queries to a `QueryServer` (see
+    `inspect_viz.server`) at the specified `url`. Use the 'server' backend
+    for dashboards viewed by several users at once (e.g. with Voila).
+
+    The backend applies to the current session (see `Session`). Note that
+    this function should be called once at the outset (the backend for a
+    notebook is determined by the first visualization it displays).
+
+    Args:
+       backend: Data backend ('browser', 'kernel', or 'server').
+       url: WebSocket URL for the 'server' backend (e.g. 'ws://localhost:8765').
+    """
+    if backend not in ["browser", "kernel", "server"]:
+        raise ValueError(
+            f"Invalid data backend '{backend}' (expected 'browser', 'kernel', or 'server')."
+        )
+    if backend == "server" and not url:
+        raise ValueError("The 'server' data backend requires a url.")
+
+    # ensure that duckdb is available for the kernel backend
+    if backend == "kernel":
+        from .._core.kernel import kernel_database
+
+        kernel_database()
+
+    session = current_session()
+    session.data_backend = backend
+    session.data_backend_url = url if backend == "server" else None
+
+
+def query_cache_size(max_size: int) -> None:
+    """Set the maximum size of the query cache.
+
+    Query results for the 'kernel' and 'server' data backends are cached
+    (many visualizations and viewers issue identical queries). Results are
+    evicted (least recently used first) to keep the cache within `max_size`
+    and are removed when the data they depend on changes. Only results for
+    queries that reference data are cached, and results cached before an
+    'exec' query (which can change any table) are not used after it.
+
+    Args:
+       max_size: Maximum size (in bytes) of cached query results (defaults
+          to 256MB). Pass 0 to disable caching.
+    """
+    query_cache().resize(max_size)
+
+
+def query_cache_stats() -> QueryCacheStats:
+    """Query cache statistics (hits, misses, evictions, size, etc.)."""
+    return query_cache().stats()
+
+
+def file_cache(
+    enabled: bool = True,
+    dir: str | PathLike[str] | None = None,
+    max_size: int = DEFAULT_FILE_CACHE_SIZE,
+) -> None:
+    """Enable (or disable) the file cache.
+
+    Data files in formats that are slow to read (e.g. csv, Excel, SAS, and
+    Stata files) are parsed every time they are read by `Data`. When the
+    file cache is enabled, parsed files are converted to Arrow and stored in
+    the cache directory, so subsequent reads (e.g. in later notebook sessions
+    or renders) load the converted file instead. Converted files are no longer
+    used once their source file changes. Use `cache_clear()` to remove all
+    converted files.
+
+    Args:
+       enabled: Enable the file cache.
+       dir: Cache directory (defaults to `~/.cache/inspect_viz/files`).
+       max_size: Maximum size (in bytes) of converted files (defaults to 2GB).
+          Least recently used files are removed to stay within this size.
+    """
+    set_file_cache(
+        FileCache(dir or default_cache_dir("files"), max_size) if enabled else None
+    )
+
+
+def payload_cache(
+    enabled: bool = True,
+    dir: str | PathLike[str] | None = None,
+    max_size: int = DEFAULT_PAYLOAD_CACHE_SIZE,
+) -> None:
+    """Enable (or disable) the payload cache.
+
+    Data is encoded (as Arrow IPC) to ship it to the client. When the payload
+    cache is enabled, the encoded payloads for data created with
+    `content_hash=True` are stored in the cache directory, so subsequent
+    displays of the same data (e.g. in later notebook sessions or renders)
+    ship the stored payload instead of encoding the data again. Use
+    `cache_clear()` to remove stored payloads.
+
+    Args:
+       enabled: Enable the payload cache.
+       dir: Cache directory (defaults to `~/.cache/inspect_viz/payloads`).
+       max_size: Maximum size (in bytes) of stored payloads (defaults to 2GB).
+          Least recently used payloads are removed to stay within this size.
+    """
+    set_payload_cache(
+        PayloadCache(dir or default_cache_dir("payloads"), max_size)
+        if enabled
+        else None
+    )
+
+
+def data_compression(compression: DataCompression | None) -> None:
+    """Set the compression of data shipped to the client.
+
+    Arrow IPC buffers shipped to the client are uncompressed by default.
+    Compressing them ships (and saves in notebooks and exported HTML) much
+    smaller payloads, at the cost of time to compress them in Python and
+    decompress them in the browser. `"lz4"` is the faster of the two codecs
+    and `"zstd"` compresses further. Pass `compression` to `Data()` to
+    override this for particular data.
+
+    Compression applies to data created in the current session (see
+    `Session`).
+
+    Args:
+       compression: Compression codec (`"lz4"` or `"zstd"`) or `None` for no
+          compression.
+    """
+    if compression not in [None, "lz4", "zstd"]:
+        raise ValueError(
+            f"Invalid compression '{compression}' (expected 'lz4', 'zstd', or None)."
+        )
+    shipping = current_session().data_shipping
+    if compression is None:
+        shipping.pop("compression", None)
+    else:
+        shipping["compression"] = compression
+
+
+def data_format(
+    format: DataFormat, row_group_size: int = DEFAULT_ROW_GROUP_SIZE
+) -> None:
+    """Set the format of data shipped to the client.
+
+    Data is shipped to the client as Arrow IPC by default. Parquet (which
+    dictionary and run-length encodes columns) is often much smaller for
+    data with repetitive values (e.g. text columns), at the cost of time to
+    encode it in Python and read it in the browser. Parquet files are
+    shipped as is when all of their columns are shipped (and they aren't
+    re-encoded or re-compressed). Pass `format` to `Data()` to override
+    this for particular data.
+
+    The format applies to data created in the current session (see
+    `Session`).
+
+    Args:
+       format: Data format (`"arrow"` or `"parquet"`).
+       row_group_size: Maximum number of rows in the row groups of data
+          shipped as parquet (defaults to 122,880, the row group size used
+          by DuckDB).
+    """
+    if format not in ["arrow", "parquet"]:
+        raise ValueError(f"Invalid format '{format}' (expected 'arrow' or 'parquet').")
+    if row_group_size < 1:
+        raise ValueError("The row group size must be at least 1.")
+    shipping = current_session().data_shipping
+    shipping["format"] = format
+    shipping["row_group_size"] = row_group_size
+
+
+def current_data_backend() -> tuple[DataBackend, str | None]:
+    session = current_session()
+    return session.data_backend, session.data_backend_url
@@ -3,6 +3,7 @@ from typing import Any
 from typing_extensions import Unpack
 
 from .._core.param import Param
+from .._core.session import current_session
 from .._core.types import Interval
 from ._options import PlotOptions, plot_options_mosaic
 
@@ -41,18 +42,16 @@ def plot_defaults(**defaults: Unpack[PlotDefaults]) -> None:
 
     Note that this function should be called once at the outset (subsequent calls to it do not reset the defaults).
 
+    Defaults apply to the current session (see `Session`).
+
     Args:
        defaults: Keyword args from `PlotDefaults`
     """
-    global _plot_defaults
-    _plot_defaults = defaults
+    current_session().plot_defaults = defaults
 
 
 def plot_defaults_as_camel() -> dict[str, Any]:
-    global _plot_defaults
-    return plot_options_mosaic(_builtin_plot_defaults | _plot_defaults)
+    return plot_options_mosaic(_builtin_plot_defaults | current_session().plot_defaults)
 
 
 _builtin_plot_defaults = PlotDefaults()
-
-_plot_defaults = PlotDefaults()
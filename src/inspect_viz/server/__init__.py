@@ -0,0 +1,3 @@
+from ._server import QueryServer, serve
+
+__all__ = ["QueryServer", "serve"]
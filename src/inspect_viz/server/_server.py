@@ -0,0 +1,183 @@
+import asyncio
+import json
+import re
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Sequence
+
+from pydantic_core import to_json
+
+from .._core.kernel import KernelDatabase
+from .._core.session import current_session
+
+if TYPE_CHECKING:
+    from websockets.asyncio.server import Server, ServerConnection
+
+
+class QueryServer:
+    """WebSocket server for visualization queries.
+
+    Serves queries using the Mosaic socket connector protocol, executing them
+    with a pool of DuckDB connections over the `Data` defined in the session
+    the server was created in (see `Session`). Only query results are sent to
+    clients (so the data is not shipped to each viewer of a dashboard).
+
+    Clients can send any SQL, so the server's database has no access to the
+    file system and only pages served from allowed origins can connect
+    (browsers allow pages from any site to open WebSockets to `localhost`).
+
+    Use `data_backend("server", url=server.url)` to send the queries for
+    visualizations to the server. For example:
+
+    ```python
+    server = QueryServer()
+    await server.start()
+    data_backend("server", url=server.url)
+    ```
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 8765,
+        connections: int = 4,
+        origins: Sequence[str] | None = None,
+    ) -> None:
+        """Create a query server.
+
+        Args:
+           host: Host to listen on.
+           port: Port to listen on (pass 0 to use any free port).
+           connections: Number of database connections used to execute
+              queries (queries from separate clients run concurrently).
+           origins: Origins (e.g. `"https://dashboards.example.com"`) of
+              pages allowed to query the server. Pages served from
+              `localhost` and clients that don't send an origin (e.g.
+              Python clients) are always allowed.
+        """
+        if connections < 1:
+            raise ValueError("Query servers require at least one connection.")
+
+        self._host = host
+        self._port = port
+        self._connections = connections
+        self._origins = list(origins or [])
+        self._session = current_session()
+        self._server: "Server | None" = None
+        self._pool: asyncio.Queue[KernelDatabase] | None = None
+
+    @property
+    def url(self) -> str:
+        """WebSocket URL for the server."""
+        return f"ws://{self._host}:{self._port}"
+
+    async def start(self) -> None:
+        """Start the server."""
+        try:
+            from websockets.asyncio.server import serve
+            from websockets.typing import Origin
+        except ImportError:
+            raise ModuleNotFoundError(
+                "The query server requires the websockets package (pip install websockets)."
+            ) from None
+
+        # create a pool of connections to a single database (so that tables
+        # created by queries are shared across connections)
+        database = KernelDatabase(session=self._session)
+        self._pool = asyncio.Queue()
+        for _ in range(self._connections):
+            self._pool.put_nowait(database.cursor())
+
+        # start listening (resolving the port if any free port was requested)
+        self._server = await serve(
+            self._handle,
+            self._host,
+            self._port,
+            origins=[*map(Origin, self._origins), _LOCAL_ORIGIN, None],
+            max_size=_MAX_MESSAGE_SIZE,
+        )
+        self._port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "QueryServer":
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.stop()
+
+    async def _handle(self, websocket: "ServerConnection") -> None:
+        # clients send one query at a time and wait for its result
+        async for message in websocket:
+            await websocket.send(await self._query(message))
+
+    async def _query(self, message: str | bytes) -> str | memoryview:
+        assert self._pool is not None
+        try:
+            request = json.loads(message)
+            type = request.get("type", "arrow")
+            sql = request["sql"]
+
+            # execute query on a pooled connection
+            database = await self._pool.get()
+            try:
+                return await asyncio.to_thread(_execute, database, type, sql)
+            finally:
+                self._pool.put_nowait(database)
+        except Exception as ex:
+            # report errors to the client (which rejects the query with them)
+            return json.dumps({"error": str(ex)})
+
+
+def serve(
+    host: str = "localhost",
+    port: int = 8765,
+    connections: int = 4,
+    origins: Sequence[str] | None = None,
+) -> None:
+    """Run a query server (blocks until interrupted).
+
+    Args:
+       host: Host to listen on.
+       port: Port to listen on.
+       connections: Number of database connections used to execute queries.
+       origins: Origins of pages allowed to query the server (in addition
+          to pages served from `localhost`).
+    """
+
+    async def run() -> None:
+        async with QueryServer(host, port, connections, origins):
+            await asyncio.Future()
+
+    asyncio.run(run())
+
+
+def _execute(database: KernelDatabase, type: Any, sql: str) -> str | memoryview:
+    if type == "exec":
+        database.query(sql, "exec")
+        return "{}"
+    elif type == "json":
+        return to_json(database.query_rows(sql)).decode()
+    elif type == "arrow":
+        result = database.query(sql)
+        assert result is not None
+        return result
+    else:
+        raise ValueError(f"Unknown query type '{type}'.")
+
+
+# pages served from the local machine
+_LOCAL_ORIGIN = re.compile(r"https?://(localhost|127\.0\.0\.1|\[::1\])(:\d+)?")
+
+# maximum size of messages from clients (which are queries)
+_MAX_MESSAGE_SIZE = 2**20
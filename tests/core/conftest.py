@@ -0,0 +1,11 @@
+from pathlib import Path
+
+import pytest
+from inspect_viz import Data
+
+PENGUINS = Path(__file__).parent.parent / "_data" / "penguins.parquet"
+
+
+@pytest.fixture
+def penguins() -> Data:
+    return Data(PENGUINS)
@@ -0,0 +1,266 @@
+import gc
+import json
+from pathlib import Path
+from typing import cast
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pytest
+from inspect_viz import Component, Data, Param, Session
+from inspect_viz._core.component import TableChunk, TableData
+from inspect_viz._core.param import PARAM_PREFIX
+from inspect_viz.input import select
+from inspect_viz.mark import dot
+from inspect_viz.options import plot_defaults
+from inspect_viz.plot import plot
+from inspect_viz.transform import sql
+from ipywidgets.widgets.widget import _remove_buffers  # type: ignore[import-untyped]
+from traitlets import TraitError
+
+from .conftest import PENGUINS
+
+
+def test_tables_synced_as_buffers(penguins: Data) -> None:
+    component = plot(dot(penguins, x="bill_depth", y="flipper_length"))
+    component._repr_mimebundle_()
+
+    # the widget holds the data (not an encoded copy of it)
+    assert component.widget.tables == {
+        penguins.table: TableData(penguins, ["bill_depth", "flipper_length"])
+    }
+
+    state, buffer_paths, buffers = _remove_buffers(component.widget.get_state())
+    assert ["tables", penguins.table] in buffer_paths
+    assert state["tables"] == {}
+
+    # buffers are a valid arrow ipc stream
+    buffer = buffers[buffer_paths.index(["tables", penguins.table])]
+    table = pa.ipc.open_stream(buffer).read_all()
+    assert table.num_rows == len(penguins)
+
+
+def test_widget_created_on_display(penguins: Data) -> None:
+    marks = [dot(penguins, x="bill_depth", y="flipper_length") for _ in range(3)]
+    component = plot(marks)
+    assert component._widget is None
+    assert all(mark._widget is None for mark in marks)
+
+    component._repr_mimebundle_()
+    assert component._widget is not None
+    assert all(mark._widget is None for mark in marks)
+
+
+def test_spec_params_referenced(penguins: Data) -> None:
+    unused = Param(1)
+    opacity = Param(0.5)
+    component = plot(
+        dot(penguins, x="bill_depth", y="flipper_length", fill_opacity=opacity)
+    )
+    component._repr_mimebundle_()
+    params = json.loads(component.widget.spec)["params"]
+    assert opacity.id in params
+    assert unused.id not in params
+    assert penguins.selection.id in params
+
+
+def test_spec_params_in_plot_defaults() -> None:
+    with Session().activate():
+        width = Param(400)
+        data = Data(PENGUINS)
+        plot_defaults(width=width)
+        component = plot(dot(data, x="bill_depth", y="flipper_length"))
+        component._repr_mimebundle_()
+    spec = json.loads(component.widget.spec)
+    assert spec["plotDefaults"]["width"] == str(width)
+    assert width.id in spec["params"]
+
+
+def test_spec_params_embedded_in_sql(penguins: Data) -> None:
+    # params embedded in sql expressions are referenced only by id
+    def build() -> Component:
+        depth = Param(2)
+        return plot(dot(penguins, x=sql(f"bill_depth * {depth}"), y="flipper_length"))
+
+    component = build()
+    gc.collect()
+    component._repr_mimebundle_()
+    params = json.loads(component.widget.spec)["params"]
+    assert any(id.startswith(PARAM_PREFIX) for id in params)
+
+
+def test_tables_rejects_strings() -> None:
+    component = Component(config={})
+    with pytest.raises(TraitError):
+        component.widget.tables = {"table": "not bytes"}  # type: ignore[dict-item]
+
+
+def test_tables_chunked() -> None:
+    penguins = Data(PENGUINS, chunk_size=1024)
+    component = plot(dot(penguins, x="bill_depth", y="flipper_length"))
+    component._repr_mimebundle_()
+
+    # the first chunk is synced with the widget (along with the number of
+    # remaining chunks, which are synced as chunk widgets once requested)
+    widget = component.widget
+    data = widget.tables[penguins.table]
+    assert isinstance(data, list) and len(data) > 1
+    state = widget.get_state()["tables"][penguins.table]
+    assert state["chunks"] == len(data) - 1
+    buffers = [state["data"]]
+
+    widget._handle_chunks_msg(
+        widget, dict(type="table_chunks", table=penguins.table), []
+    )
+    ids = widget.table_chunks[penguins.table]
+    assert [chunk.model_id for chunk in widget._chunks] == ids
+    buffers.extend(chunk.get_state()["data"] for chunk in widget._chunks)
+
+    # chunks fit within the chunk size and together contain all rows
+    tables: list[pa.Table] = []
+    for buffer in buffers:
+        assert isinstance(buffer, memoryview)
+        assert buffer.nbytes <= 2048
+        tables.append(pa.ipc.open_stream(buffer).read_all())
+    table = pa.concat_tables(tables)
+    assert table.column_names == ["bill_depth", "flipper_length"]
+    assert table.num_rows == len(penguins)
+
+
+def test_tables_chunks_closed() -> None:
+    def displayed_chunks(component: Component, data: Data) -> list[TableChunk]:
+        component._repr_mimebundle_()
+        widget = component.widget
+        widget._handle_chunks_msg(
+            widget, dict(type="table_chunks", table=data.table), []
+        )
+        assert widget._chunks
+        return list(widget._chunks)
+
+    # chunk widgets are closed when the component is re-displayed
+    penguins = Data(PENGUINS, chunk_size=1024)
+    component = plot(dot(penguins, x="bill_depth", y="flipper_length"))
+    chunks = displayed_chunks(component, penguins)
+    component._repr_mimebundle_()
+    assert all(chunk.comm is None for chunk in chunks)
+    assert component.widget.table_chunks == {}
+
+    # and when the component is closed
+    penguins = Data(PENGUINS, chunk_size=1024)
+    component = plot(dot(penguins, x="bill_depth", y="flipper_length"))
+    chunks = displayed_chunks(component, penguins)
+    component.close()
+    assert all(chunk.comm is None for chunk in chunks)
+
+
+def test_tables_pruned(penguins: Data) -> None:
+    component = plot(dot(penguins, x="bill_depth", y="flipper_length"))
+    component._repr_mimebundle_()
+    assert _shipped_columns(component, penguins) == ["bill_depth", "flipper_length"]
+
+    # already shipped columns aren't shipped again
+    component = plot(dot(penguins, x="bill_depth", y="flipper_length"))
+    component._repr_mimebundle_()
+    assert component.widget.tables == {penguins.table: None}
+
+    # ship only the additional columns
+    component = plot(dot(penguins, x="bill_depth", y="bill_length"))
+    component._repr_mimebundle_()
+    assert _shipped_columns(component, penguins) == ["bill_length"]
+
+
+def test_tables_selection_fields(penguins: Data) -> None:
+    component = plot(dot(penguins, x="bill_depth", y="flipper_length"))
+    component._repr_mimebundle_()
+
+    # selecting on island requires the table to ship the island column
+    component = select(penguins, column="island")
+    component._repr_mimebundle_()
+    assert _shipped_columns(component, penguins) == ["island"]
+
+
+def test_tables_explicit_columns() -> None:
+    penguins = Data(PENGUINS, columns=["species", "bill_depth", "flipper_length"])
+    component = plot(dot(penguins, x="bill_depth", y="flipper_length"))
+    component._repr_mimebundle_()
+    assert _shipped_columns(component, penguins) == [
+        "species",
+        "bill_depth",
+        "flipper_length",
+    ]
+
+
+def test_tables_unparseable_sql(penguins: Data) -> None:
+    component = plot(dot(penguins, x="bill_depth", y=sql("body_mass || 'g")))
+    component._repr_mimebundle_()
+    assert _shipped_columns(component, penguins) == penguins.columns
+
+
+def _shipped_columns(component: Component, data: Data) -> list[str]:
+    state, buffer_paths, buffers = _remove_buffers(component.widget.get_state())
+    buffer = buffers[buffer_paths.index(["tables", data.table])]
+    return cast(list[str], pa.ipc.open_stream(buffer).read_all().column_names)
+
+
+def test_tables_ipc_file_ships_all_columns(tmp_path: Path) -> None:
+    # mapped arrow ipc files are shipped as is (rather than pruned)
+    table = pa.table({"x": range(10), "y": range(10), "label": list("abcdefghij")})
+    path = tmp_path / "data.arrow"
+    feather.write_feather(table, path, compression="uncompressed")
+    data = Data(path)
+    component = plot(dot(data, x="x", y="y"))
+    component._repr_mimebundle_()
+    table_data = component.widget.tables[data.table]
+    assert isinstance(table_data, TableData)
+    assert table_data.encode() is data._ipc_stream
+    assert _shipped_columns(component, data) == ["x", "y", "label"]
+
+
+def test_tables_chunked_ipc_file_pruned(tmp_path: Path) -> None:
+    # mapped arrow ipc files shipped in chunks are re-encoded (so pruned)
+    table = pa.table({"x": range(1000), "y": range(1000), "z": range(1000)})
+    path = tmp_path / "data.arrow"
+    feather.write_feather(table, path, compression="uncompressed")
+    data = Data(path, chunk_size=1000)
+    component = plot(dot(data, x="x", y="y"))
+    component._repr_mimebundle_()
+    chunks = component.widget.tables[data.table]
+    assert isinstance(chunks, list)
+    assert chunks[0].columns == ["x", "y"]
+
+
+def test_tables_view(penguins: Data) -> None:
+    view = penguins.view(
+        columns=["species", "bill_depth", "flipper_length"], where="island = 'Dream'"
+    )
+    component = plot(dot(view, x="bill_depth", y="flipper_length"))
+    component._repr_mimebundle_()
+
+    # the viewed data is shipped (with the columns the view references)
+    # and the view is created by the client
+    assert view.table not in component.widget.tables
+    assert _shipped_columns(component, penguins) == [
+        "species",
+        "island",
+        "bill_depth",
+        "flipper_length",
+    ]
+    assert view._view is not None
+    assert component.widget.views == {view.table: view._view.sql}
+
+
+def test_tables_join() -> None:
+    samples = Data(
+        pd.DataFrame({"model": ["a", "b"], "id": [1, 2], "score": [0.1, 0.2]})
+    )
+    models = Data(pd.DataFrame({"model": ["a", "b"], "params": [7, 70]}))
+    joined = samples.join(models, on="model")
+    component = plot(dot(joined, x="params", y="score"))
+    component._repr_mimebundle_()
+
+    # each side of the join is shipped (with the columns referenced)
+    assert joined.table not in component.widget.tables
+    assert _shipped_columns(component, samples) == ["model", "score"]
+    assert _shipped_columns(component, models) == ["model", "params"]
+    assert joined._view is not None
+    assert component.widget.views == {joined.table: joined._view.sql}
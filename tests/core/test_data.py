@@ -0,0 +1,416 @@
+import tracemalloc
+from pathlib import Path
+from typing import cast
+
+import narwhals as nw
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.parquet as parquet
+import pytest
+from inspect_viz import Data
+from inspect_viz.options import data_compression, data_format
+
+from .conftest import PENGUINS
+
+
+def test_data_encoded_lazily(monkeypatch: pytest.MonkeyPatch) -> None:
+    encodes: list[Data] = []
+    encode = Data._encode
+
+    def tracked_encode(self: Data, columns: list[str] | None = None) -> memoryview:
+        encodes.append(self)
+        return encode(self, columns)
+
+    monkeypatch.setattr(Data, "_encode", tracked_encode)
+
+    data = Data(PENGUINS)
+    assert encodes == []
+
+    payload = data.collect_data()
+    assert encodes == [data]
+    assert pa.ipc.open_stream(payload).read_all().num_rows == len(data)
+
+
+def test_data_collected_once() -> None:
+    data = Data(PENGUINS)
+    assert len(data.collect_data()) > 0
+    assert data.collect_data() == bytes()
+
+
+def test_data_collects_additional_columns() -> None:
+    data = Data(PENGUINS)
+    data.collect_data(["bill_depth", "flipper_length"])
+
+    # only the columns that haven't been shipped are collected
+    payload = data.collect_data(["bill_depth", "bill_length"])
+    assert pa.ipc.open_stream(payload).read_all().column_names == ["bill_length"]
+    assert data.collect_data(["bill_length", "flipper_length"]) == bytes()
+
+
+def test_data_encode_peak_memory() -> None:
+    rows = 500_000
+    data = Data(
+        pd.DataFrame(
+            {
+                "id": np.arange(rows),
+                "x": np.random.rand(rows),
+                "y": np.random.rand(rows),
+            }
+        )
+    )
+
+    # arrow buffers are allocated from the arrow memory pool (which tracemalloc
+    # can't see) so track them with a proxy pool alongside tracemalloc
+    pa.set_memory_pool(PROXY_POOL)
+    tracemalloc.start()
+    try:
+        start = PROXY_POOL.bytes_allocated()
+        payload = data._encode()
+        _, python_peak = tracemalloc.get_traced_memory()
+        arrow_peak = PROXY_POOL.max_memory() - start
+    finally:
+        tracemalloc.stop()
+        pa.set_memory_pool(DEFAULT_POOL)
+
+    # peak is the growing output buffer plus the batch being written (the
+    # previous implementation held an intermediate table and a bytes copy)
+    assert python_peak + arrow_peak < 2 * len(payload)
+
+
+# buffers allocated from the proxy pool may outlive the test so it must as well
+DEFAULT_POOL = pa.default_memory_pool()
+PROXY_POOL = pa.proxy_memory_pool(DEFAULT_POOL)
+
+
+def test_data_content_hash_file() -> None:
+    data1 = Data(PENGUINS, content_hash=True)
+    data2 = Data(PENGUINS, content_hash=True)
+    assert data1.table == data2.table
+    assert data1.selection.id != data2.selection.id
+    assert Data(PENGUINS, columns=["species"], content_hash=True).table != data1.table
+    assert Data(PENGUINS).table != data1.table
+
+
+def test_data_content_hash_frame() -> None:
+    df = pd.read_parquet(PENGUINS)
+    data1 = Data(df, content_hash=True)
+    data2 = Data(df.copy(), content_hash=True)
+    assert data1.table == data2.table
+    assert Data(df.head(10), content_hash=True).table != data1.table
+
+
+def test_data_content_hash_shipped_once() -> None:
+    data1 = Data(PENGUINS, content_hash=True, columns=["species", "island"])
+    data2 = Data(PENGUINS, content_hash=True, columns=["species", "island"])
+    assert len(data1.collect_data()) > 0
+    assert len(data2.collect_data()) == 0
+
+
+def test_data_append() -> None:
+    data = Data(pd.DataFrame({"x": [1, 2], "y": ["a", "b"]}))
+    data.collect_data()
+    data.append(pd.DataFrame({"y": ["c"], "x": [3]}))
+    assert len(data) == 3
+    assert data.columns == ["x", "y"]
+
+    # changed data is shipped again
+    assert data._state.version == 1
+    payload = data.collect_data()
+    assert pa.ipc.open_stream(payload).read_all().num_rows == 3
+
+    with pytest.raises(ValueError):
+        data.append(pd.DataFrame({"x": [4]}))
+
+
+def test_data_replace() -> None:
+    data = Data(pd.DataFrame({"x": [1, 2], "y": ["a", "b"]}), columns=["x"])
+    data.replace(pd.DataFrame({"x": [3], "y": ["c"]}))
+    assert len(data) == 1
+    assert data.columns == ["x"]
+    assert data._state.version == 1
+
+
+def test_data_content_hash_immutable() -> None:
+    data = Data(pd.DataFrame({"x": [1, 2]}), content_hash=True)
+    with pytest.raises(ValueError):
+        data.append(pd.DataFrame({"x": [3]}))
+
+
+def test_data_schema_index() -> None:
+    data = Data(pd.DataFrame({"x": [1, 2], "Name": ["a", "b"]}))
+    schema = data._schema
+    assert data._schema is schema
+    assert schema.names == frozenset({"x", "Name"})
+    assert schema.dtypes["x"].is_numeric()
+    assert schema.lower_names["name"] == "Name"
+
+    # replacing the data re-indexes its schema
+    data.replace(pd.DataFrame({"z": [1]}))
+    assert data._schema.names == frozenset({"z"})
+    assert data.columns == ["z"]
+
+
+@pytest.mark.parametrize("ext", [".csv", ".jsonl", ".parquet", ".feather"])
+def test_data_file_read_as_arrow(tmp_path: Path, ext: str) -> None:
+    df = pd.DataFrame({"x": [1, 2], "y": ["a", "b"]})
+    path = tmp_path / f"data{ext}"
+    if ext == ".csv":
+        df.to_csv(path, index=False)
+    elif ext == ".jsonl":
+        df.to_json(path, orient="records", lines=True)
+    elif ext == ".parquet":
+        df.to_parquet(path)
+    else:
+        df.to_feather(path)
+
+    data = Data(path)
+    assert isinstance(data._ndf.to_native(), pa.Table)
+    assert data.columns == ["x", "y"]
+
+    # rows from other kinds of frames can be appended
+    data.append(pd.DataFrame({"x": [3], "y": ["c"]}))
+    assert data._ndf["y"].to_list() == ["a", "b", "c"]
+
+
+def test_data_file_read_columns() -> None:
+    data = Data(PENGUINS, columns=["species", "island"])
+    assert cast(pa.Table, data._ndf.to_native()).column_names == ["species", "island"]
+
+    with pytest.raises(ValueError, match="not found"):
+        Data(PENGUINS, columns=["species", "wingspan"])
+
+
+def test_data_ipc_file_shipped_from_map(tmp_path: Path) -> None:
+    table = pa.table({"x": range(100), "y": [str(i) for i in range(100)]})
+    path = tmp_path / "data.arrow"
+    feather.write_feather(table, path, compression="uncompressed")
+
+    # uncompressed files are shipped from the memory map as is
+    data = Data(path)
+    payload = data.collect_data()
+    assert payload is data._ipc_stream
+    assert pa.ipc.open_stream(payload).read_all().equals(table)
+
+    # changed data is re-encoded
+    data.append(pa.table({"x": [100], "y": ["100"]}))
+    assert data._ipc_stream is None
+    assert pa.ipc.open_stream(data.collect_data()).read_all().num_rows == 101
+
+
+def test_data_ipc_file_compressed(tmp_path: Path) -> None:
+    table = pa.table({"x": range(100)})
+    path = tmp_path / "data.feather"
+    feather.write_feather(table, path, compression="zstd")
+
+    data = Data(path)
+    assert data._ipc_stream is None
+    assert pa.ipc.open_stream(data.collect_data()).read_all().equals(table)
+
+
+def test_data_dataset(tmp_path: Path) -> None:
+    table = pa.table(
+        {
+            "model": ["a", "a", "b", "b"],
+            "task": ["x", "y", "x", "y"],
+            "score": [1, 2, 3, 4],
+        }
+    )
+    parquet.write_to_dataset(table, tmp_path, partition_cols=["model", "task"])
+
+    # partition keys are dictionary encoded columns
+    data = Data(tmp_path)
+    assert len(data) == 4
+    schema = cast(pa.Table, data._ndf.to_native()).schema
+    assert pa.types.is_dictionary(schema.field("model").type)
+
+    # columns and filters are pushed down to the scan
+    data = Data(tmp_path, columns=["score"], filter=pc.field("model") == "b")
+    assert data.columns == ["score"]
+    assert sorted(data._ndf["score"].to_list()) == [3, 4]
+
+    # globs select files (with partition keys read from their paths)
+    data = Data(tmp_path / "model=*" / "task=x" / "*.parquet")
+    assert sorted(data._ndf["model"].to_list()) == ["a", "b"]
+
+    # filters in disjunctive normal form
+    data = Data(tmp_path, filter=[("task", "=", "y"), ("score", ">", 2)])
+    assert data._ndf["score"].to_list() == [4]
+
+    with pytest.raises(ValueError, match="not found"):
+        Data(tmp_path, columns=["wingspan"])
+
+
+def test_data_filter_requires_file() -> None:
+    with pytest.raises(ValueError):
+        Data(pd.DataFrame({"x": [1]}), filter=pc.field("x") == 1)
+
+
+def test_data_from_sql() -> None:
+    pytest.importorskip("duckdb")
+    query = f"SELECT species, count(*) AS n FROM read_parquet('{PENGUINS}') GROUP BY species ORDER BY species"
+    data = Data.from_sql(query)
+    assert data.query == query
+    assert data.columns == ["species", "n"]
+    assert data._ndf["species"].to_list() == ["Adelie", "Chinstrap", "Gentoo"]
+
+    # content hashes are computed from the query results
+    assert (
+        Data.from_sql(query, content_hash=True).table
+        == Data(data._ndf.to_native(), content_hash=True).table
+    )
+
+
+def test_data_from_sql_connection() -> None:
+    duckdb = pytest.importorskip("duckdb")
+    connection = duckdb.connect()
+    connection.execute("CREATE TABLE scores AS SELECT range AS x FROM range(10)")
+    data = Data.from_sql("SELECT x FROM scores WHERE x < 3", connection, columns=["x"])
+    assert len(data) == 3
+
+
+def test_data_view_columns(penguins: Data) -> None:
+    view = penguins.view(columns=["species", "bill_depth"], where="island = 'Dream'")
+    assert view.columns == ["species", "bill_depth"]
+    assert view._view is not None
+    assert view._view.parents == (penguins,)
+    assert view._view.sql == (
+        f'SELECT "species", "bill_depth" FROM "{penguins.table}" '
+        "WHERE island = 'Dream'"
+    )
+
+    # columns are validated against the data's columns
+    with pytest.raises(ValueError):
+        penguins.view(columns=["species", "bill_width"])
+
+
+def test_data_view_computed_columns(penguins: Data) -> None:
+    pytest.importorskip("duckdb")
+    view = penguins.view(columns={"species": "species", "mass_kg": "body_mass / 1000"})
+    assert view.columns == ["species", "mass_kg"]
+    assert view._schema.dtypes["mass_kg"] == nw.Float64()
+
+    view = penguins.view(
+        f'SELECT species, count(*) AS n FROM "{penguins.table}" GROUP BY species'
+    )
+    assert view.columns == ["species", "n"]
+
+    # sql must reference the data
+    with pytest.raises(ValueError):
+        penguins.view("SELECT 1 AS x")
+
+
+def test_data_view_immutable(penguins: Data) -> None:
+    view = penguins.view(columns=["species"])
+    with pytest.raises(ValueError):
+        view.append(pd.DataFrame({"species": ["Adelie"]}))
+
+
+def test_data_join() -> None:
+    samples = Data(
+        pd.DataFrame({"model": ["a", "b"], "id": [1, 2], "score": [0.1, 0.2]})
+    )
+    models = Data(pd.DataFrame({"model": ["a", "b"], "params": [7, 70]}))
+    joined = samples.join(models, on="model", how="left")
+    assert joined.columns == ["model", "id", "score", "params"]
+    assert joined._view is not None
+    assert joined._view.parents == (samples, models)
+    assert joined._view.sql == (
+        f'SELECT * FROM "{samples.table}" LEFT JOIN "{models.table}" USING ("model")'
+    )
+
+    # keys must be in both sides and other columns in only one side
+    with pytest.raises(ValueError):
+        samples.join(models, on="id")
+    with pytest.raises(ValueError):
+        samples.join(samples.view(columns=["model", "score"]), on="model")
+
+
+@pytest.mark.parametrize("compression", ["lz4", "zstd"])
+def test_data_compression(compression: str) -> None:
+    data = Data(PENGUINS, compression=compression)  # type: ignore[arg-type]
+    payload = data._encode()
+    assert len(payload) < len(Data(PENGUINS)._encode())
+    assert pa.ipc.open_stream(payload).read_all().equals(data._ndf.to_arrow())
+
+
+def test_data_compression_option() -> None:
+    data_compression("zstd")
+    try:
+        assert len(Data(PENGUINS)._encode()) < len(
+            Data(PENGUINS, compression="none")._encode()
+        )
+    finally:
+        data_compression(None)
+
+    with pytest.raises(ValueError):
+        Data(PENGUINS, compression="gzip")  # type: ignore[arg-type]
+
+
+def test_data_parquet_format() -> None:
+    data = Data(
+        pd.DataFrame({"x": range(1000), "y": ["a", "b"] * 500}), format="parquet"
+    )
+    payload = data._encode()
+    assert bytes(payload[:4]) == b"PAR1"
+    assert parquet.read_table(pa.py_buffer(payload)).equals(data._ndf.to_arrow())
+
+
+def test_data_parquet_file_compression(tmp_path: Path) -> None:
+    # parquet files are shipped as is when compressed as requested
+    path = tmp_path / "data.parquet"
+    parquet.write_table(pa.table({"x": range(100)}), path, compression="zstd")
+    data = Data(path, format="parquet", compression="zstd")
+    assert bytes(data._encode()) == path.read_bytes()
+
+
+def test_data_parquet_row_group_size() -> None:
+    data_format("parquet", row_group_size=100)
+    try:
+        data = Data(pd.DataFrame({"x": range(1000)}))
+        metadata = parquet.ParquetFile(pa.py_buffer(data._encode())).metadata
+        assert metadata.num_row_groups == 10
+    finally:
+        data_format("arrow")
+
+    with pytest.raises(ValueError):
+        data_format("csv")  # type: ignore[arg-type]
+    with pytest.raises(ValueError):
+        Data(PENGUINS, format="csv")  # type: ignore[arg-type]
+
+
+def test_data_parquet_file_shipped_as_is() -> None:
+    # parquet files are shipped as is when all of their columns are shipped
+    data = Data(PENGUINS, format="parquet")
+    assert bytes(data._encode()) == PENGUINS.read_bytes()
+
+    # (and are re-encoded when only some of their columns are)
+    payload = data._encode(columns=["species", "island"])
+    assert parquet.read_table(pa.py_buffer(payload)).column_names == [
+        "species",
+        "island",
+    ]
+    assert bytes(Data(PENGUINS, columns=["species"], format="parquet")._encode()) != (
+        PENGUINS.read_bytes()
+    )
+
+    # (and when they are encoded or compressed differently)
+    data = Data(PENGUINS, format="parquet", encoding={"bill_depth": "float32"})
+    assert bytes(data._encode()) != PENGUINS.read_bytes()
+    payload = data._encode()
+    assert (
+        parquet.read_schema(pa.py_buffer(payload)).field("bill_depth").type
+        == pa.float32()
+    )
+    assert bytes(Data(PENGUINS, format="parquet", compression="zstd")._encode()) != (
+        PENGUINS.read_bytes()
+    )
+
+    # changed data is re-encoded
+    data = Data(PENGUINS, format="parquet")
+    data.append(data._ndf.head(1).to_native())
+    payload = data._encode()
+    assert bytes(payload) != PENGUINS.read_bytes()
+    assert parquet.read_table(pa.py_buffer(payload)).num_rows == len(data._ndf)
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from inspect_viz import Data
+
+
+def test_encoding_auto() -> None:
+    rows = 10_000
+    data = Data(
+        pd.DataFrame(
+            {
+                "model": np.resize(["gpt-4o", "claude", None], rows),
+                "id": [f"sample-{i}" for i in range(rows)],
+                "epoch": np.resize([1, 2, 3], rows),
+                "score": np.linspace(0, 1, rows),
+            }
+        ),
+        encoding="auto",
+    )
+    table = pa.ipc.open_stream(data.collect_data()).read_all()
+
+    # low cardinality strings are dictionary encoded (unique strings aren't)
+    assert pa.types.is_dictionary(table.schema.field("model").type)
+    assert not pa.types.is_dictionary(table.schema.field("id").type)
+    assert table.column("model").to_pylist()[:3] == ["gpt-4o", "claude", None]
+
+    # ints are downcast and floats are not
+    assert table.schema.field("epoch").type == pa.int8()
+    assert table.schema.field("score").type == pa.float64()
+
+    report = data.encoding_report()
+    assert report["model"].encoding == "dictionary"
+    assert report["model"].bytes_saved > 0
+    assert report["epoch"].encoding == "downcast"
+    assert report["epoch"].bytes_saved == rows * 7
+    assert report["score"].encoding == "none"
+    assert report["score"].bytes_saved == 0
+
+
+def test_encoding_int_range() -> None:
+    data = Data(
+        pd.DataFrame({"small": [-128, 127], "medium": [-129, 0], "large": [0, 2**40]}),
+        encoding="auto",
+    )
+    assert {
+        column: encoded.type for column, encoded in data.encoding_report().items()
+    } == {
+        "small": pa.int8(),
+        "medium": pa.int16(),
+        "large": pa.int64(),
+    }
+
+
+def test_encoding_float32_opt_in() -> None:
+    data = Data(
+        pd.DataFrame({"x": [0.5, 1.25], "y": [1.0, 1e300]}),
+        encoding={"x": "float32", "y": "float32"},
+    )
+    table = pa.ipc.open_stream(data.collect_data()).read_all()
+    assert table.schema.field("x").type == pa.float32()
+    assert table.column("x").to_pylist() == [0.5, 1.25]
+
+    # values out of the range of float32 aren't downcast
+    assert table.schema.field("y").type == pa.float64()
+
+
+def test_encoding_chunks_share_schema() -> None:
+    data = Data(
+        pd.DataFrame({"model": np.resize(["a", "b", "c"], 1000), "n": range(1000)}),
+        encoding="auto",
+        chunk_size=1000,
+    )
+    chunks = data._chunks()
+    assert chunks is not None and len(chunks) > 1
+    tables = [pa.ipc.open_stream(data._encode(rows=rows)).read_all() for rows in chunks]
+    assert all(table.schema == tables[0].schema for table in tables)
+    assert (
+        pa.concat_tables(tables).column("model").to_pylist()
+        == data._ndf["model"].to_list()
+    )
+
+
+def test_encoding_invalid() -> None:
+    df = pd.DataFrame({"model": ["a"], "score": [0.5]})
+    with pytest.raises(ValueError):
+        Data(df, encoding={"score": "dictionary"})
+    with pytest.raises(ValueError):
+        Data(df, encoding={"model": "float32"})
+    with pytest.raises(ValueError):
+        Data(df, encoding={"missing": "auto"})
+
+
+def test_encoding_reset_on_append() -> None:
+    data = Data(pd.DataFrame({"n": [1, 2]}), encoding="auto")
+    assert data.encoding_report()["n"].type == pa.int8()
+    data.append(pd.DataFrame({"n": [1000]}))
+    assert data.encoding_report()["n"].type == pa.int16()
@@ -0,0 +1,148 @@
+import os
+from pathlib import Path
+from typing import Iterator, cast
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from inspect_viz import Data, Session, cache_clear
+from inspect_viz._core import data as data_module
+from inspect_viz._core.file_cache import FileCache, file_cache
+from inspect_viz.options import file_cache as file_cache_option
+from inspect_viz.options import payload_cache as payload_cache_option
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path) -> Iterator[Path]:
+    dir = tmp_path / "cache"
+    file_cache_option(dir=dir)
+    yield dir
+    file_cache_option(enabled=False)
+
+
+@pytest.fixture
+def csv_file(tmp_path: Path) -> Path:
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"x": [1, 2, 3], "y": ["a", "b", "c"]}).to_csv(path, index=False)
+    return path
+
+
+def test_file_cache_reads_converted(
+    cache_dir: Path, csv_file: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    data = Data(csv_file)
+    assert len(list(cache_dir.glob("*.arrow"))) == 1
+
+    # the converted file is read instead of parsing the file
+    def parse_file(path: str, ext: str) -> pa.Table:
+        raise AssertionError("File should not be parsed.")
+
+    monkeypatch.setattr(data_module, "_parse_file", parse_file)
+    cached = Data(csv_file)
+    assert cast(pa.Table, cached._ndf.to_native()).equals(data._ndf.to_native())
+
+
+def test_file_cache_source_changed(cache_dir: Path, csv_file: Path) -> None:
+    Data(csv_file)
+    pd.DataFrame({"x": [4], "y": ["d"]}).to_csv(csv_file, index=False)
+    os.utime(csv_file, ns=(0, 0))
+    assert len(Data(csv_file)) == 1
+    assert len(list(cache_dir.glob("*.arrow"))) == 2
+
+
+def test_file_cache_converts_pandas(cache_dir: Path, tmp_path: Path) -> None:
+    path = tmp_path / "data.json"
+    pd.DataFrame({"x": [1, 2]}).to_json(path)
+    assert isinstance(Data(path)._ndf.to_native(), pa.Table)
+    assert isinstance(Data(path)._ndf.to_native(), pa.Table)
+
+
+def test_file_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = FileCache(tmp_path / "cache", max_size=5000)
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"data{i}.csv"
+        pd.DataFrame({"x": range(200)}).to_csv(path, index=False)
+        paths.append(path)
+
+    def read(path: Path) -> None:
+        cache.read(path, lambda: pa.table({"x": range(200)}), {})
+
+    read(paths[0])
+    [first] = cache.dir.glob("*.arrow")
+    read(paths[1])
+    os.utime(first, (0, 0))
+    read(paths[2])
+
+    # the least recently used file is removed
+    files = list(cache.dir.glob("*.arrow"))
+    assert not first.exists()
+    assert len(files) == 2
+    assert sum(file.stat().st_size for file in files) <= 5000
+
+
+def test_cache_clear(cache_dir: Path, csv_file: Path) -> None:
+    Data(csv_file)
+    assert file_cache() is not None
+    cache_clear()
+    assert list(cache_dir.glob("*.arrow")) == []
+
+
+@pytest.fixture
+def payload_dir(tmp_path: Path) -> Iterator[Path]:
+    dir = tmp_path / "payloads"
+    payload_cache_option(dir=dir)
+    yield dir
+    payload_cache_option(enabled=False)
+
+
+def frame() -> pd.DataFrame:
+    return pd.DataFrame({"x": [1, 2, 3], "y": ["a", "b", "c"]})
+
+
+def collect(columns: list[str] | None = None) -> memoryview:
+    # collect in a new session (as would a restarted kernel)
+    with Session().activate():
+        return Data(frame(), content_hash=True).collect_data(columns)
+
+
+def test_payload_cache_hit(
+    payload_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    payload = bytes(collect(["x"]))
+    assert len(list(payload_dir.glob("*/*.arrows"))) == 1
+
+    # the stored payload is used rather than encoding the data
+    def encode_ipc_stream(reader: pa.RecordBatchReader) -> memoryview:
+        raise AssertionError("Data should not be encoded.")
+
+    monkeypatch.setattr(data_module, "encode_ipc_stream", encode_ipc_stream)
+    with caplog.at_level("DEBUG", logger="inspect_viz._core.file_cache"):
+        assert bytes(collect(["x"])) == payload
+    assert "Payload cache hit" in caplog.text
+
+
+def test_payload_cache_keyed_by_columns(payload_dir: Path) -> None:
+    collect(["x"])
+    payload = collect(["y"])
+    assert pa.ipc.open_stream(payload).read_all().column_names == ["y"]
+    assert len(list(payload_dir.glob("*/*.arrows"))) == 2
+
+
+def test_payload_cache_requires_content_hash(payload_dir: Path) -> None:
+    Data(frame()).collect_data()
+    assert list(payload_dir.glob("*/*.arrows")) == []
+
+
+def test_payload_cache_invalidate(payload_dir: Path) -> None:
+    data = Data(frame(), content_hash=True)
+    data.collect_data()
+    other = Data(pd.DataFrame({"z": [1]}), content_hash=True)
+    other.collect_data()
+
+    cache_clear(content_hash=data.table)
+    assert [file.parent.name for file in payload_dir.glob("*/*.arrows")] == [
+        other.table
+    ]
@@ -0,0 +1,196 @@
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from inspect_viz import Data
+from inspect_viz._core.kernel import KernelDatabase, handle_query_msg
+from inspect_viz._core.query_cache import query_cache
+from inspect_viz.mark import dot
+from inspect_viz.options import data_backend
+from inspect_viz.plot import plot
+
+pytest.importorskip("duckdb")
+
+
+class MockWidget:
+    def __init__(self) -> None:
+        self.sent: list[tuple[dict[str, Any], list[memoryview] | None]] = []
+
+    def send(
+        self, content: dict[str, Any], buffers: list[memoryview] | None = None
+    ) -> None:
+        self.sent.append((content, buffers))
+
+
+def test_kernel_query_arrow(penguins: Data) -> None:
+    database = KernelDatabase()
+    result = database.query(
+        f'SELECT species, count(*) AS n FROM "{penguins.table}" GROUP BY species'
+    )
+    assert result is not None
+    table = pa.ipc.open_stream(result).read_all()
+    assert table.column_names == ["species", "n"]
+    assert sum(table.column("n").to_pylist()) == len(penguins)
+
+
+def test_kernel_query_exec(penguins: Data) -> None:
+    database = KernelDatabase()
+    assert database.query("CREATE TEMP TABLE t AS SELECT 1 AS x", "exec") is None
+    result = database.query("SELECT x FROM t")
+    assert result is not None
+    assert pa.ipc.open_stream(result).read_all().column("x").to_pylist() == [1]
+
+
+def test_kernel_query_cached(penguins: Data) -> None:
+    database = KernelDatabase()
+    sql = f'SELECT count(*) AS n FROM "{penguins.table}"'
+    stats = query_cache().stats()
+    first = database.query(sql)
+    second = database.cursor().query(sql)
+    assert first is second
+    assert query_cache().stats().hits == stats.hits + 1
+
+    # results aren't shared with other databases
+    assert KernelDatabase().query(sql) is not first
+
+
+def test_kernel_query_cache_exec(penguins: Data) -> None:
+    # exec queries can change tables so results cached before them aren't used
+    database = KernelDatabase()
+    database.query("CREATE TABLE t AS SELECT 1 AS x", "exec")
+    sql = f'SELECT x, count(*) AS n FROM t, "{penguins.table}" GROUP BY x'
+    assert rows(database.query(sql)) == [{"x": 1, "n": len(penguins)}]
+    database.cursor().query("CREATE OR REPLACE TABLE t AS SELECT 2 AS x", "exec")
+    assert rows(database.query(sql)) == [{"x": 2, "n": len(penguins)}]
+
+
+def test_kernel_query_not_cached_without_data() -> None:
+    database = KernelDatabase()
+    database.query("CREATE TABLE t AS SELECT 1 AS x", "exec")
+    assert rows(database.query("SELECT x FROM t")) == [{"x": 1}]
+    database._conn.execute("CREATE OR REPLACE TABLE t AS SELECT 2 AS x")
+    assert rows(database.query("SELECT x FROM t")) == [{"x": 2}]
+
+    sql = "SELECT random() AS r"
+    assert rows(database.query(sql)) != rows(database.query(sql))
+
+
+def rows(result: memoryview | None) -> list[dict[str, Any]]:
+    assert result is not None
+    return list(pa.ipc.open_stream(result).read_all().to_pylist())
+
+
+def test_kernel_query_data_changed() -> None:
+    data = Data(pd.DataFrame({"x": [1, 2]}))
+    database = KernelDatabase()
+    sql = f'SELECT count(*) AS n FROM "{data.table}"'
+    assert count(database.query(sql)) == 2
+
+    # appended rows are queried (rather than cached results)
+    data.append(pd.DataFrame({"x": [3]}))
+    assert count(database.query(sql)) == 3
+
+    data.replace(pd.DataFrame({"x": [1]}))
+    assert count(database.query(sql)) == 1
+
+
+def count(result: memoryview | None) -> int:
+    assert result is not None
+    n: int = pa.ipc.open_stream(result).read_all().column("n")[0].as_py()
+    return n
+
+
+def test_kernel_query_msg(penguins: Data) -> None:
+    widget = MockWidget()
+    handle_query_msg(
+        widget,
+        dict(type="query", id="1", sql=f'SELECT count(*) FROM "{penguins.table}"'),
+        [],
+    )
+    content, buffers = widget.sent[0]
+    assert content == dict(type="query_result", id="1")
+    assert buffers is not None and len(buffers) == 1
+
+
+def test_kernel_query_msg_error() -> None:
+    widget = MockWidget()
+    handle_query_msg(
+        widget, dict(type="query", id="2", sql="SELECT * FROM missing"), []
+    )
+    content, buffers = widget.sent[0]
+    assert content["id"] == "2" and "missing" in content["error"]
+    assert buffers is None
+
+
+def test_kernel_ignores_other_msgs() -> None:
+    widget = MockWidget()
+    handle_query_msg(widget, dict(type="other"), [])
+    assert widget.sent == []
+
+
+def test_kernel_backend_does_not_ship_tables(penguins: Data) -> None:
+    data_backend("kernel")
+    try:
+        component = plot(dot(penguins, x="bill_depth", y="flipper_length"))
+        component._repr_mimebundle_()
+        assert component.widget.backend == "kernel"
+        assert component.widget.tables == {}
+        assert handles_queries(component.widget)
+    finally:
+        data_backend("browser")
+
+
+def test_browser_backend_does_not_handle_queries(penguins: Data) -> None:
+    component = plot(dot(penguins, x="bill_depth", y="flipper_length"))
+    component._repr_mimebundle_()
+    assert not handles_queries(component.widget)
+
+
+def handles_queries(widget: Any) -> bool:
+    return any(
+        getattr(callback, "func", None) is handle_query_msg
+        for callback in widget._msg_callbacks.callbacks
+    )
+
+
+def test_kernel_no_file_access(tmp_path: Path) -> None:
+    path = tmp_path / "secret.txt"
+    path.write_text("secret")
+    database = KernelDatabase()
+    with pytest.raises(Exception, match="disabled"):
+        database.query_rows(f"SELECT content FROM read_text('{path}')")
+    with pytest.raises(Exception, match="disabled"):
+        database.query(f"COPY (SELECT 1) TO '{tmp_path / 'out.csv'}'", "exec")
+    assert not (tmp_path / "out.csv").exists()
+
+
+def test_kernel_query_view() -> None:
+    data = Data(pd.DataFrame({"x": [1, 2, 3]}))
+    view = data.view(where="x > 1")
+    database = KernelDatabase()
+    sql = f'SELECT count(*) AS n FROM "{view.table}"'
+    assert count(database.query(sql)) == 2
+
+    # views see changes to the data they view
+    data.append(pd.DataFrame({"x": [4]}))
+    assert count(database.query(sql)) == 3
+
+    # views of views
+    view_of_view = view.view(where="x < 4")
+    assert (
+        count(database.query(f'SELECT count(*) AS n FROM "{view_of_view.table}"')) == 2
+    )
+
+
+def test_kernel_query_join() -> None:
+    samples = Data(pd.DataFrame({"model": ["a", "a", "b", "c"], "score": [1, 2, 3, 4]}))
+    models = Data(pd.DataFrame({"model": ["a", "b"], "params": [7, 70]}))
+    joined = samples.join(models, on="model", how="left")
+    database = KernelDatabase()
+    result = database.query(f'SELECT * FROM "{joined.table}" ORDER BY score')
+    assert result is not None
+    table = pa.ipc.open_stream(result).read_all()
+    assert table.column_names == joined.columns
+    assert table.column("params").to_pylist() == [7, 7, 70, None]
@@ -0,0 +1,65 @@
+from inspect_viz._core.query_cache import QueryCache, normalize_sql
+
+
+def result(size: int) -> memoryview:
+    return memoryview(bytes(size))
+
+
+def test_query_cache_hits_and_misses() -> None:
+    cache = QueryCache()
+    assert cache.get("SELECT 1", {}) is None
+    cache.put("SELECT 1", {}, result(10))
+    assert cache.get("SELECT  1\n", {}) is not None
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries, stats.size) == (1, 1, 1, 10)
+
+
+def test_query_cache_keyed_by_table_versions() -> None:
+    cache = QueryCache()
+    cache.put("SELECT * FROM t", {"t": 0}, result(10))
+    assert cache.get("SELECT * FROM t", {"t": 1}) is None
+    assert cache.get("SELECT * FROM t", {"t": 0}) is not None
+
+
+def test_query_cache_keyed_by_scope() -> None:
+    cache = QueryCache()
+    cache.put("SELECT * FROM t", {"t": 0}, result(10), scope=(1, 0))
+    assert cache.get("SELECT * FROM t", {"t": 0}, scope=(1, 1)) is None
+    assert cache.get("SELECT * FROM t", {"t": 0}, scope=(2, 0)) is None
+    assert cache.get("SELECT * FROM t", {"t": 0}, scope=(1, 0)) is not None
+
+
+def test_query_cache_evicts_least_recently_used() -> None:
+    cache = QueryCache(max_size=25)
+    cache.put("a", {}, result(10))
+    cache.put("b", {}, result(10))
+    cache.get("a", {})
+    cache.put("c", {}, result(10))
+    assert cache.get("b", {}) is None
+    assert cache.get("a", {}) is not None
+    assert cache.get("c", {}) is not None
+    stats = cache.stats()
+    assert (stats.evictions, stats.size) == (1, 20)
+
+    # results larger than the cache aren't cached
+    cache.put("d", {}, result(30))
+    assert cache.get("d", {}) is None
+
+    # shrinking the cache evicts results
+    cache.resize(10)
+    assert cache.stats().entries == 1
+
+
+def test_query_cache_invalidate() -> None:
+    cache = QueryCache()
+    cache.put("SELECT * FROM t", {"t": 0}, result(10))
+    cache.put("SELECT * FROM u", {"u": 0}, result(10))
+    cache.invalidate("t")
+    assert cache.get("SELECT * FROM t", {"t": 0}) is None
+    assert cache.get("SELECT * FROM u", {"u": 0}) is not None
+    assert cache.stats().invalidations == 1
+
+
+def test_normalize_sql() -> None:
+    assert normalize_sql("  SELECT\n  a,\tb FROM t ") == "SELECT a, b FROM t"
+    assert normalize_sql("SELECT 'a  b' AS \"c  d\"") == "SELECT 'a  b' AS \"c  d\""
@@ -0,0 +1,116 @@
+from inspect_viz import Data, Param, Selection
+from inspect_viz._core.references import (
+    column_references,
+    expression_columns,
+    param_references,
+    selection_upstream,
+    view_references,
+)
+from inspect_viz.input import select
+from inspect_viz.interactor import interval_x
+from inspect_viz.mark import dot
+from inspect_viz.plot import plot
+from inspect_viz.transform import column, sql
+
+COLUMNS = ["species", "island", "bill_depth", "body mass"]
+
+
+def test_expression_column_name() -> None:
+    assert expression_columns("species", COLUMNS) == {"species"}
+    assert expression_columns("body mass", COLUMNS) == {"body mass"}
+
+
+def test_expression_sql() -> None:
+    assert expression_columns("bill_depth * 2 + 1", COLUMNS) == {"bill_depth"}
+    assert expression_columns('AVG("body mass")', COLUMNS) == {"body mass"}
+    assert expression_columns("upper(SPECIES) || 'island'", COLUMNS) == {"species"}
+
+
+def test_expression_constants_and_params() -> None:
+    assert expression_columns("steelblue", COLUMNS) == set()
+    assert expression_columns(Param(1), COLUMNS) == set()
+    assert expression_columns(f"bill_depth + {Param(1)}", COLUMNS) == {"bill_depth"}
+
+
+def test_expression_unparseable() -> None:
+    assert expression_columns("island || 'unterminated", COLUMNS) is None
+
+
+def test_references_marks(penguins: Data) -> None:
+    component = plot(
+        dot(penguins, x="bill_depth", y=sql("flipper_length / 10"), fill="species")
+    )
+    references = column_references(component.config, {penguins.table: penguins})
+    assert references.columns == {
+        penguins.table: {"bill_depth", "flipper_length", "species"}
+    }
+    assert references.filter_by == {penguins.table: {penguins.selection.id}}
+
+
+def test_references_param_column(penguins: Data) -> None:
+    component = plot(dot(penguins, x=column(Param("bill_depth")), y="flipper_length"))
+    references = column_references(component.config, {penguins.table: penguins})
+    assert references.columns == {penguins.table: None}
+
+
+def test_references_views(penguins: Data) -> None:
+    dream = penguins.view(where="island = 'Dream'")
+    heavy = dream.view(where="body_mass > 4000")
+    component = plot(dot(heavy, x="bill_depth", y="flipper_length"))
+    tables = {data.table: data for data in [penguins, dream, heavy]}
+    references = column_references(component.config, tables)
+    assert view_references(references, tables) == [dream, heavy]
+
+    # columns referenced for views are passed through to the data they view
+    # (along with the columns the views filter on)
+    assert references.columns[penguins.table] == {
+        "island",
+        "body_mass",
+        "bill_depth",
+        "flipper_length",
+    }
+
+
+def test_references_selection_fields(penguins: Data) -> None:
+    selection = Selection("intersect")
+    component = select(penguins, column="island", target=selection)
+    references = column_references(component.config, {penguins.table: penguins})
+    assert references.columns == {penguins.table: {"island"}}
+    assert references.selection_fields == {selection.id: {"island"}}
+
+    component = plot(
+        [dot(penguins, x="bill_depth", y="flipper_length"), interval_x(selection)]
+    )
+    references = column_references(component.config, {penguins.table: penguins})
+    assert references.selection_fields == {selection.id: None}
+
+
+def test_selection_upstream() -> None:
+    upstream = Selection("intersect")
+    selection = Selection("intersect", include=upstream)
+    selections = {s.id: s for s in [upstream, selection]}
+    assert selection_upstream(selection.id, selections) == {selection.id, upstream.id}
+
+
+def test_param_references(penguins: Data) -> None:
+    upstream = Selection("intersect")
+    selection = Selection("intersect", include=upstream)
+    unused = Selection("intersect")
+    opacity = Param(0.5)
+    threshold = Param(10)
+    component = plot(
+        dot(
+            penguins,
+            x="bill_depth",
+            y=sql(f"flipper_length > {threshold}"),
+            fill_opacity=opacity,
+            filter_by=selection,
+        )
+    )
+    selections = {s.id: s for s in [upstream, selection, unused]}
+    assert param_references(component.config, selections) == {
+        opacity.id,
+        threshold.id,
+        selection.id,
+        upstream.id,
+    }
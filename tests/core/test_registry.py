@@ -0,0 +1,92 @@
+import gc
+import weakref
+
+import pandas as pd
+import pytest
+from inspect_viz import Data, Param, Selection, registry_stats
+from inspect_viz._core.kernel import KernelDatabase
+from inspect_viz.mark import dot
+from inspect_viz.plot import plot
+
+
+def frame() -> pd.DataFrame:
+    return pd.DataFrame({"x": range(1000), "y": range(1000)})
+
+
+def test_registry_releases_unreferenced() -> None:
+    data = Data(frame())
+    param = Param(1)
+    selection = Selection("intersect")
+    # (table names reference their data so we hold a plain str)
+    table, param_id, selection_id = str(data.table), param.id, selection.id
+    assert table in live_tables()
+
+    del data, param, selection
+    gc.collect()
+    assert table not in live_tables()
+    assert param_id not in [param.id for param in Param.get_all()]
+    assert selection_id not in [selection.id for selection in Selection.get_all()]
+
+
+def test_registry_releases_without_collection() -> None:
+    # data isn't part of a reference cycle (so it is released as soon as it
+    # is no longer referenced rather than by the next collection)
+    gc.disable()
+    try:
+        data = Data(frame())
+        table = str(data.table)
+        released = weakref.ref(data)
+        del data
+        assert released() is None
+        assert table not in live_tables()
+    finally:
+        gc.enable()
+
+
+def test_registry_retains_component_data() -> None:
+    component = plot(dot(Data(frame()), x="x", y="y"))
+    gc.collect()
+    table = str(component.config["hconcat"][0]["plot"][0]["data"]["from"])  # type: ignore[index,call-overload]
+    assert table in live_tables()
+
+    del component
+    gc.collect()
+    assert table not in live_tables()
+
+
+def test_data_close() -> None:
+    with Data(frame()) as data:
+        assert data.table in live_tables()
+    assert data.table not in live_tables()
+    assert len(data) == 0
+    with pytest.raises(ValueError):
+        data.append(frame())
+
+
+def test_data_close_unregisters_from_kernel() -> None:
+    pytest.importorskip("duckdb")
+    database = KernelDatabase()
+    data = Data(frame())
+    database.query(f'SELECT count(*) FROM "{data.table}"')
+    table = str(data.table)
+    assert table in database._registered
+
+    data.close()
+    database.query("SELECT 1")
+    assert table not in database._registered
+
+
+def test_registry_stats() -> None:
+    gc.collect()
+    before = registry_stats()
+    data = Data(frame())
+    after = registry_stats()
+    assert after.data == before.data + 1
+    assert after.selections == before.selections + 1
+    assert after.data_size > before.data_size
+    data.close()
+    assert registry_stats().data == before.data
+
+
+def live_tables() -> list[str]:
+    return [data.table for data in Data.get_all()]
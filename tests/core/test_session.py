@@ -0,0 +1,133 @@
+import gc
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from inspect_viz import Data, Param, Selection, Session
+from inspect_viz._core.data import DEFAULT_ROW_GROUP_SIZE
+from inspect_viz._core.kernel import KernelDatabase, kernel_database
+from inspect_viz._core.registry import Registry
+from inspect_viz.mark import dot
+from inspect_viz.options import (
+    data_backend,
+    data_compression,
+    data_format,
+    plot_defaults,
+)
+from inspect_viz.plot import plot
+
+
+def frame() -> pd.DataFrame:
+    return pd.DataFrame({"x": range(100), "y": range(100)})
+
+
+def test_session_scopes_registries() -> None:
+    outer = Param(1)
+    with Session().activate():
+        data = Data(frame())
+        param = Param(2)
+        assert Data.get_all() == [data]
+        assert Param.get_all() == [param]
+        assert [s.id for s in Selection.get_all()] == [data.selection.id]
+    assert data not in Data.get_all()
+    assert param.id not in [p.id for p in Param.get_all()]
+    assert outer.id in [p.id for p in Param.get_all()]
+
+
+def test_session_scopes_data_shipping() -> None:
+    with Session().activate():
+        data_format("parquet")
+        data_compression("zstd")
+        data = Data(frame())
+    assert bytes(data._encode()[:4]) == b"PAR1"
+    assert data._shipping() == ("parquet", "zstd", DEFAULT_ROW_GROUP_SIZE)
+    assert Data(frame())._shipping() == ("arrow", None, DEFAULT_ROW_GROUP_SIZE)
+
+
+def test_session_scopes_plot_defaults() -> None:
+    with Session().activate():
+        plot_defaults(width=300)
+        component = plot(dot(Data(frame()), x="x", y="y"))
+        component.widget._repr_mimebundle_()
+        assert json.loads(component.widget.spec)["plotDefaults"]["width"] == 300
+
+    component = plot(dot(Data(frame()), x="x", y="y"))
+    component.widget._repr_mimebundle_()
+    assert "width" not in json.loads(component.widget.spec)["plotDefaults"]
+
+
+def test_session_scopes_data_backend() -> None:
+    with Session().activate():
+        data_backend("server", url="ws://localhost:8765")
+        component = plot(dot(Data(frame()), x="x", y="y"))
+        component.widget._repr_mimebundle_()
+        assert component.widget.backend == "server"
+
+    component = plot(dot(Data(frame()), x="x", y="y"))
+    component.widget._repr_mimebundle_()
+    assert component.widget.backend == "browser"
+
+
+def test_session_data_queried_by_session_database() -> None:
+    with Session().activate() as session:
+        data = Data(frame())
+        database = kernel_database()
+        sql = f'SELECT count(*) AS n FROM "{data.table}"'
+        assert database.query_rows(sql) == [{"n": 100}]
+    assert kernel_database(session) is database
+
+    # data isn't registered with the databases of other sessions
+    with pytest.raises(Exception, match="does not exist"):
+        kernel_database().query_rows(sql)
+    with pytest.raises(Exception, match="does not exist"):
+        KernelDatabase().query_rows(sql)
+
+
+def test_sessions_concurrent_display() -> None:
+    def display(i: int) -> None:
+        with Session().activate():
+            data = Data(frame())
+            param = Param(i)
+            component = plot(dot(data, x="x", y=param))
+            component.widget._repr_mimebundle_()
+
+            # only this session's tables and params are included
+            assert list(component.widget.tables) == [data.table]
+            spec = json.loads(component.widget.spec)
+            assert set(spec["params"]) == {param.id, data.selection.id}
+            component.close()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for future in [executor.submit(display, i) for i in range(64)]:
+            future.result()
+
+
+def test_registry_concurrent_access() -> None:
+    class Item:
+        pass
+
+    registry: Registry[Item] = Registry()
+    retained: list[Item] = []
+    lock = threading.Lock()
+
+    def work(i: int) -> None:
+        for j in range(200):
+            item = Item()
+            registry.add(item)
+            if j % 2 == 0:
+                with lock:
+                    retained.append(item)
+            else:
+                registry.get_all()
+            if j % 50 == 0:
+                gc.collect()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for future in [executor.submit(work, i) for i in range(16)]:
+            future.result()
+
+    gc.collect()
+    assert len(registry) == len(retained) == 16 * 100
+    assert set(map(id, registry.get_all())) == set(map(id, retained))
@@ -0,0 +1,131 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from inspect_viz import Data, Session
+from inspect_viz.mark import dot
+from inspect_viz.options import data_backend
+from inspect_viz.plot import plot
+from inspect_viz.server import QueryServer
+
+pytest.importorskip("duckdb")
+pytest.importorskip("websockets")
+
+
+@pytest.fixture
+def fruit() -> Data:
+    return Data(
+        pd.DataFrame({"name": ["apple", "banana", "cherry"], "count": [3, 1, 2]})
+    )
+
+
+def test_server_arrow_query(fruit: Data) -> None:
+    sql = f'SELECT name FROM "{fruit.table}" ORDER BY count'
+    result = run_queries([dict(type="arrow", sql=sql)])[0]
+    assert isinstance(result, bytes)
+    table = pa.ipc.open_stream(result).read_all()
+    assert table.column("name").to_pylist() == ["banana", "cherry", "apple"]
+
+
+def test_server_json_query(fruit: Data) -> None:
+    sql = f'SELECT sum(count) AS n FROM "{fruit.table}"'
+    result = run_queries([dict(type="json", sql=sql)])[0]
+    assert json.loads(result) == [{"n": 6}]
+
+
+def test_server_exec_shared_across_connections() -> None:
+    # tables created with exec are visible to queries on other (pooled)
+    # connections
+    results = run_queries(
+        [
+            dict(type="exec", sql="CREATE TABLE shared AS SELECT 42 AS x"),
+            dict(type="json", sql="SELECT x FROM shared"),
+        ]
+    )
+    assert json.loads(results[0]) == {}
+    assert json.loads(results[1]) == [{"x": 42}]
+
+
+def test_server_session_data() -> None:
+    # the server only queries the data of the session it was created in
+    with Session().activate():
+        other = Data(pd.DataFrame({"x": [1, 2, 3]}))
+    result = run_queries([dict(type="json", sql=f'SELECT * FROM "{other.table}"')])[0]
+    assert "does not exist" in json.loads(result)["error"]
+
+
+def test_server_query_error() -> None:
+    result = run_queries([dict(type="arrow", sql="SELECT * FROM missing")])[0]
+    assert "missing" in json.loads(result)["error"]
+
+
+def test_server_backend(fruit: Data) -> None:
+    with pytest.raises(ValueError):
+        data_backend("server")
+
+    data_backend("server", url="ws://localhost:8765")
+    try:
+        component = plot(dot(fruit, x="name", y="count"))
+        component._repr_mimebundle_()
+        assert component.widget.backend == "server"
+        assert component.widget.backend_url == "ws://localhost:8765"
+        assert component.widget.tables == {}
+    finally:
+        data_backend("browser")
+
+
+def test_server_no_file_access(tmp_path: Path) -> None:
+    path = tmp_path / "secret.txt"
+    path.write_text("secret")
+    result = run_queries(
+        [dict(type="json", sql=f"SELECT content FROM read_text('{path}')")]
+    )[0]
+    assert "disabled" in json.loads(result)["error"]
+
+
+def test_server_origins(fruit: Data) -> None:
+    from websockets.exceptions import InvalidStatus
+
+    sql = f'SELECT sum(count) AS n FROM "{fruit.table}"'
+    query = dict(type="json", sql=sql)
+
+    # pages served from localhost and allowed origins can query the server
+    for origin in ["http://localhost:8888", "https://viz.example.com"]:
+        result = run_queries([query], origin=origin)[0]
+        assert json.loads(result) == [{"n": 6}]
+
+    # pages served from other origins can't
+    with pytest.raises(InvalidStatus):
+        run_queries([query], origin="https://evil.example.com")
+
+
+def test_server_max_message_size() -> None:
+    from websockets.exceptions import ConnectionClosedError
+
+    with pytest.raises(ConnectionClosedError):
+        run_queries([dict(type="json", sql="SELECT 1 -- " + "x" * 2**21)])
+
+
+def run_queries(queries: list[dict[str, Any]], origin: str | None = None) -> list[Any]:
+    from websockets.asyncio.client import connect
+    from websockets.typing import Origin
+
+    # send each query from its own client
+    async def run() -> list[Any]:
+        async with QueryServer(
+            port=0, connections=2, origins=["https://viz.example.com"]
+        ) as server:
+            results: list[Any] = []
+            for query in queries:
+                async with connect(
+                    server.url, origin=Origin(origin) if origin else None
+                ) as websocket:
+                    await websocket.send(json.dumps(query))
+                    results.append(await websocket.recv())
+            return results
+
+    return asyncio.run(run())